@@ -0,0 +1,148 @@
+"""
+AGREGADOS DE VENDAS
+Totais corridos (quantidade, valor e ticket médio), gerais e por
+vendedor, produto, região e dia, atualizados em O(1) por venda, mais a
+série diária para consultas por período
+"""
+
+from itertools import count
+
+from agrupamento import Agrupamento, agrupar_colunas
+from serie_temporal import SerieDiaria, ordinal_data
+
+DIMENSOES = ('vendedor', 'produto', 'regiao', 'data')
+
+# Versões únicas entre instâncias: servem de chave para caches (ex.: relatórios)
+_VERSOES = count(1)
+
+
+class Grupo:
+    """Totais de um valor de dimensão (ex.: um vendedor)"""
+
+    __slots__ = ('quantidade', 'valor', 'unidades')
+
+    def __init__(self, quantidade=0, valor=0.0, unidades=0):
+        self.quantidade = quantidade    # número de vendas
+        self.valor = valor              # soma de 'total'
+        self.unidades = unidades        # soma de 'quantidade'
+
+    @property
+    def ticket_medio(self):
+        return self.valor / self.quantidade if self.quantidade else 0.0
+
+
+class Agregados:
+    """Motor de agregação incremental"""
+
+    def __init__(self):
+        self.versao = 0
+        self.versao_base = 0    # última alteração que não foi só acréscimo de vendas
+        self.limpar()
+
+    def limpar(self):
+        """Zerar todos os totais"""
+        self.geral = Grupo()
+        self.grupos = {dimensao: {} for dimensao in DIMENSOES}
+        self.serie = SerieDiaria()
+        self._reiniciar_base()
+
+    # ============ ATUALIZAÇÃO ============
+
+    def adicionar(self, venda):
+        """Incluir uma venda nos totais"""
+        total = venda['total']
+        unidades = venda['quantidade']
+        self._somar(self.geral, 1, total, unidades)
+        for dimensao, grupos in self.grupos.items():
+            chave = venda[dimensao]
+            grupo = grupos.get(chave)
+            if grupo is None:
+                grupo = grupos[chave] = Grupo()
+            self._somar(grupo, 1, total, unidades)
+        self.serie.adicionar(ordinal_data(venda['data']), 1, total, unidades)
+        self.versao = next(_VERSOES)
+
+    def adicionar_lote(self, vendas):
+        for venda in vendas:
+            self.adicionar(venda)
+
+    def remover(self, venda):
+        """Retirar uma venda dos totais"""
+        total = venda['total']
+        unidades = venda['quantidade']
+        self._somar(self.geral, -1, -total, -unidades)
+        for dimensao, grupos in self.grupos.items():
+            chave = venda[dimensao]
+            grupo = grupos.get(chave)
+            if grupo is None:
+                continue
+            self._somar(grupo, -1, -total, -unidades)
+            if grupo.quantidade <= 0:
+                del grupos[chave]
+        self.serie.adicionar(ordinal_data(venda['data']), -1, -total, -unidades)
+        self._reiniciar_base()
+
+    def _reiniciar_base(self):
+        self.versao = self.versao_base = next(_VERSOES)
+
+    def so_acrescimos_desde(self, versao):
+        """Desde 'versao' (destes ou de outros agregados) só houve vendas adicionadas?"""
+        return self.versao_base <= versao
+
+    @staticmethod
+    def _somar(grupo, quantidade, valor, unidades):
+        grupo.quantidade += quantidade
+        grupo.valor += valor
+        grupo.unidades += unidades
+        if grupo.quantidade <= 0:
+            # Evitar resíduos de ponto flutuante quando o grupo esvazia
+            grupo.quantidade, grupo.valor, grupo.unidades = 0, 0.0, 0
+
+    def definir_grupos(self, dimensao, linhas):
+        """Carregar totais pré-calculados: linhas de (chave, quantidade, valor, unidades)"""
+        self.grupos[dimensao] = grupos = {chave: Grupo(q, v, u) for chave, q, v, u in linhas}
+        if dimensao == 'data':
+            self.serie.carregar((ordinal_data(chave), g.quantidade, g.valor, g.unidades)
+                                for chave, g in grupos.items())
+        self._reiniciar_base()
+
+    def definir_geral(self, quantidade, valor, unidades):
+        self.geral = Grupo(quantidade, valor, unidades)
+        self._reiniciar_base()
+
+    def carregar_colunas(self, vendas):
+        """Recalcular tudo a partir de um VendasColunares (group-by vetorizado)"""
+        self.limpar()
+        self.definir_geral(*vendas.resumo())
+        for dimensao in DIMENSOES:
+            self.definir_grupos(dimensao, agrupar_colunas(vendas, dimensao).linhas())
+
+    # ============ CONSULTA ============
+
+    @property
+    def quantidade(self):
+        return self.geral.quantidade
+
+    @property
+    def valor_total(self):
+        return self.geral.valor
+
+    @property
+    def ticket_medio(self):
+        return self.geral.ticket_medio
+
+    def totais(self, dimensao):
+        """Valor total por chave da dimensão"""
+        return {chave: grupo.valor for chave, grupo in self.grupos[dimensao].items()}
+
+    def agrupamento(self, dimensao):
+        """Totais correntes da dimensão no formato do motor de agrupamento"""
+        grupos = self.grupos[dimensao]
+        chaves = list(grupos)
+        return Agrupamento((dimensao,), [(chave,) for chave in chaves],
+                           [grupos[c].quantidade for c in chaves],
+                           [grupos[c].valor for c in chaves],
+                           [grupos[c].unidades for c in chaves])
+
+    def grupo(self, dimensao, chave):
+        return self.grupos[dimensao].get(chave, Grupo())
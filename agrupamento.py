@@ -0,0 +1,278 @@
+"""
+AGRUPAMENTO DE VENDAS
+Group-by vetorizado sobre os códigos de categoria das vendas colunares:
+soma por segmento (bincount), combinações de dimensões e top-N
+"""
+
+import heapq
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele os mesmos kernels rodam em Python puro
+    np = None
+
+DIMENSOES_AGRUPAVEIS = ('data', 'vendedor', 'produto', 'regiao')
+APELIDOS = {'dia': 'data', 'região': 'regiao'}
+
+# Até este número de combinações os totais ficam em vetores densos indexados pelo código
+LIMITE_DENSO = 1 << 20
+
+
+def normalizar_dimensoes(dimensoes):
+    """Aceitar 'vendedor', ('vendedor', 'regiao') ou 'vendedor,regiao'"""
+    if isinstance(dimensoes, str):
+        dimensoes = dimensoes.split(',')
+    resultado = tuple(APELIDOS.get(d.strip(), d.strip()) for d in dimensoes)
+    for dimensao in resultado:
+        if dimensao not in DIMENSOES_AGRUPAVEIS:
+            raise ValueError(f"Dimensão não agrupável: {dimensao}")
+    if not resultado:
+        raise ValueError("Informe ao menos uma dimensão")
+    return resultado
+
+
+class Agrupamento:
+    """Resultado de um group-by: uma linha por combinação de chaves presente"""
+
+    def __init__(self, dimensoes, chaves, quantidades, valores, unidades):
+        self.dimensoes = dimensoes
+        self.chaves = chaves                # lista de tuplas
+        self.quantidades = quantidades      # número de vendas
+        self.valores = valores              # soma de 'total'
+        self.unidades = unidades            # soma de 'quantidade'
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _chave(self, i):
+        chave = self.chaves[i]
+        return chave[0] if len(self.dimensoes) == 1 else chave
+
+    def linhas(self, indices=None):
+        """(chave, vendas, valor, unidades) para cada grupo"""
+        if indices is None:
+            indices = range(len(self))
+        for i in indices:
+            yield (self._chave(i), int(self.quantidades[i]),
+                   float(self.valores[i]), int(self.unidades[i]))
+
+    def totais(self):
+        """Valor total por chave"""
+        return {chave: valor for chave, _, valor, _ in self.linhas()}
+
+    def ordenado(self):
+        """Grupos do maior para o menor valor"""
+        return self.top(len(self))
+
+    def top(self, n):
+        """Os n grupos de maior valor, em ordem decrescente"""
+        n = min(n, len(self))
+        if n <= 0:
+            return []
+        if np is not None:
+            valores = np.asarray(self.valores, dtype=np.float64)
+            if n < len(valores):
+                indices = np.argpartition(-valores, n - 1)[:n]
+            else:
+                indices = np.arange(len(valores))
+            indices = indices[np.argsort(-valores[indices], kind='stable')]
+            return list(self.linhas(indices.tolist()))
+        indices = heapq.nlargest(n, range(len(self)), key=self.valores.__getitem__)
+        return list(self.linhas(indices))
+
+
+def agrupar_colunas(vendas, dimensoes):
+    """Group-by sobre um VendasColunares usando os códigos das dimensões"""
+    dimensoes = normalizar_dimensoes(dimensoes)
+    colunas = [vendas.codigos[d] for d in dimensoes]
+    cardinalidades = [max(1, len(vendas.dicionarios[d])) for d in dimensoes]
+    tabelas = [vendas.dicionarios[d].valores for d in dimensoes]
+
+    if not len(vendas):
+        return Agrupamento(dimensoes, [], [], [], [])
+
+    if np is not None:
+        codigos, quantidades, valores, unidades = _somar_numpy(
+            colunas, cardinalidades, vendas.total, vendas.quantidade)
+    else:
+        codigos, quantidades, valores, unidades = _somar_python(
+            colunas, cardinalidades, vendas.total, vendas.quantidade)
+
+    chaves = [_decodificar(c, cardinalidades, tabelas) for c in codigos]
+    return Agrupamento(dimensoes, chaves, quantidades, valores, unidades)
+
+
+def agrupar_vendas(vendas, dimensoes):
+    """Group-by genérico: usa os kernels colunares quando possível"""
+    if hasattr(vendas, 'codigos'):
+        return agrupar_colunas(vendas, dimensoes)
+
+    dimensoes = normalizar_dimensoes(dimensoes)
+    grupos = {}
+    for v in vendas:
+        chave = tuple(v[d] for d in dimensoes)
+        grupo = grupos.get(chave)
+        if grupo is None:
+            grupo = grupos[chave] = [0, 0.0, 0]
+        grupo[0] += 1
+        grupo[1] += v['total']
+        grupo[2] += v['quantidade']
+    chaves = list(grupos)
+    return Agrupamento(dimensoes, chaves,
+                       [grupos[c][0] for c in chaves],
+                       [grupos[c][1] for c in chaves],
+                       [grupos[c][2] for c in chaves])
+
+
+def agrupar_varios(vendas, lista_dimensoes):
+    """Um Agrupamento para cada item de 'lista_dimensoes', sobre as mesmas vendas"""
+    return [agrupar_vendas(vendas, dimensoes) for dimensoes in lista_dimensoes]
+
+
+def somar_agrupamentos(a, b):
+    """Agrupamento com os totais de 'a' e 'b' (mesmas dimensões) somados por chave"""
+    chaves = [tuple(chave) for chave in a.chaves]
+    posicoes = {chave: i for i, chave in enumerate(chaves)}
+    quantidades = [int(q) for q in a.quantidades]
+    valores = [float(v) for v in a.valores]
+    unidades = [int(u) for u in a.unidades]
+    for chave, q, v, u in zip(b.chaves, b.quantidades, b.valores, b.unidades):
+        chave = tuple(chave)
+        i = posicoes.get(chave)
+        if i is None:
+            posicoes[chave] = len(chaves)
+            chaves.append(chave)
+            quantidades.append(int(q))
+            valores.append(float(v))
+            unidades.append(int(u))
+        else:
+            quantidades[i] += int(q)
+            valores[i] += float(v)
+            unidades[i] += int(u)
+    return Agrupamento(a.dimensoes, chaves, quantidades, valores, unidades)
+
+
+# ============ KERNELS ============
+
+def _somar_numpy(colunas, cardinalidades, total, quantidade):
+    combinado = np.zeros(len(total), dtype=np.int64)
+    for coluna, cardinalidade in zip(colunas, cardinalidades):
+        combinado *= cardinalidade
+        combinado += np.frombuffer(coluna, dtype=np.uint32)
+    pesos_total = np.frombuffer(total, dtype=np.float64)
+    pesos_quantidade = np.frombuffer(quantidade, dtype=np.int64)
+
+    tamanho = 1
+    for cardinalidade in cardinalidades:
+        tamanho *= cardinalidade
+
+    if tamanho <= LIMITE_DENSO:
+        quantidades = np.bincount(combinado, minlength=tamanho)
+        codigos = np.flatnonzero(quantidades)
+        valores = np.bincount(combinado, weights=pesos_total, minlength=tamanho)[codigos]
+        unidades = np.bincount(combinado, weights=pesos_quantidade, minlength=tamanho)[codigos]
+        quantidades = quantidades[codigos]
+    else:
+        # Muitas combinações possíveis: compactar só as presentes antes de somar
+        codigos, inverso = np.unique(combinado, return_inverse=True)
+        quantidades = np.bincount(inverso)
+        valores = np.bincount(inverso, weights=pesos_total)
+        unidades = np.bincount(inverso, weights=pesos_quantidade)
+
+    return codigos.tolist(), quantidades, valores, unidades.astype(np.int64)
+
+
+def _somar_python(colunas, cardinalidades, total, quantidade):
+    if len(colunas) == 1:
+        combinados = colunas[0]
+    else:
+        def combinar(codigos):
+            resultado = 0
+            for codigo, cardinalidade in zip(codigos, cardinalidades):
+                resultado = resultado * cardinalidade + codigo
+            return resultado
+        combinados = map(combinar, zip(*colunas))
+
+    tamanho = 1
+    for cardinalidade in cardinalidades:
+        tamanho *= cardinalidade
+
+    if tamanho <= LIMITE_DENSO:
+        quantidades = [0] * tamanho
+        valores = [0.0] * tamanho
+        unidades = [0] * tamanho
+        for codigo, t, q in zip(combinados, total, quantidade):
+            quantidades[codigo] += 1
+            valores[codigo] += t
+            unidades[codigo] += q
+        codigos = [c for c in range(tamanho) if quantidades[c]]
+        return (codigos, [quantidades[c] for c in codigos],
+                [valores[c] for c in codigos], [unidades[c] for c in codigos])
+
+    grupos = {}
+    for codigo, t, q in zip(combinados, total, quantidade):
+        grupo = grupos.get(codigo)
+        if grupo is None:
+            grupo = grupos[codigo] = [0, 0.0, 0]
+        grupo[0] += 1
+        grupo[1] += t
+        grupo[2] += q
+    codigos = list(grupos)
+    return (codigos, [grupos[c][0] for c in codigos],
+            [grupos[c][1] for c in codigos], [grupos[c][2] for c in codigos])
+
+
+def _decodificar(codigo, cardinalidades, tabelas):
+    """Código combinado -> tupla de valores das dimensões"""
+    partes = []
+    for cardinalidade, tabela in zip(reversed(cardinalidades), reversed(tabelas)):
+        codigo, resto = divmod(codigo, cardinalidade)
+        partes.append(tabela[resto])
+    return tuple(reversed(partes))
+
+
+# ============ COMPARAÇÃO COM O LAÇO ORIGINAL ============
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    from vendas_colunares import VendasColunares
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    aleatorio = random.Random(42)
+    vendedores = ['Ana', 'Bruno', 'Carla', 'Joao', 'Maria', 'Pedro']
+    produtos = ['Notebook', 'Smartphone', 'Tablet', 'Monitor', 'Mouse', 'Teclado', 'Fone', 'Webcam']
+    regioes = ['Norte', 'Sul', 'Leste', 'Oeste', 'Centro']
+    lista = []
+    for i in range(n):
+        qtd = aleatorio.randint(1, 5)
+        preco = float(aleatorio.randint(50, 3000))
+        lista.append({'data': f"{1 + i % 28:02d}/{1 + i // 28 % 12:02d}/2026",
+                      'vendedor': aleatorio.choice(vendedores),
+                      'produto': aleatorio.choice(produtos),
+                      'quantidade': qtd, 'preco': preco, 'total': qtd * preco,
+                      'regiao': aleatorio.choice(regioes)})
+    colunar = VendasColunares(lista)
+
+    def laco_original():
+        resultados = []
+        for campo in ('vendedor', 'produto', 'regiao'):
+            grupos = {}
+            for v in lista:
+                grupos[v[campo]] = grupos.get(v[campo], 0) + v['total']
+            resultados.append(sorted(grupos.items(), key=lambda x: x[1], reverse=True)[:5])
+        return resultados
+
+    def motor():
+        return [agrupar_colunas(colunar, (campo,)).top(5)
+                for campo in ('vendedor', 'produto', 'regiao')]
+
+    print(f"{n} vendas, NumPy {'ativo' if np is not None else 'ausente'}")
+    for nome, funcao in (('laço original', laco_original), ('motor vetorizado', motor),
+                         ('vendedor×região', lambda: agrupar_colunas(colunar, 'vendedor,regiao')),
+                         ('produto×dia', lambda: agrupar_colunas(colunar, 'produto,dia'))):
+        inicio = time.perf_counter()
+        funcao()
+        print(f"{nome:<20}{time.perf_counter() - inicio:>10.3f} s")
@@ -0,0 +1,702 @@
+"""
+ARMAZENAMENTO DE VENDAS
+Backends de persistência: CSV + diário (em memória) e SQLite (paginado)
+"""
+
+import csv
+import os
+import sqlite3
+from array import array
+from collections.abc import Sequence
+from datetime import datetime
+from itertools import islice
+
+from agregados import DIMENSOES, Agregados
+from agrupamento import Agrupamento, agrupar_varios, agrupar_vendas, normalizar_dimensoes
+from diario import DiarioVendas
+from filtros import IndiceInvertido
+from ordenacao import CAMPOS_NUMERICOS, CAMPOS_ORDENAVEIS, OrdemColunas
+from importador import LeitorVendas, em_lotes
+from retrato import gravar_retrato, ler_retrato
+from serie_temporal import dentro_periodo, iso_data, ordinal_data
+from vendas_colunares import CAMPOS, VendasColunares
+
+# A partir deste tamanho agrupamentos fora do mainloop vão para o pool de processos
+LIMITE_PROCESSO = 200000
+
+
+def ler_csv(caminho):
+    """Vendas de um arquivo CSV, lidas em fluxo (vazio se o arquivo não existir)"""
+    if not os.path.exists(caminho):
+        return iter(())
+    return iter(LeitorVendas(caminho))
+
+
+def data_iso(data):
+    """Converter 'dd/mm/YYYY' para 'YYYY-MM-DD' (None se inválida)"""
+    try:
+        return datetime.strptime(data, '%d/%m/%Y').strftime('%Y-%m-%d')
+    except (ValueError, TypeError):
+        return None
+
+
+class Foto:
+    """Vendas existentes em um instante, seguras para leitura em outra thread"""
+
+    def __init__(self, quantidade, iterar):
+        self.quantidade = quantidade
+        self._iterar = iterar
+
+    def __len__(self):
+        return self.quantidade
+
+    def __iter__(self):
+        return self._iterar()
+
+
+class VendasFiltradas(Sequence):
+    """Vendas que atendem a um filtro, na ordem do armazenamento
+
+    'posicoes' identifica as vendas (posição ou id) e buscar(posicoes)
+    devolve as vendas correspondentes, na mesma ordem.
+    """
+
+    def __init__(self, posicoes, buscar):
+        self.posicoes = posicoes
+        self._buscar = buscar
+
+    def __len__(self):
+        return len(self.posicoes)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return self._buscar(self.posicoes[indice])
+        return self._buscar([self.posicoes[indice]])[0]
+
+
+class Armazenamento:
+    """Interface comum dos backends de armazenamento
+
+    'vendas' é uma sequência de dicionários com os campos de CAMPOS e
+    'agregados' mantém os totais correntes, atualizados a cada alteração.
+    """
+
+    vendas = ()
+    agregados = None
+    # Vendas novas sempre entram no fim de 'vendas', na ordem dos agregados
+    # (permite reaproveitar cálculos anteriores somando só as novas)
+    acrescimos_no_fim = True
+
+    def abrir(self):
+        """Abrir o armazenamento e carregar (ou indexar) as vendas"""
+        raise NotImplementedError
+
+    def adicionar(self, venda):
+        """Adicionar uma venda"""
+        self.adicionar_lote([venda])
+
+    def adicionar_lote(self, vendas):
+        """Adicionar várias vendas de uma vez"""
+        raise NotImplementedError
+
+    def limpar(self):
+        """Remover todas as vendas"""
+        raise NotImplementedError
+
+    def contar(self):
+        return len(self.vendas)
+
+    def pagina(self, inicio, limite):
+        """Vendas nas posições [inicio, inicio + limite)"""
+        return list(self.vendas[inicio:inicio + limite])
+
+    def resumo(self):
+        """(quantidade de vendas, valor total)"""
+        return self.agregados.quantidade, self.agregados.valor_total
+
+    def agregar(self, campo):
+        """Valor total vendido por valor do campo"""
+        if campo not in DIMENSOES:
+            raise ValueError(f"Campo não agregável: {campo}")
+        return self.agregados.totais(campo)
+
+    def agrupar(self, dimensoes):
+        """Group-by sobre uma ou mais dimensões (ex.: 'vendedor,regiao')"""
+        return agrupar_vendas(self.vendas, dimensoes)
+
+    def filtrar(self, filtro, ordem=None):
+        """Vendas que atendem ao filtro (sequência somente leitura)
+
+        ordem: (campo, decrescente) para ordenar o resultado; sem ordem as
+        vendas seguem a ordem do armazenamento.
+        """
+        if filtro.vazio and ordem is None:
+            return self.vendas
+        vendas = self.vendas
+        posicoes = [i for i, venda in enumerate(vendas) if filtro.aceita(venda)]
+        if ordem is not None:
+            campo, decrescente = ordem
+            if campo == 'data':
+                chave = lambda i: ordinal_data(vendas[i]['data'])
+            elif campo in CAMPOS_NUMERICOS:
+                chave = lambda i: vendas[i][campo]
+            else:
+                chave = lambda i: vendas[i][campo].casefold()
+            # Decrescente = crescente invertida, como nas permutações em cache
+            posicoes.sort(key=chave)
+            if decrescente:
+                posicoes.reverse()
+        return VendasFiltradas(array('I', posicoes), lambda ps: [vendas[p] for p in ps])
+
+    def foto(self, de=None, ate=None):
+        """Vendas atuais para leitura fora do mainloop (ex.: exportação)
+
+        Com 'de'/'ate' (ordinais de data) só entram as vendas do período,
+        em ordem de data.
+        """
+        vendas = self.vendas
+        if de is None and ate is None:
+            quantidade = len(vendas)
+            return Foto(quantidade, lambda: islice(iter(vendas), quantidade))
+        if hasattr(vendas, 'indices_periodo'):
+            indices = vendas.indices_periodo(de, ate)
+            return Foto(len(indices), lambda: map(vendas.__getitem__, indices))
+        selecionadas = [v for v in vendas if dentro_periodo(ordinal_data(v['data']), de, ate)]
+        return Foto(len(selecionadas), lambda: iter(selecionadas))
+
+    def preparar_agrupamentos(self, lista_dimensoes, de=None, ate=None):
+        """(função, argumentos, usar_processo) para agrupar fora do mainloop
+
+        A função devolve um Agrupamento para cada item de 'lista_dimensoes',
+        calculados só com as vendas do período [de, ate], se informado.
+        """
+        return agrupar_varios, (list(self.foto(de, ate)), lista_dimensoes), False
+
+    def alteracoes_externas(self):
+        """Outro processo alterou as vendas desde a última chamada? (modo servidor)"""
+        return False
+
+    def salvar(self):
+        """Garantir que os dados estejam gravados"""
+
+    def fechar(self):
+        """Gravar pendências e liberar recursos"""
+        self.salvar()
+
+
+# ============ CSV + DIÁRIO ============
+
+class ArmazenamentoCSV(Armazenamento):
+    """Vendas em memória (colunares), persistidas no diário e no retrato binário
+
+    O CSV só é lido na primeira abertura (migração). A cópia completa em
+    CSV é O(N): só é regravada ao fechar com copia_csv=True, ou por
+    salvar_copia_csv().
+    """
+
+    def __init__(self, caminho_csv='vendas_salvas.csv', caminho_diario='vendas_salvas.diario',
+                 caminho_retrato=None, copia_csv=False):
+        self.caminho_csv = caminho_csv
+        self.copia_csv = copia_csv
+        self.caminho_diario = caminho_diario
+        self.caminho_retrato = caminho_retrato or os.path.splitext(caminho_diario)[0] + '.retrato'
+        self.diario = None
+        self.vendas = VendasColunares()
+        self.agregados = Agregados()
+        self.indice = None          # índice invertido, montado no primeiro filtro
+        self.ordens = None          # permutações ordenadas, montadas na primeira ordenação
+
+    def abrir(self):
+        self.diario = DiarioVendas(self.caminho_diario, ao_compactar=self._retrato_compactado)
+        # O retrato binário evita reproduzir o diário inteiro; desatualizado, vale o diário
+        vendas = None
+        retrato = ler_retrato(self.caminho_retrato)
+        if retrato is not None:
+            vendas = self.diario.carregar(criar=VendasColunares, base=retrato)
+        if vendas is None:
+            vendas = self.diario.carregar(criar=VendasColunares)
+        if vendas is None:
+            # Primeira execução com diário: migrar o CSV existente
+            vendas = VendasColunares(ler_csv(self.caminho_csv))
+            self.diario.iniciar(vendas)
+        self.vendas = vendas
+        self.indice = None
+        self.ordens = None
+        self.recalcular_agregados()
+
+    def recalcular_agregados(self):
+        """Montar os totais correntes a partir das colunas"""
+        self.agregados.carregar_colunas(self.vendas)
+
+    def adicionar(self, venda):
+        self.vendas.append(venda)
+        self.agregados.adicionar(venda)
+        self.diario.registrar_venda(venda)
+        self.verificar_compactacao()
+
+    def adicionar_lote(self, vendas):
+        vendas = list(vendas)
+        self.vendas.extend(vendas)
+        self.agregados.adicionar_lote(vendas)
+        self.diario.registrar_vendas(vendas)
+        self.verificar_compactacao()
+
+    def limpar(self):
+        self.vendas = VendasColunares()
+        self.indice = None
+        self.ordens = None
+        self.agregados.limpar()
+        self.diario.registrar_limpeza()
+        self.verificar_compactacao()
+
+    def filtrar(self, filtro, ordem=None):
+        if filtro.vazio and ordem is None:
+            return self.vendas
+        # As vendas só crescem no fim: índice e permutações acompanham processando só as novas
+        vendas = self.vendas
+        posicoes = None
+        if not filtro.vazio:
+            if self.indice is None or self.indice.vendas is not vendas:
+                self.indice = IndiceInvertido(vendas)
+            posicoes = self.indice.consultar(filtro)
+        if ordem is not None:
+            if self.ordens is None or self.ordens.vendas is not vendas:
+                self.ordens = OrdemColunas(vendas)
+            posicoes = self.ordens.ordenar(*ordem, posicoes=posicoes)
+        return VendasFiltradas(posicoes, lambda ps: [vendas[p] for p in ps])
+
+    def preparar_agrupamentos(self, lista_dimensoes, de=None, ate=None):
+        # Colunas copiadas agora: a thread/processo recebe um retrato consistente.
+        # Só compensa pagar a serialização para outro processo em históricos grandes.
+        if de is None and ate is None:
+            vendas = self.vendas.copiar()
+        else:
+            vendas = self.vendas.periodo(de, ate)
+        usar_processo = len(vendas) >= LIMITE_PROCESSO
+        return agrupar_varios, (vendas, lista_dimensoes), usar_processo
+
+    def verificar_compactacao(self):
+        """Compactar o diário em segundo plano quando houver muitos registros mortos"""
+        if self.diario.precisa_compactar():
+            self.diario.compactar(self.vendas)
+
+    def gravar_retrato(self):
+        """Gravar o retrato binário das vendas atuais (com o diário já fechado)"""
+        gravar_retrato(self.caminho_retrato, self.vendas, self.diario.geracao,
+                       os.path.getsize(self.caminho_diario), self.diario.registros)
+
+    def _retrato_compactado(self, vendas, quantidade, geracao, deslocamento):
+        # Thread da compactação: a base do novo diário tem um registro por venda
+        try:
+            gravar_retrato(self.caminho_retrato, vendas, geracao, deslocamento, quantidade, quantidade)
+        except OSError:
+            pass        # sem retrato novo, a próxima abertura reproduz o diário
+
+    def salvar(self):
+        """Levar ao disco os registros pendentes do diário"""
+        if self.diario is not None:
+            self.diario.sincronizar()
+
+    def salvar_copia_csv(self):
+        """Gravar cópia completa em CSV (o diário é a fonte dos dados)"""
+        temporario = self.caminho_csv + '.tmp'
+        with open(temporario, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=CAMPOS)
+            writer.writeheader()
+            writer.writerows(self.vendas)
+        os.replace(temporario, self.caminho_csv)
+
+    def fechar(self):
+        self.diario.fechar()
+        self.gravar_retrato()
+        if self.copia_csv:
+            self.salvar_copia_csv()
+
+
+# ============ SQLITE ============
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS vendas (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    data_iso TEXT,
+    vendedor TEXT NOT NULL,
+    produto TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    preco REAL NOT NULL,
+    total REAL NOT NULL,
+    regiao TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas (data_iso);
+CREATE INDEX IF NOT EXISTS idx_vendas_vendedor ON vendas (vendedor);
+CREATE INDEX IF NOT EXISTS idx_vendas_vendedor_nocase ON vendas (vendedor COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_vendas_produto ON vendas (produto);
+CREATE INDEX IF NOT EXISTS idx_vendas_regiao ON vendas (regiao);
+CREATE TABLE IF NOT EXISTS resumo (
+    dimensao TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    valor REAL NOT NULL,
+    unidades INTEGER NOT NULL,
+    PRIMARY KEY (dimensao, chave)
+) WITHOUT ROWID;
+"""
+
+# Linha do total geral na tabela resumo (as demais são por dimensão e chave)
+RESUMO_GERAL = ('geral', '')
+
+SQL_RESUMO_CRIAR = "INSERT OR IGNORE INTO resumo VALUES (?, ?, 0, 0.0, 0)"
+SQL_RESUMO_SOMAR = """
+UPDATE resumo SET quantidade = quantidade + ?, valor = valor + ?, unidades = unidades + ?
+WHERE dimensao = ? AND chave = ?
+"""
+
+SQL_INSERIR = """
+INSERT INTO vendas (data, data_iso, vendedor, produto, quantidade, preco, total, regiao)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_COLUNAS = 'data, vendedor, produto, quantidade, preco, total, regiao'
+
+
+class VendasSQLite(Sequence):
+    """Sequência somente leitura das vendas, buscada do banco por páginas"""
+
+    TAMANHO_PAGINA = 500
+
+    def __init__(self, armazenamento):
+        self._armazenamento = armazenamento
+        self._inicio_cache = None
+        self._cache = []
+
+    def __len__(self):
+        return self._armazenamento.contar()
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fim, passo = indice.indices(len(self))
+            if passo != 1:
+                return [self[i] for i in range(inicio, fim, passo)]
+            return self._armazenamento.pagina(inicio, max(0, fim - inicio))
+
+        tamanho = len(self)
+        if indice < 0:
+            indice += tamanho
+        if not 0 <= indice < tamanho:
+            raise IndexError('índice de venda fora do intervalo')
+
+        inicio = indice - indice % self.TAMANHO_PAGINA
+        if inicio != self._inicio_cache:
+            self._cache = self._armazenamento.pagina(inicio, self.TAMANHO_PAGINA)
+            self._inicio_cache = inicio
+        return self._cache[indice - inicio]
+
+    def __iter__(self):
+        # Paginação por chave: memória constante mesmo com o histórico inteiro
+        ultimo_id = 0
+        while True:
+            linhas = self._armazenamento.conexao.execute(
+                f"SELECT id, {SQL_COLUNAS} FROM vendas WHERE id > ? ORDER BY id LIMIT ?",
+                (ultimo_id, self.TAMANHO_PAGINA * 10)).fetchall()
+            if not linhas:
+                return
+            for linha in linhas:
+                yield dict(zip(CAMPOS, linha[1:]))
+            ultimo_id = linhas[-1][0]
+
+    def invalidar(self):
+        """Descartar a página em cache após alterações"""
+        self._inicio_cache = None
+        self._cache = []
+
+
+def linhas_resumo(agregados):
+    """(dimensao, chave, quantidade, valor, unidades) do total geral e de cada grupo"""
+    geral = agregados.geral
+    yield RESUMO_GERAL + (geral.quantidade, geral.valor, geral.unidades)
+    for dimensao, grupos in agregados.grupos.items():
+        for chave, grupo in grupos.items():
+            yield dimensao, chave, grupo.quantidade, grupo.valor, grupo.unidades
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """Vendas em banco SQLite (WAL), paginadas e agregadas via SQL
+
+    A tabela 'resumo' guarda os totais gerais e por dimensão, atualizada
+    na mesma transação de cada inserção ou limpeza: a abertura lê só ela.
+    """
+
+    def __init__(self, caminho='vendas.db', csv_inicial='vendas_salvas.csv'):
+        self.caminho = caminho
+        self.csv_inicial = csv_inicial
+        self.conexao = None
+        self.vendas = VendasSQLite(self)
+        self.agregados = Agregados()
+        self._quantidade = 0
+        # (posição, id) da última venda lida por pagina(); (-1, 0) é antes da primeira
+        self._ancora = (-1, 0)
+
+    def abrir(self):
+        novo = not os.path.exists(self.caminho)
+        self.conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.execute('PRAGMA synchronous=NORMAL')
+        self.conexao.executescript(ESQUEMA_SQLITE)
+        self.carregar_agregados()
+        self._quantidade = self.agregados.quantidade
+        self._ancora = (-1, 0)
+
+        if novo and self.csv_inicial:
+            for lote in em_lotes(ler_csv(self.csv_inicial)):
+                self.adicionar_lote(lote)
+
+    def carregar_agregados(self):
+        """Montar os totais correntes a partir da tabela resumo, sem ler as vendas"""
+        if self.conexao.execute('SELECT 1 FROM resumo WHERE dimensao = ? AND chave = ?',
+                                RESUMO_GERAL).fetchone() is None:
+            # Banco anterior à tabela resumo: montá-la uma única vez com GROUP BY
+            self.recalcular_resumo()
+        linhas = {dimensao: [] for dimensao in DIMENSOES}
+        geral = (0, 0.0, 0)
+        for dimensao, chave, quantidade, valor, unidades in self.conexao.execute(
+                'SELECT dimensao, chave, quantidade, valor, unidades FROM resumo'):
+            if (dimensao, chave) == RESUMO_GERAL:
+                geral = (quantidade, valor, unidades)
+            elif dimensao in linhas and quantidade > 0:
+                linhas[dimensao].append((chave, quantidade, valor, unidades))
+        self.agregados.limpar()
+        self.agregados.definir_geral(*geral)
+        for dimensao, grupos in linhas.items():
+            self.agregados.definir_grupos(dimensao, grupos)
+
+    def recalcular_resumo(self):
+        """Reconstruir a tabela resumo a partir das vendas (GROUP BY sobre a tabela inteira)"""
+        agregados = Agregados()
+        quantidade, valor, unidades = self.conexao.execute(
+            'SELECT COUNT(*), COALESCE(SUM(total), 0), COALESCE(SUM(quantidade), 0) '
+            'FROM vendas').fetchone()
+        agregados.definir_geral(quantidade, valor, unidades)
+        for campo in DIMENSOES:
+            agregados.definir_grupos(campo, self.conexao.execute(
+                f"SELECT {campo}, COUNT(*), SUM(total), SUM(quantidade) "
+                f"FROM vendas GROUP BY {campo}"))
+        with self.conexao:
+            self.conexao.execute('DELETE FROM resumo')
+            self.conexao.executemany('INSERT INTO resumo VALUES (?, ?, ?, ?, ?)',
+                                     linhas_resumo(agregados))
+
+    def adicionar_lote(self, vendas):
+        vendas = list(vendas)
+        parametros = [
+            (v['data'], data_iso(v['data']), v['vendedor'], v['produto'],
+             v['quantidade'], v['preco'], v['total'], v['regiao'])
+            for v in vendas
+        ]
+        # Totais só deste lote: poucas linhas a somar na tabela resumo
+        lote = Agregados()
+        lote.adicionar_lote(vendas)
+        resumo = list(linhas_resumo(lote))
+        with self.conexao:
+            self.conexao.executemany(SQL_INSERIR, parametros)
+            self.conexao.executemany(SQL_RESUMO_CRIAR, [linha[:2] for linha in resumo])
+            self.conexao.executemany(SQL_RESUMO_SOMAR, [linha[2:] + linha[:2] for linha in resumo])
+        self._quantidade += len(parametros)
+        self.agregados.adicionar_lote(vendas)
+        self.vendas.invalidar()
+
+    def limpar(self):
+        with self.conexao:
+            self.conexao.execute('DELETE FROM vendas')
+            self.conexao.execute('DELETE FROM resumo')
+            self.conexao.execute(SQL_RESUMO_CRIAR, RESUMO_GERAL)
+        self._quantidade = 0
+        self._ancora = (-1, 0)
+        self.agregados.limpar()
+        self.vendas.invalidar()
+
+    def contar(self):
+        return self._quantidade
+
+    def pagina(self, inicio, limite):
+        """Vendas da posição 'inicio' em diante, por chave a partir da última lida
+
+        Rolagem sequencial vira 'WHERE id > ?' sem OFFSET; saltos só pulam
+        as linhas entre a âncora (ou o começo, se mais perto) e o destino.
+        """
+        if limite <= 0:
+            return []
+        posicao, ultimo_id = self._ancora
+        if inicio <= posicao and inicio <= posicao - inicio:
+            posicao, ultimo_id = -1, 0
+        if inicio > posicao:
+            linhas = self.conexao.execute(
+                f"SELECT id, {SQL_COLUNAS} FROM vendas WHERE id > ? ORDER BY id LIMIT ? OFFSET ?",
+                (ultimo_id, limite, inicio - posicao - 1)).fetchall()
+        else:
+            # Para trás, perto da âncora: descer até o id da posição 'inicio'
+            primeiro = self.conexao.execute(
+                'SELECT id FROM vendas WHERE id <= ? ORDER BY id DESC LIMIT 1 OFFSET ?',
+                (ultimo_id, posicao - inicio)).fetchone()
+            linhas = [] if primeiro is None else self.conexao.execute(
+                f"SELECT id, {SQL_COLUNAS} FROM vendas WHERE id >= ? ORDER BY id LIMIT ?",
+                (primeiro[0], limite)).fetchall()
+        if linhas:
+            self._ancora = (inicio + len(linhas) - 1, linhas[-1][0])
+        return [dict(zip(CAMPOS, linha[1:])) for linha in linhas]
+
+    def agrupar(self, dimensoes):
+        return agrupar_sql(self.conexao, dimensoes)
+
+    def filtrar(self, filtro, ordem=None):
+        if filtro.vazio and ordem is None:
+            return self.vendas
+        # Prefixo com LIKE usa o índice NOCASE; produto, região e data, os índices simples
+        condicoes, parametros = ['1'], []
+        if filtro.vendedor:
+            prefixo = filtro.vendedor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            condicoes.append("vendedor LIKE ? ESCAPE '\\'")
+            parametros.append(prefixo + '%')
+        for campo in ('produto', 'regiao'):
+            if getattr(filtro, campo):
+                condicoes.append(f"{campo} = ?")
+                parametros.append(getattr(filtro, campo))
+        if filtro.de is not None or filtro.ate is not None:
+            periodo, parametros_periodo = filtro_periodo(filtro.de, filtro.ate)
+            condicoes.append(periodo)
+            parametros.extend(parametros_periodo)
+        ordenacao = 'id'
+        if ordem is not None:
+            campo, decrescente = ordem
+            if campo not in CAMPOS_ORDENAVEIS:
+                raise ValueError(f"Campo não ordenável: {campo}")
+            if campo == 'data':
+                coluna = 'data_iso'
+            elif campo in CAMPOS_NUMERICOS:
+                coluna = campo
+            else:
+                coluna = f"{campo} COLLATE NOCASE"
+            sentido = 'DESC' if decrescente else 'ASC'
+            ordenacao = f"{coluna} {sentido}, id {sentido}"
+        # Só os ids ficam em memória; a tabela busca as linhas visíveis por id
+        ids = array('q', (linha[0] for linha in self.conexao.execute(
+            f"SELECT id FROM vendas WHERE {' AND '.join(condicoes)} ORDER BY {ordenacao}",
+            parametros)))
+        return VendasFiltradas(ids, self.linhas_por_id)
+
+    def linhas_por_id(self, ids):
+        """Vendas com os ids informados, na mesma ordem"""
+        linhas = {}
+        ids = list(ids)
+        for inicio in range(0, len(ids), 500):
+            trecho = ids[inicio:inicio + 500]
+            for linha in self.conexao.execute(
+                    f"SELECT id, {SQL_COLUNAS} FROM vendas "
+                    f"WHERE id IN ({', '.join('?' * len(trecho))})", trecho):
+                linhas[linha[0]] = dict(zip(CAMPOS, linha[1:]))
+        return [linhas[i] for i in ids if i in linhas]
+
+    def foto(self, de=None, ate=None):
+        ultimo_id = self.conexao.execute('SELECT COALESCE(MAX(id), 0) FROM vendas').fetchone()[0]
+        if de is None and ate is None:
+            quantidade = self._quantidade
+        else:
+            filtro, parametros = filtro_periodo(de, ate)
+            quantidade = self.conexao.execute(
+                f"SELECT COUNT(*) FROM vendas WHERE {filtro}", parametros).fetchone()[0]
+        return Foto(quantidade, lambda: iterar_sqlite(self.caminho, ultimo_id, de=de, ate=ate))
+
+    def preparar_agrupamentos(self, lista_dimensoes, de=None, ate=None):
+        return agrupar_sqlite, (self.caminho, lista_dimensoes, de, ate), False
+
+    def salvar(self):
+        if self.conexao is not None:
+            self.conexao.commit()
+            self.conexao.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def fechar(self):
+        if self.conexao is not None:
+            self.salvar()
+            self.conexao.close()
+            self.conexao = None
+
+
+def filtro_periodo(de=None, ate=None):
+    """Cláusula WHERE (usa o índice de data_iso) e parâmetros para o período"""
+    condicoes = ['data_iso IS NOT NULL']
+    parametros = []
+    if de is not None:
+        condicoes.append('data_iso >= ?')
+        parametros.append(iso_data(de))
+    if ate is not None:
+        condicoes.append('data_iso <= ?')
+        parametros.append(iso_data(ate))
+    return ' AND '.join(condicoes), parametros
+
+
+def agrupar_sql(conexao, dimensoes, de=None, ate=None):
+    """Group-by via SQL sobre uma ou mais dimensões, opcionalmente em um período"""
+    dimensoes = normalizar_dimensoes(dimensoes)
+    colunas = ', '.join(dimensoes)
+    filtro, parametros = ('1', []) if de is None and ate is None else filtro_periodo(de, ate)
+    linhas = conexao.execute(
+        f"SELECT {colunas}, COUNT(*), SUM(total), SUM(quantidade) "
+        f"FROM vendas WHERE {filtro} GROUP BY {colunas}", parametros).fetchall()
+    k = len(dimensoes)
+    return Agrupamento(dimensoes, [linha[:k] for linha in linhas],
+                       [linha[k] for linha in linhas],
+                       [linha[k + 1] for linha in linhas],
+                       [linha[k + 2] for linha in linhas])
+
+
+def agrupar_sqlite(caminho, lista_dimensoes, de=None, ate=None):
+    """Vários group-by em conexão própria (e transação única), para rodar em outra thread"""
+    conexao = sqlite3.connect(caminho)
+    try:
+        conexao.execute('BEGIN')
+        return [agrupar_sql(conexao, dimensoes, de, ate) for dimensoes in lista_dimensoes]
+    finally:
+        conexao.close()
+
+
+def iterar_sqlite(caminho, ultimo_id, tamanho_pagina=5000, de=None, ate=None):
+    """Vendas com id até 'ultimo_id', lidas em conexão própria e transação única
+
+    Com período, seguem a ordem de data_iso (mesma ordem do backend CSV).
+    """
+    conexao = sqlite3.connect(caminho)
+    try:
+        conexao.execute('BEGIN')
+        if de is not None or ate is not None:
+            filtro, parametros = filtro_periodo(de, ate)
+            cursor = conexao.execute(
+                f"SELECT {SQL_COLUNAS} FROM vendas WHERE id <= ? AND {filtro} "
+                f"ORDER BY data_iso, id", [ultimo_id] + parametros)
+            for linha in cursor:
+                yield dict(zip(CAMPOS, linha))
+            return
+        id_atual = 0
+        while True:
+            linhas = conexao.execute(
+                f"SELECT id, {SQL_COLUNAS} FROM vendas WHERE id > ? AND id <= ? "
+                f"ORDER BY id LIMIT ?", (id_atual, ultimo_id, tamanho_pagina)).fetchall()
+            if not linhas:
+                return
+            for linha in linhas:
+                yield dict(zip(CAMPOS, linha[1:]))
+            id_atual = linhas[-1][0]
+    finally:
+        conexao.close()
+
+
+def criar_armazenamento(tipo='csv'):
+    """Criar o backend pelo nome ('csv', 'sqlite' ou 'remoto[:porta]', cliente do servidor.py)"""
+    if tipo == 'csv':
+        return ArmazenamentoCSV()
+    if tipo == 'sqlite':
+        return ArmazenamentoSQLite()
+    if tipo == 'remoto' or tipo.startswith('remoto:'):
+        # Importado aqui: o cliente depende deste módulo
+        from remoto import ArmazenamentoRemoto
+        porta = tipo.partition(':')[2]
+        return ArmazenamentoRemoto(porta=int(porta)) if porta else ArmazenamentoRemoto()
+    raise ValueError(f"Armazenamento desconhecido: {tipo}")
@@ -0,0 +1,310 @@
+"""
+BENCHMARK DO SISTEMA DE VENDAS
+Mede carregar_dados, salvar_dados, atualizar_tabela, atualizar_stats,
+gerar_relatorio e exportar_csv (em cada formato, com vazão em MB/s) com
+vendas sintéticas (10 mil a 1 milhão por padrão), além do tempo até a primeira
+pintura da janela (que não deve crescer com o histórico), registrando
+tempo e pico de memória em JSON para comparar execuções
+
+Exemplos:
+    python benchmark.py --tamanhos 10000,100000
+    python benchmark.py --tamanhos 10000000 --sem-memoria
+    python benchmark.py --saida bench_novo.json --comparar bench_anterior.json
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+import exportador
+from agregados import Agregados
+from agrupamento import np
+from armazenamento import ArmazenamentoCSV
+from relatorios import relatorio_vendas
+
+# Mesmos valores e faixas de relatorio_vendas_30dias.csv
+VENDEDORES = ['Ana', 'Carla', 'Joao', 'Maria', 'Pedro']
+PRODUTOS = ['Monitor', 'Mouse', 'Notebook', 'Smartphone', 'Tablet', 'Teclado']
+REGIOES = ['Centro', 'Leste', 'Norte', 'Oeste', 'Sul']
+DATA_INICIAL = date(2026, 1, 12)
+CABECALHO = ['data', 'vendedor', 'produto', 'quantidade', 'preco_unitario', 'regiao', 'valor_total']
+
+# 10 milhões sob tracemalloc leva muito tempo e memória: só com --tamanhos
+TAMANHOS_PADRAO = '10000,100000,1000000'
+LIMITE_REGRESSAO = 1.2
+# Vendas somadas uma a uma na medida do atualizar_stats (caminho de cada cadastro)
+VENDAS_INCREMENTAIS = 1000
+
+
+def gerar_vendas_sinteticas(n, semente=42, dias=30):
+    """Vendas determinísticas no esquema de relatorio_vendas_30dias.csv, em ordem de data"""
+    aleatorio = random.Random(semente)
+    datas = [(DATA_INICIAL + timedelta(days=d)).strftime('%d/%m/%Y') for d in range(dias)]
+    for i in range(n):
+        quantidade = aleatorio.randint(1, 5)
+        preco = aleatorio.randint(100, 2999)
+        yield {
+            'data': datas[i * dias // n],
+            'vendedor': aleatorio.choice(VENDEDORES),
+            'produto': aleatorio.choice(PRODUTOS),
+            'quantidade': quantidade,
+            'preco_unitario': preco,
+            'regiao': aleatorio.choice(REGIOES),
+            'valor_total': quantidade * preco
+        }
+
+
+def escrever_csv_sintetico(caminho, n, semente=42, dias=30):
+    with open(caminho, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CABECALHO)
+        writer.writeheader()
+        writer.writerows(gerar_vendas_sinteticas(n, semente, dias))
+
+
+def tk_disponivel():
+    """Há display para criar janelas Tk?"""
+    try:
+        import tkinter
+        raiz = tkinter.Tk()
+        raiz.destroy()
+        return True
+    except Exception:
+        return False
+
+
+class Medidor:
+    """Executa etapas medindo tempo e pico de memória"""
+
+    def __init__(self, memoria=True):
+        self.memoria = memoria
+        self.resultados = []
+
+    def medir(self, etapa, tamanho, funcao):
+        gc.collect()
+        if self.memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        retorno = funcao()
+        segundos = time.perf_counter() - inicio
+        pico = None
+        if self.memoria:
+            pico = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+
+        self.resultados.append({'etapa': etapa, 'tamanho': tamanho,
+                                'segundos': segundos, 'pico_memoria_mb': pico})
+        memoria = f"{pico:>10.1f} MB" if pico is not None else ""
+        print(f"{tamanho:>10}  {etapa:<36}{segundos:>10.3f} s{memoria}", flush=True)
+        return retorno
+
+    def anotar(self, **dados):
+        """Acrescentar medidas extras à última etapa (ex.: vazão)"""
+        self.resultados[-1].update(dados)
+        print(' ' * 12 + ', '.join(f"{chave}={valor:.1f}" for chave, valor in dados.items()), flush=True)
+
+    def pular(self, etapa, tamanho, motivo):
+        self.resultados.append({'etapa': etapa, 'tamanho': tamanho, 'pulado': motivo})
+        print(f"{tamanho:>10}  {etapa:<36}{'pulado: ' + motivo:>22}", flush=True)
+
+
+def medir_tamanho(medidor, n, pasta, com_tk):
+    caminho_csv = os.path.join(pasta, 'vendas_salvas.csv')
+    caminho_diario = os.path.join(pasta, 'vendas_salvas.diario')
+
+    medidor.medir('gerar dados sintéticos', n, lambda: escrever_csv_sintetico(caminho_csv, n))
+
+    # Primeira abertura migra o CSV para o diário; a segunda parte do retrato binário
+    armazenamento = ArmazenamentoCSV(caminho_csv, caminho_diario)
+    medidor.medir('carregar_dados (migração do CSV)', n, armazenamento.abrir)
+    medidor.medir('cópia completa em CSV', n, armazenamento.salvar_copia_csv)
+    armazenamento.diario.fechar()
+    medidor.medir('gravar retrato binário', n, armazenamento.gravar_retrato)
+    caminho_retrato = armazenamento.caminho_retrato
+    del armazenamento
+
+    armazenamento = ArmazenamentoCSV(caminho_csv, caminho_diario)
+    medidor.medir('carregar_dados (retrato binário)', n, armazenamento.abrir)
+    armazenamento.diario.fechar()
+    del armazenamento
+
+    # Sem o retrato, a abertura reproduz o diário inteiro
+    os.remove(caminho_retrato)
+    armazenamento = ArmazenamentoCSV(caminho_csv, caminho_diario)
+    medidor.medir('carregar_dados (diário)', n, armazenamento.abrir)
+    agregados = Agregados()
+    medidor.medir('recalcular agregados (reconstrução)', n,
+                  lambda: agregados.carregar_colunas(armazenamento.vendas))
+    # O que cada cadastro custa: somar a venda aos totais e ler os valores do card
+    novas = list(islice(armazenamento.vendas, VENDAS_INCREMENTAIS))
+    segundos = medidor.medir(f"atualizar_stats ({len(novas)} vendas)", n,
+                             lambda: medir_stats(agregados, novas))
+    medidor.anotar(microssegundos_por_venda=segundos / max(1, len(novas)) * 1e6)
+    medidor.medir('gerar_relatorio (sem interface)', n,
+                  lambda: relatorio_vendas(armazenamento.vendas))
+    for formato, extensao in exportador.EXTENSOES.items():
+        # 'exportar_csv' mantém o nome das execuções anteriores, para a comparação
+        etapa = 'exportar_csv' if formato == 'csv' else f"exportar_csv ({formato})"
+        resultado = medidor.medir(etapa, n, lambda: exportador.exportar(
+            armazenamento.foto(), os.path.join(pasta, 'exportado' + extensao), formato))
+        medidor.anotar(mb=resultado.bytes / 1e6, mb_por_segundo=resultado.mb_por_segundo)
+    armazenamento.diario.fechar()
+    del armazenamento
+
+    medir_gravacao(medidor, n, pasta, [dict(venda) for venda in novas])
+
+    if com_tk:
+        medir_interface(medidor, n, caminho_csv, caminho_diario)
+    else:
+        for etapa in ('primeira pintura', 'carregamento em segundo plano',
+                      'atualizar_tabela', 'atualizar_stats', 'gerar_relatorio'):
+            medidor.pular(etapa, n, 'sem display')
+
+
+def medir_gravacao(medidor, n, pasta, vendas):
+    """salvar_dados: o que substituiu a regravação do CSV, a anotação das vendas no diário
+
+    Diário próprio, vazio: o custo de anotar não depende do histórico, e
+    as vendas medidas não entram nas etapas seguintes.
+    """
+    armazenamento = ArmazenamentoCSV(os.path.join(pasta, 'gravacao.csv'),
+                                     os.path.join(pasta, 'gravacao.diario'))
+    armazenamento.abrir()
+
+    def uma_a_uma():
+        for venda in vendas:
+            armazenamento.adicionar(venda)
+
+    segundos = medidor.medir(f"salvar_dados ({len(vendas)} vendas)", n,
+                             lambda: medir_tempo(uma_a_uma))
+    medidor.anotar(microssegundos_por_venda=segundos / max(1, len(vendas)) * 1e6)
+    medidor.medir(f"salvar_dados (lote de {len(vendas)})", n,
+                  lambda: armazenamento.adicionar_lote(vendas))
+    armazenamento.diario.fechar()
+
+
+def medir_tempo(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def medir_stats(agregados, vendas):
+    """Agregados.adicionar e a leitura do card de totais para cada venda; devolve os segundos"""
+    inicio = time.perf_counter()
+    for venda in vendas:
+        agregados.adicionar(venda)
+        (agregados.quantidade, agregados.valor_total, agregados.ticket_medio)
+    return time.perf_counter() - inicio
+
+
+def medir_interface(medidor, n, caminho_csv, caminho_diario):
+    from portfolio import SistemaVendas
+
+    def pintar():
+        # Janela e formulário desenhados; as vendas começam a abrir em segundo plano.
+        # update_idletasks só desenha: update() rodaria os callbacks do carregamento
+        # (after do executor) e o tempo dele entraria na primeira pintura
+        app = SistemaVendas(ArmazenamentoCSV(caminho_csv, caminho_diario), executar=False)
+        app.janela.update_idletasks()
+        return app
+
+    def aguardar_carregamento():
+        while app.carregando:
+            app.janela.update()
+            time.sleep(0.001)
+        app.janela.update()
+
+    app = medidor.medir('primeira pintura', n, pintar)
+    try:
+        medidor.medir('carregamento em segundo plano', n, aguardar_carregamento)
+        medidor.medir('atualizar_tabela', n, lambda: (app.atualizar_tabela(), app.janela.update()))
+        medidor.medir('atualizar_stats', n, lambda: (app.atualizar_stats(), app.janela.update()))
+
+        def gerar():
+            app.gerar_relatorio()
+            while app.executor.ocupado():
+                app.janela.update()
+                time.sleep(0.001)
+            app.janela.update()
+
+        medidor.medir('gerar_relatorio', n, gerar)
+    finally:
+        app.executor.encerrar()
+        app.armazenamento.diario.fechar()
+        app.janela.destroy()
+
+
+def comparar(resultados, caminho_anterior):
+    """Mostrar a variação em relação a uma execução anterior; devolve o nº de regressões"""
+    with open(caminho_anterior, 'r', encoding='utf-8') as f:
+        anterior = json.load(f)
+    tempos = {(r['etapa'], r['tamanho']): r['segundos']
+              for r in anterior['resultados'] if 'segundos' in r}
+
+    regressoes = 0
+    print(f"\nComparação com {caminho_anterior}:")
+    for r in resultados:
+        antes = tempos.get((r['etapa'], r['tamanho']))
+        if antes is None or 'segundos' not in r or not antes:
+            continue
+        razao = r['segundos'] / antes
+        marca = ''
+        if razao > LIMITE_REGRESSAO and r['segundos'] - antes > 0.005:
+            marca = '  <-- REGRESSÃO'
+            regressoes += 1
+        print(f"{r['tamanho']:>10}  {r['etapa']:<36}{antes:>9.3f} -> {r['segundos']:.3f} s"
+              f"  ({razao:.2f}x){marca}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do sistema de vendas")
+    parser.add_argument('--tamanhos', default=TAMANHOS_PADRAO,
+                        help=f"quantidades de vendas separadas por vírgula (padrão: {TAMANHOS_PADRAO})")
+    parser.add_argument('--saida', default=f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M')}.json",
+                        help="arquivo JSON com os resultados")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help="não usar tracemalloc (tempos mais fiéis, sem pico de memória)")
+    parser.add_argument('--sem-interface', action='store_true', help="pular as etapas com Tk")
+    args = parser.parse_args(argv)
+
+    tamanhos = [int(t) for t in args.tamanhos.split(',')]
+    com_tk = not args.sem_interface and tk_disponivel()
+    medidor = Medidor(memoria=not args.sem_memoria)
+
+    print(f"{'vendas':>10}  {'etapa':<36}{'tempo':>12}{'pico':>13}")
+    for n in tamanhos:
+        with tempfile.TemporaryDirectory(prefix='bench_vendas_') as pasta:
+            medir_tamanho(medidor, n, pasta, com_tk)
+
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'numpy': np is not None,
+        'tracemalloc': medidor.memoria,
+        'interface': com_tk,
+        'resultados': medidor.resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados salvos em: {args.saida}")
+
+    if args.comparar:
+        return 1 if comparar(medidor.resultados, args.comparar) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
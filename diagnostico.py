@@ -0,0 +1,230 @@
+"""
+DIAGNÓSTICO DE DESEMPENHO
+Tempos e contagem de chamadas das operações da interface, atraso do
+laço de eventos do Tk e captura opcional com cProfile/tracemalloc,
+exportáveis em JSON
+"""
+
+import cProfile
+import functools
+import io
+import json
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Amostras guardadas por operação (os percentis valem para as mais recentes)
+AMOSTRAS_MAXIMAS = 2048
+PERCENTIS = (50, 95, 99)
+# Atraso do laço de eventos: intervalo entre as medições
+INTERVALO_LACO_MS = 100
+NOME_LACO = 'laço de eventos (atraso)'
+# Funções e linhas de alocação listadas no resultado da captura
+LIMITE_CAPTURA = 30
+QUADROS_TRACEMALLOC = 10
+
+
+def percentil(ordenadas, p):
+    """Percentil p (0-100) de amostras já ordenadas, pelo posto mais próximo"""
+    if not ordenadas:
+        return 0.0
+    posto = max(1, -(-p * len(ordenadas) // 100))
+    return ordenadas[posto - 1]
+
+
+class Metrica:
+    """Chamadas, tempo total e amostras recentes de uma operação"""
+
+    __slots__ = ('chamadas', 'total', 'maximo', 'amostras')
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.amostras = deque(maxlen=AMOSTRAS_MAXIMAS)
+
+    def registrar(self, segundos):
+        self.chamadas += 1
+        self.total += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.amostras.append(segundos)
+
+    def resumo(self):
+        ordenadas = sorted(self.amostras)
+        resumo = {
+            'chamadas': self.chamadas,
+            'total': self.total,
+            'media': self.total / self.chamadas if self.chamadas else 0.0,
+            'maximo': self.maximo,
+        }
+        for p in PERCENTIS:
+            resumo[f'p{p}'] = percentil(ordenadas, p)
+        return resumo
+
+
+class Instrumentacao:
+    """Registro de tempos por operação (em segundos), usado na thread da interface"""
+
+    def __init__(self):
+        self.metricas = {}
+        self.inicio = time.time()
+        self.captura = Captura()
+
+    def registrar(self, nome, segundos):
+        metrica = self.metricas.get(nome)
+        if metrica is None:
+            metrica = self.metricas[nome] = Metrica()
+        metrica.registrar(segundos)
+
+    @contextmanager
+    def medir(self, nome):
+        """Bloco 'with' cronometrado, registrado como 'nome'"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def zerar(self):
+        self.metricas.clear()
+        self.inicio = time.time()
+
+    def resumo(self):
+        """{operação: {chamadas, total, media, maximo, p50, p95, p99}}"""
+        return {nome: metrica.resumo() for nome, metrica in sorted(self.metricas.items())}
+
+    def dados(self):
+        """Tudo o que é exportado: resumo, amostras recentes e a última captura"""
+        return {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'desde': datetime.fromtimestamp(self.inicio).isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'plataforma': platform.platform(),
+            'unidade': 'segundos',
+            'metricas': self.resumo(),
+            'amostras': {nome: list(metrica.amostras) for nome, metrica in self.metricas.items()},
+            'captura': self.captura.resultado,
+        }
+
+    def exportar_json(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.dados(), f, ensure_ascii=False, indent=2)
+
+
+def medido(funcao):
+    """Decorador de métodos: registra o tempo de cada chamada em self.instrumentacao"""
+    nome = funcao.__name__
+
+    @functools.wraps(funcao)
+    def medir(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(self, *args, **kwargs)
+        finally:
+            self.instrumentacao.registrar(nome, time.perf_counter() - inicio)
+
+    return medir
+
+
+class MonitorLaco:
+    """Mede o atraso do laço de eventos: quanto um after(intervalo) demora além do pedido"""
+
+    def __init__(self, janela, instrumentacao, intervalo_ms=INTERVALO_LACO_MS):
+        self.janela = janela
+        self.instrumentacao = instrumentacao
+        self.intervalo = intervalo_ms / 1000
+        self.intervalo_ms = intervalo_ms
+        self._esperado = None
+
+    def iniciar(self):
+        self._esperado = time.perf_counter() + self.intervalo
+        self.janela.after(self.intervalo_ms, self._medir)
+
+    def _medir(self):
+        agora = time.perf_counter()
+        self.instrumentacao.registrar(NOME_LACO, max(0.0, agora - self._esperado))
+        self._esperado = agora + self.intervalo
+        self.janela.after(self.intervalo_ms, self._medir)
+
+
+class Captura:
+    """cProfile (thread da interface) e tracemalloc, ligados e desligados em execução"""
+
+    def __init__(self):
+        self.perfil = None
+        self.memoria = False
+        self.inicio = None
+        self.resultado = None       # dict da última captura encerrada
+
+    @property
+    def ativa(self):
+        return self.perfil is not None
+
+    def iniciar(self, memoria=True):
+        if self.ativa:
+            return
+        # tracemalloc só é desligado ao final se foi ligado aqui
+        self.memoria = memoria and not tracemalloc.is_tracing()
+        if self.memoria:
+            tracemalloc.start(QUADROS_TRACEMALLOC)
+        self.inicio = time.perf_counter()
+        self.perfil = cProfile.Profile()
+        self.perfil.enable()
+
+    def parar(self):
+        """Encerrar a captura e devolver o resultado (também guardado em 'resultado')"""
+        if not self.ativa:
+            return self.resultado
+        self.perfil.disable()
+        resultado = {'segundos': time.perf_counter() - self.inicio,
+                     'funcoes': self._funcoes(), 'perfil': self._texto_perfil()}
+        if self.memoria:
+            resultado['memoria'] = self._memoria()
+            tracemalloc.stop()
+        self.perfil = None
+        self.resultado = resultado
+        return resultado
+
+    def _estatisticas(self, saida=None):
+        return pstats.Stats(self.perfil, stream=saida).sort_stats('cumulative')
+
+    def _funcoes(self):
+        estatisticas = self._estatisticas().stats
+        maiores = sorted(estatisticas.items(), key=lambda item: item[1][3], reverse=True)
+        return [{'funcao': f"{arquivo}:{linha}({nome})", 'chamadas': chamadas,
+                 'tempo_proprio': proprio, 'tempo_acumulado': acumulado}
+                for (arquivo, linha, nome), (_, chamadas, proprio, acumulado, _) in maiores[:LIMITE_CAPTURA]]
+
+    def _texto_perfil(self):
+        saida = io.StringIO()
+        self._estatisticas(saida).print_stats(LIMITE_CAPTURA)
+        return saida.getvalue()
+
+    @staticmethod
+    def _memoria():
+        atual, pico = tracemalloc.get_traced_memory()
+        linhas = tracemalloc.take_snapshot().statistics('lineno')[:LIMITE_CAPTURA]
+        return {
+            'atual': atual,
+            'pico': pico,
+            'maiores': [{'local': str(estatistica.traceback[0]), 'bytes': estatistica.size,
+                         'blocos': estatistica.count} for estatistica in linhas],
+        }
+
+    def texto(self):
+        """Resultado da última captura, para exibição"""
+        if self.resultado is None:
+            return ''
+        partes = [f"Captura de {self.resultado['segundos']:.1f} s\n", self.resultado['perfil']]
+        memoria = self.resultado.get('memoria')
+        if memoria:
+            partes.append(f"Memória: atual {memoria['atual'] / 1e6:.1f} MB, "
+                          f"pico {memoria['pico'] / 1e6:.1f} MB\n")
+            partes.extend(f"{item['bytes'] / 1024:>10.1f} KiB {item['blocos']:>8}  {item['local']}\n"
+                          for item in memoria['maiores'])
+        return ''.join(partes)
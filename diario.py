@@ -0,0 +1,317 @@
+"""
+DIÁRIO DE VENDAS
+Persistência append-only: cada operação vira uma linha no diário,
+com fsync em lote, compactação em segundo plano e recuperação após falha
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from itertools import islice
+
+VERSAO_DIARIO = 1
+# Temporários próprios: iniciar() e a compactação nunca escrevem no mesmo arquivo
+SUFIXO_INICIO = '.tmp'
+SUFIXO_COMPACTACAO = '.compactando'
+
+
+class DiarioVendas:
+    """Diário append-only das operações sobre as vendas
+
+    Registros (uma linha JSON cada):
+        cabecalho  - primeira linha, identifica a geração do arquivo
+        venda      - nova venda adicionada ao final da lista
+        limpar     - tombstone de todas as vendas anteriores
+    """
+
+    def __init__(self, caminho, lote_fsync=64, intervalo_fsync=1.0, ao_compactar=None):
+        self.caminho = caminho
+        self.lote_fsync = lote_fsync
+        self.intervalo_fsync = intervalo_fsync
+        # ao_compactar(vendas, quantidade, geracao, deslocamento): chamado na thread da
+        # compactação com a base do novo arquivo (ex.: para gravar um retrato)
+        self.ao_compactar = ao_compactar
+
+        self.geracao = None
+        self.registros = 0      # registros de dados no arquivo (sem o cabeçalho)
+        self.vivas = 0          # vendas resultantes após reproduzir o diário
+        self.descartados = 0    # linhas corrompidas ignoradas na recuperação
+
+        self._lock = threading.RLock()
+        self._arquivo = None
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+        self._compactacao = None
+        self._parar = threading.Event()
+        self._thread_fsync = None
+
+    # ============ ABERTURA / RECUPERAÇÃO ============
+
+    def existe(self):
+        """Indica se já existe um diário em disco"""
+        return os.path.exists(self.caminho)
+
+    def carregar(self, criar=list, base=None):
+        """Reproduzir o diário e devolver as vendas (None se não existir)
+
+        'criar' constrói a sequência de destino; ela precisa aceitar
+        append().
+
+        'base' (um Retrato) já contém o diário até base.deslocamento: só
+        os registros seguintes são reproduzidos sobre base.vendas. Devolve
+        None se a base não for deste diário (outra geração ou arquivo menor).
+        """
+        if not self.existe():
+            return None
+
+        vendas = criar()
+        registros = 0
+        descartados = 0
+        inicio = 0
+        if base is not None:
+            if not self._base_valida(base):
+                return None
+            vendas, registros, inicio = base.vendas, base.registros, base.deslocamento
+            self.geracao = base.geracao
+        valido_ate = inicio
+        posicao = inicio
+
+        with open(self.caminho, 'rb') as f:
+            f.seek(inicio)
+            for linha in f:
+                posicao += len(linha)
+                if not linha.endswith(b'\n'):
+                    # Escrita interrompida no meio da última linha
+                    break
+                try:
+                    registro = json.loads(linha)
+                    op = registro['op']
+                    if op == 'venda':
+                        venda = self._venda_do_registro(registro)
+                except (ValueError, KeyError, TypeError):
+                    descartados += 1
+                    valido_ate = posicao
+                    continue
+
+                valido_ate = posicao
+                if op == 'cabecalho':
+                    self.geracao = registro.get('geracao')
+                    continue
+
+                registros += 1
+                if op == 'venda':
+                    vendas.append(venda)
+                elif op == 'limpar':
+                    vendas = criar()
+                else:
+                    descartados += 1
+
+        # Descartar cauda parcial para que novos registros não se misturem a ela
+        if valido_ate < os.path.getsize(self.caminho):
+            with open(self.caminho, 'r+b') as f:
+                f.truncate(valido_ate)
+
+        self.registros = registros
+        self.vivas = len(vendas)
+        self.descartados = descartados
+        self._abrir()
+        return vendas
+
+    def _base_valida(self, base):
+        """O retrato foi tirado deste arquivo, em um fim de linha ainda presente?"""
+        if base.geracao is None or not 0 < base.deslocamento <= os.path.getsize(self.caminho):
+            return False
+        with open(self.caminho, 'rb') as f:
+            try:
+                cabecalho = json.loads(f.readline())
+            except ValueError:
+                return False
+            f.seek(base.deslocamento - 1)
+            fim_de_linha = f.read(1) == b'\n'
+        return (fim_de_linha and isinstance(cabecalho, dict)
+                and cabecalho.get('op') == 'cabecalho' and cabecalho.get('geracao') == base.geracao)
+
+    def iniciar(self, vendas):
+        """Criar um diário novo contendo as vendas informadas"""
+        with self._lock:
+            self._fechar_arquivo()
+            temporario = self.caminho + SUFIXO_INICIO
+            geracao = self._escrever_base(temporario, vendas)
+            os.replace(temporario, self.caminho)
+            self.geracao = geracao
+            self.registros = len(vendas)
+            self.vivas = len(vendas)
+            self._abrir()
+
+    def _abrir(self):
+        """Abrir o arquivo para anexar e iniciar o fsync periódico"""
+        self._arquivo = open(self.caminho, 'a', encoding='utf-8', newline='\n')
+        if self._thread_fsync is None:
+            self._parar.clear()
+            self._thread_fsync = threading.Thread(target=self._loop_fsync, daemon=True)
+            self._thread_fsync.start()
+
+    # ============ ESCRITA ============
+
+    def registrar_venda(self, venda):
+        """Anexar uma nova venda"""
+        registro = {'op': 'venda'}
+        registro.update(venda)
+        self._anexar(registro, delta_vivas=1)
+
+    def registrar_vendas(self, vendas):
+        """Anexar várias vendas com um único fsync"""
+        linhas = []
+        for venda in vendas:
+            registro = {'op': 'venda'}
+            registro.update(venda)
+            linhas.append(json.dumps(registro, ensure_ascii=False) + '\n')
+        if not linhas:
+            return
+        with self._lock:
+            self._arquivo.writelines(linhas)
+            self._arquivo.flush()
+            self.registros += len(linhas)
+            self.vivas += len(linhas)
+            self._fsync()
+
+    def registrar_limpeza(self):
+        """Anexar o tombstone que remove todas as vendas"""
+        self._anexar({'op': 'limpar'}, delta_vivas=-self.vivas)
+
+    def _anexar(self, registro, delta_vivas):
+        linha = json.dumps(registro, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._arquivo.write(linha)
+            self._arquivo.flush()
+            self.registros += 1
+            self.vivas += delta_vivas
+            self._pendentes += 1
+            if (self._pendentes >= self.lote_fsync or
+                    time.monotonic() - self._ultimo_fsync >= self.intervalo_fsync):
+                self._fsync()
+
+    def sincronizar(self):
+        """Forçar o fsync dos registros pendentes"""
+        with self._lock:
+            if self._arquivo and self._pendentes:
+                self._arquivo.flush()
+                self._fsync()
+
+    def _fsync(self):
+        os.fsync(self._arquivo.fileno())
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def _loop_fsync(self):
+        """Garantir que registros pendentes cheguem ao disco em até 'intervalo_fsync'"""
+        while not self._parar.wait(self.intervalo_fsync):
+            self.sincronizar()
+
+    # ============ COMPACTAÇÃO ============
+
+    def precisa_compactar(self):
+        """Há mais registros mortos (limpezas e as vendas que elas apagaram) do que vivos?"""
+        mortos = self.registros - self.vivas
+        return mortos > max(1000, self.vivas)
+
+    def compactando(self):
+        return self._compactacao is not None and self._compactacao.is_alive()
+
+    def compactar(self, vendas, em_segundo_plano=True):
+        """Reescrever o diário contendo apenas as vendas atuais
+
+        'vendas' deve refletir todos os registros já anexados e só pode
+        crescer no final enquanto a compactação roda. Registros anexados
+        durante a compactação são copiados para o novo arquivo antes da
+        troca atômica.
+        """
+        with self._lock:
+            if self.compactando():
+                return
+            self._arquivo.flush()
+            foto = (vendas, len(vendas))
+            deslocamento = os.path.getsize(self.caminho)
+            if em_segundo_plano:
+                # Criada e iniciada sob o lock: outra chamada não passa por compactando()
+                self._compactacao = threading.Thread(
+                    target=self._executar_compactacao, args=(foto, deslocamento), daemon=True)
+                self._compactacao.start()
+                return
+
+        self._executar_compactacao(foto, deslocamento)
+
+    def _executar_compactacao(self, foto, deslocamento):
+        vendas, tamanho = foto
+        temporario = self.caminho + SUFIXO_COMPACTACAO
+        geracao = self._escrever_base(temporario, islice(vendas, tamanho))
+        fim_base = os.path.getsize(temporario)
+
+        with self._lock:
+            self._arquivo.flush()
+            extras = 0
+            with open(self.caminho, 'rb') as antigo, open(temporario, 'ab') as novo:
+                antigo.seek(deslocamento)
+                for linha in antigo:
+                    novo.write(linha)
+                    extras += 1
+                novo.flush()
+                os.fsync(novo.fileno())
+
+            self._fechar_arquivo()
+            os.replace(temporario, self.caminho)
+            self.geracao = geracao
+            self.registros = tamanho + extras
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8', newline='\n')
+
+        if self.ao_compactar is not None:
+            self.ao_compactar(vendas, tamanho, geracao, fim_base)
+
+    def _escrever_base(self, caminho, vendas):
+        """Gravar cabeçalho de nova geração e uma linha por venda"""
+        geracao = uuid.uuid4().hex
+        with open(caminho, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(json.dumps({'op': 'cabecalho', 'versao': VERSAO_DIARIO,
+                                'geracao': geracao}) + '\n')
+            for venda in vendas:
+                registro = {'op': 'venda'}
+                registro.update(venda)
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        return geracao
+
+    # ============ ENCERRAMENTO ============
+
+    def fechar(self):
+        """Aguardar compactação, sincronizar e fechar o diário"""
+        if self._compactacao is not None:
+            self._compactacao.join()
+        self._parar.set()
+        if self._thread_fsync is not None:
+            self._thread_fsync.join()
+            self._thread_fsync = None
+        with self._lock:
+            self._fechar_arquivo()
+
+    def _fechar_arquivo(self):
+        if self._arquivo is not None:
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+            self._arquivo.close()
+            self._arquivo = None
+            self._pendentes = 0
+
+    @staticmethod
+    def _venda_do_registro(registro):
+        return {
+            'data': registro['data'],
+            'vendedor': registro['vendedor'],
+            'produto': registro['produto'],
+            'quantidade': int(registro['quantidade']),
+            'preco': float(registro['preco']),
+            'total': float(registro['total']),
+            'regiao': registro['regiao']
+        }
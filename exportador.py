@@ -0,0 +1,178 @@
+"""
+EXPORTADOR DE VENDAS
+Gravação em fluxo das vendas para arquivo (CSV, CSV gzip, JSON Lines ou
+colunar binário), bloco a bloco, com progresso, cancelamento e vazão
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+from importador import em_lotes
+from retrato import ler_colunas, secoes_colunares
+from vendas_colunares import CAMPOS, VendasColunares
+
+# Vendas por bloco: só um bloco fica em memória, e progresso/cancelamento são conferidos a cada um
+TAMANHO_BLOCO = 10000
+NIVEL_GZIP = 6
+
+EXTENSOES = {'csv': '.csv', 'csv.gz': '.csv.gz', 'jsonl': '.jsonl', 'colunar': '.vcol'}
+
+# Colunar: cabeçalho (magia, versão, ordem dos bytes) e grupos de vendas, cada um com
+# (vendas, bytes do corpo, CRC32) e o corpo no formato do retrato; grupo vazio encerra
+MAGIA_COLUNAR = b'VENDCOL\x00'
+VERSAO_COLUNAR = 1
+CABECALHO_COLUNAR = struct.Struct('<8sBc6x')
+GRUPO_COLUNAR = struct.Struct('<QQI4x')
+
+
+class ResultadoExportacao:
+    """Resumo de uma exportação: vendas, bytes gravados e tempo"""
+
+    def __init__(self, formato, caminho):
+        self.formato = formato
+        self.caminho = caminho
+        self.linhas = 0
+        self.bytes = 0
+        self.segundos = 0.0
+        self.cancelada = False
+
+    @property
+    def mb_por_segundo(self):
+        return self.bytes / 1e6 / self.segundos if self.segundos else 0.0
+
+    def __str__(self):
+        return (f"{self.linhas} vendas, {self.bytes / 1e6:.1f} MB em {self.segundos:.2f} s "
+                f"({self.mb_por_segundo:.1f} MB/s)")
+
+
+def formato_do_caminho(caminho):
+    """Formato deduzido da extensão (CSV se nenhuma conhecida)"""
+    nome = caminho.lower()
+    for formato in ('csv.gz', 'jsonl', 'colunar'):
+        if nome.endswith(EXTENSOES[formato]):
+            return formato
+    return 'csv'
+
+
+# ============ GRAVADORES ============
+# Recebem o arquivo binário e os blocos; a cada bloco gravado devolvem (yield) quantas vendas tinha
+
+def _gravar_csv(arquivo, blocos):
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8', newline='')
+    try:
+        # csv.writer com os valores na ordem de CAMPOS: DictWriter confere as chaves de cada linha
+        writer = csv.writer(texto)
+        writer.writerow(CAMPOS)
+        for bloco in blocos:
+            writer.writerows([venda[campo] for campo in CAMPOS] for venda in bloco)
+            yield len(bloco)
+        texto.flush()
+    finally:
+        texto.detach()      # o arquivo é fechado por quem o abriu
+
+
+def _gravar_csv_gzip(arquivo, blocos):
+    with gzip.GzipFile(fileobj=arquivo, mode='wb', compresslevel=NIVEL_GZIP) as compactado:
+        yield from _gravar_csv(compactado, blocos)
+
+
+def _gravar_jsonl(arquivo, blocos):
+    for bloco in blocos:
+        arquivo.write(''.join(json.dumps(dict(venda), ensure_ascii=False) + '\n'
+                              for venda in bloco).encode('utf-8'))
+        yield len(bloco)
+
+
+def _gravar_colunar(arquivo, blocos):
+    arquivo.write(CABECALHO_COLUNAR.pack(MAGIA_COLUNAR, VERSAO_COLUNAR, sys.byteorder[0].encode()))
+    for bloco in blocos:
+        colunas = VendasColunares(bloco)
+        corpo = b''.join(secoes_colunares(colunas, len(colunas)))
+        arquivo.write(GRUPO_COLUNAR.pack(len(colunas), len(corpo), zlib.crc32(corpo)))
+        arquivo.write(corpo)
+        yield len(bloco)
+    arquivo.write(GRUPO_COLUNAR.pack(0, 0, 0))
+
+
+GRAVADORES = {
+    'csv': _gravar_csv,
+    'csv.gz': _gravar_csv_gzip,
+    'jsonl': _gravar_jsonl,
+    'colunar': _gravar_colunar,
+}
+
+
+# ============ EXPORTAÇÃO ============
+
+def exportar(vendas, caminho, formato=None, progresso=None, cancelado=None,
+             tamanho_bloco=TAMANHO_BLOCO):
+    """Gravar as vendas no formato pedido (ou deduzido da extensão); devolve o ResultadoExportacao
+
+    O arquivo é montado em '<caminho>.tmp' e só substitui o destino ao
+    final, então um cancelamento não deixa um arquivo pela metade.
+    """
+    formato = formato or formato_do_caminho(caminho)
+    if formato not in GRAVADORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    resultado = ResultadoExportacao(formato, caminho)
+    total = len(vendas) if hasattr(vendas, '__len__') else 0
+    temporario = caminho + '.tmp'
+    inicio = time.perf_counter()
+    try:
+        with open(temporario, 'wb') as arquivo:
+            gravador = GRAVADORES[formato](arquivo, em_lotes(vendas, tamanho_bloco))
+            try:
+                for escritas in gravador:
+                    resultado.linhas += escritas
+                    if cancelado is not None and cancelado():
+                        resultado.cancelada = True
+                        return resultado
+                    if progresso is not None and total:
+                        progresso(resultado.linhas / total)
+            finally:
+                gravador.close()    # antes de fechar o arquivo
+        resultado.bytes = os.path.getsize(temporario)
+        os.replace(temporario, caminho)
+        temporario = None
+    finally:
+        if temporario is not None and os.path.exists(temporario):
+            os.remove(temporario)
+    resultado.segundos = time.perf_counter() - inicio
+    if progresso is not None:
+        progresso(1.0)
+    return resultado
+
+
+def exportar_csv(vendas, caminho, progresso=None, cancelado=None):
+    """Gravar as vendas em CSV; devolve quantas linhas foram escritas"""
+    return exportar(vendas, caminho, 'csv', progresso, cancelado).linhas
+
+
+def ler_colunar(caminho):
+    """Vendas de um arquivo colunar exportado, grupo a grupo (ValueError se corrompido)"""
+    with open(caminho, 'rb') as f:
+        cabecalho = f.read(CABECALHO_COLUNAR.size)
+        if len(cabecalho) < CABECALHO_COLUNAR.size:
+            raise ValueError("Arquivo colunar inválido")
+        magia, versao, ordem = CABECALHO_COLUNAR.unpack(cabecalho)
+        if magia != MAGIA_COLUNAR or versao != VERSAO_COLUNAR:
+            raise ValueError("Arquivo colunar inválido")
+        trocar_bytes = ordem != sys.byteorder[0].encode()
+        while True:
+            grupo = f.read(GRUPO_COLUNAR.size)
+            if len(grupo) < GRUPO_COLUNAR.size:
+                raise ValueError("Arquivo colunar truncado")
+            quantidade, tamanho, crc = GRUPO_COLUNAR.unpack(grupo)
+            if not quantidade:
+                return
+            corpo = f.read(tamanho)
+            if len(corpo) != tamanho or zlib.crc32(corpo) != crc:
+                raise ValueError("Grupo corrompido no arquivo colunar")
+            yield from ler_colunas(memoryview(corpo), quantidade, trocar_bytes)
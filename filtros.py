@@ -0,0 +1,148 @@
+"""
+FILTROS DE VENDAS
+Índice invertido sobre as vendas colunares (código de categoria -> posições
+das vendas) para filtrar por prefixo de vendedor, produto, região e período
+sem percorrer as vendas
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from agrupamento import np
+from serie_temporal import dentro_periodo, ordinal_data
+
+# A partir deste número de vendas novas a indexação usa NumPy (ordenação por código)
+LOTE_NUMPY = 10000
+
+
+class Filtro:
+    """Critérios do filtro; campos vazios não restringem"""
+
+    __slots__ = ('vendedor', 'produto', 'regiao', 'de', 'ate')
+
+    def __init__(self, vendedor='', produto='', regiao='', de=None, ate=None):
+        self.vendedor = vendedor.strip()        # prefixo, sem diferenciar maiúsculas
+        self.produto = produto
+        self.regiao = regiao
+        self.de = de
+        self.ate = ate
+
+    @property
+    def vazio(self):
+        return not (self.vendedor or self.produto or self.regiao
+                    or self.de is not None or self.ate is not None)
+
+    def aceita(self, venda):
+        """Teste linha a linha, para fontes sem índice"""
+        if self.vendedor and not venda['vendedor'].casefold().startswith(self.vendedor.casefold()):
+            return False
+        if self.produto and venda['produto'] != self.produto:
+            return False
+        if self.regiao and venda['regiao'] != self.regiao:
+            return False
+        if self.de is not None or self.ate is not None:
+            return dentro_periodo(ordinal_data(venda['data']), self.de, self.ate)
+        return True
+
+    def __eq__(self, outro):
+        return isinstance(outro, Filtro) and all(
+            getattr(self, campo) == getattr(outro, campo) for campo in self.__slots__)
+
+
+class IndiceInvertido:
+    """Posições das vendas por código de cada coluna de categoria
+
+    As listas de posições ficam em ordem crescente. Vendas anexadas depois
+    da montagem entram na próxima consulta (só as novas são indexadas).
+    """
+
+    def __init__(self, vendas):
+        self.vendas = vendas
+        self.indexadas = 0
+        self.listas = {campo: [] for campo in vendas.codigos}     # código -> array('I')
+        self._nomes = []            # (vendedor em minúsculas, código), ordenados
+        self._nomes_indexados = 0
+
+    def atualizar(self):
+        """Indexar as vendas anexadas desde a última consulta"""
+        inicio, fim = self.indexadas, len(self.vendas)
+        if fim <= inicio:
+            return
+        for campo, listas in self.listas.items():
+            faltando = len(self.vendas.dicionarios[campo]) - len(listas)
+            listas.extend(array('I') for _ in range(faltando))
+            codigos = self.vendas.codigos[campo]
+            if np is not None and fim - inicio >= LOTE_NUMPY:
+                bloco = np.frombuffer(codigos, dtype=np.uint32)[inicio:fim]
+                ordem = np.argsort(bloco, kind='stable')
+                ordenados = bloco[ordem]
+                posicoes = (ordem + inicio).astype(np.uint32)
+                cortes = np.flatnonzero(np.diff(ordenados)) + 1
+                for trecho, valores in zip(np.split(posicoes, cortes), np.split(ordenados, cortes)):
+                    listas[int(valores[0])].frombytes(trecho.tobytes())
+            else:
+                for posicao in range(inicio, fim):
+                    listas[codigos[posicao]].append(posicao)
+        self.indexadas = fim
+
+    def codigos_vendedor(self, prefixo):
+        """Códigos dos vendedores cujo nome começa com o prefixo (sem diferenciar maiúsculas)"""
+        valores = self.vendas.dicionarios['vendedor'].valores
+        if self._nomes_indexados != len(valores):
+            self._nomes = sorted((nome.casefold(), codigo) for codigo, nome in enumerate(valores))
+            self._nomes_indexados = len(valores)
+        prefixo = prefixo.casefold()
+        inicio = bisect_left(self._nomes, (prefixo,))
+        fim = bisect_right(self._nomes, (prefixo + '\U0010ffff',))
+        return [codigo for _, codigo in self._nomes[inicio:fim]]
+
+    def consultar(self, filtro):
+        """Posições (array('I'), em ordem crescente) das vendas que atendem ao filtro"""
+        self.atualizar()
+        dicionarios = self.vendas.dicionarios
+
+        # Cada critério vira a união das listas dos códigos aceitos; o resultado é a interseção
+        criterios = []
+        if filtro.vendedor:
+            criterios.append(('vendedor', self.codigos_vendedor(filtro.vendedor)))
+        for campo in ('produto', 'regiao'):
+            valor = getattr(filtro, campo)
+            if valor:
+                codigo = dicionarios[campo].codigos.get(valor)
+                criterios.append((campo, [] if codigo is None else [codigo]))
+        if filtro.de is not None or filtro.ate is not None:
+            criterios.append(('data', [codigo for codigo, dia in enumerate(dicionarios['data'].ordinais)
+                                       if dentro_periodo(dia, filtro.de, filtro.ate)]))
+
+        listas = [[self.listas[campo][c] for c in codigos] for campo, codigos in criterios]
+        # Começar pelo critério mais seletivo
+        listas.sort(key=lambda uniao: sum(map(len, uniao)))
+        if not listas or not sum(map(len, listas[0])):
+            return array('I')
+        if len(listas) == 1 and len(listas[0]) == 1:
+            return array('I', listas[0][0])
+        if np is not None:
+            return self._intersecao_numpy(listas)
+        return self._intersecao_python(listas)
+
+    def _intersecao_numpy(self, listas):
+        marcadas = np.zeros(self.indexadas, dtype=np.uint8)
+        for uniao in listas:
+            for lista in uniao:
+                if len(lista):
+                    marcadas[np.frombuffer(lista, dtype=np.uint32)] += 1
+        posicoes = np.flatnonzero(marcadas == len(listas)).astype(np.uint32)
+        return array('I', posicoes.tobytes())
+
+    def _intersecao_python(self, listas):
+        resultado = set()
+        for lista in listas[0]:
+            resultado.update(lista)
+        for uniao in listas[1:]:
+            outros = set()
+            for lista in uniao:
+                outros.update(lista)
+            resultado &= outros
+            if not resultado:
+                break
+        return array('I', sorted(resultado))
@@ -0,0 +1,243 @@
+"""
+GRÁFICOS DO PAINEL
+Vendas ao longo do tempo, faturamento por região e ranking de produtos
+desenhados em tk.Canvas a partir dos agregados (sem percorrer as
+vendas), com a série temporal reduzida por LTTB à largura em pixels
+"""
+
+import tkinter as tk
+
+from serie_temporal import texto_data
+
+MARGEM_ESQUERDA = 72
+MARGEM_DIREITA = 16
+MARGEM_TOPO = 34
+MARGEM_BASE = 28
+LINHAS_GRADE = 4
+TOP_PRODUTOS = 10
+ESPERA_REDIMENSIONAR_MS = 80
+
+
+def lttb(xs, ys, limite):
+    """Largest-Triangle-Three-Buckets: até 'limite' pontos que preservam o formato da série
+
+    Mantém o primeiro e o último ponto; de cada balde intermediário fica o
+    ponto que forma o maior triângulo com o escolhido no balde anterior e
+    a média do balde seguinte. O(n).
+    """
+    n = len(xs)
+    if limite >= n or limite < 3:
+        return list(xs), list(ys)
+
+    saida_x = [xs[0]]
+    saida_y = [ys[0]]
+    tamanho_balde = (n - 2) / (limite - 2)
+    anterior = 0
+    for balde in range(limite - 2):
+        inicio = int(balde * tamanho_balde) + 1
+        fim = int((balde + 1) * tamanho_balde) + 1
+
+        # Média do balde seguinte (o último ponto, no último balde)
+        proximo_inicio = fim
+        proximo_fim = min(int((balde + 2) * tamanho_balde) + 1, n)
+        if proximo_inicio >= proximo_fim:
+            media_x, media_y = xs[-1], ys[-1]
+        else:
+            quantidade = proximo_fim - proximo_inicio
+            media_x = sum(xs[proximo_inicio:proximo_fim]) / quantidade
+            media_y = sum(ys[proximo_inicio:proximo_fim]) / quantidade
+
+        ax, ay = xs[anterior], ys[anterior]
+        maior_area = -1.0
+        escolhido = inicio
+        for i in range(inicio, fim):
+            # Dobro da área: a constante não muda a escolha
+            area = abs((ax - media_x) * (ys[i] - ay) - (ax - xs[i]) * (media_y - ay))
+            if area > maior_area:
+                maior_area = area
+                escolhido = i
+        saida_x.append(xs[escolhido])
+        saida_y.append(ys[escolhido])
+        anterior = escolhido
+
+    saida_x.append(xs[-1])
+    saida_y.append(ys[-1])
+    return saida_x, saida_y
+
+
+def abreviar(valor):
+    """R$ com sufixo: 'R$ 1,2 mi', 'R$ 35 mil'"""
+    if abs(valor) >= 1e9:
+        texto = f"{valor / 1e9:.1f} bi"
+    elif abs(valor) >= 1e6:
+        texto = f"{valor / 1e6:.1f} mi"
+    elif abs(valor) >= 1e3:
+        texto = f"{valor / 1e3:.0f} mil"
+    else:
+        texto = f"{valor:.0f}"
+    return "R$ " + texto.replace('.', ',')
+
+
+class PainelGraficos:
+    """Aba do painel: três Canvas redesenhados quando os agregados mudam
+
+    obter_agregados() -> Agregados atuais do armazenamento. O desenho só
+    acontece com a aba visível; mudanças com a aba oculta ficam pendentes.
+    """
+
+    def __init__(self, pai, cores, obter_agregados):
+        self.pai = pai
+        self.cores = cores
+        self.obter_agregados = obter_agregados
+        self._desenhado = None          # (versão, tamanhos) do último desenho
+        self._agendado = None
+        self.pontos_serie = 0           # pontos da série após a redução (diagnóstico)
+
+        fundo = cores['bg_secundario']
+        self.canvas_serie = tk.Canvas(pai, bg=fundo, highlightthickness=0, height=260)
+        self.canvas_serie.pack(fill='both', expand=True, pady=(0, 10))
+
+        inferior = tk.Frame(pai, bg=cores['bg_principal'])
+        inferior.pack(fill='both', expand=True)
+        self.canvas_regioes = tk.Canvas(inferior, bg=fundo, highlightthickness=0, height=220)
+        self.canvas_regioes.pack(side='left', fill='both', expand=True, padx=(0, 5))
+        self.canvas_produtos = tk.Canvas(inferior, bg=fundo, highlightthickness=0, height=220)
+        self.canvas_produtos.pack(side='left', fill='both', expand=True, padx=(5, 0))
+
+        for canvas in (self.canvas_serie, self.canvas_regioes, self.canvas_produtos):
+            canvas.bind('<Configure>', self._redimensionado)
+
+    # ============ ATUALIZAÇÃO ============
+
+    def atualizar(self, forcar=False):
+        """Redesenhar se os dados ou o tamanho mudaram e a aba estiver visível"""
+        if not self.pai.winfo_ismapped():
+            return
+        agregados = self.obter_agregados()
+        tamanhos = tuple((c.winfo_width(), c.winfo_height())
+                         for c in (self.canvas_serie, self.canvas_regioes, self.canvas_produtos))
+        estado = (agregados.versao, tamanhos)
+        if not forcar and estado == self._desenhado:
+            return
+        self._desenhado = estado
+        self.desenhar_serie(agregados)
+        self.desenhar_regioes(agregados)
+        self.desenhar_produtos(agregados)
+
+    def _redimensionado(self, event=None):
+        # Arrastar a borda da janela gera vários eventos: desenhar só após o último
+        if self._agendado is not None:
+            self.pai.after_cancel(self._agendado)
+        self._agendado = self.pai.after(ESPERA_REDIMENSIONAR_MS, self._redesenhar)
+
+    def _redesenhar(self):
+        self._agendado = None
+        self.atualizar()
+
+    # ============ GRÁFICOS ============
+
+    def _preparar(self, canvas, titulo):
+        """Limpar o canvas e escrever o título; devolve (largura, altura)"""
+        canvas.delete('all')
+        largura, altura = canvas.winfo_width(), canvas.winfo_height()
+        canvas.create_text(12, 16, text=titulo, anchor='w', font=('Arial', 11, 'bold'),
+                           fill=self.cores['texto'])
+        return largura, altura
+
+    def _vazio(self, canvas, largura, altura):
+        canvas.create_text(largura / 2, altura / 2, text="Nenhuma venda cadastrada",
+                           font=('Arial', 11), fill=self.cores['texto_secundario'])
+
+    def desenhar_serie(self, agregados):
+        """Faturamento diário, reduzido por LTTB a um ponto por pixel"""
+        canvas = self.canvas_serie
+        largura, altura = self._preparar(canvas, "📈 VENDAS AO LONGO DO TEMPO (faturamento diário)")
+        dias, valores = agregados.serie.valores_diarios()
+        if not dias:
+            self._vazio(canvas, largura, altura)
+            self.pontos_serie = 0
+            return
+
+        x0, x1 = MARGEM_ESQUERDA, max(MARGEM_ESQUERDA + 1, largura - MARGEM_DIREITA)
+        y0, y1 = MARGEM_TOPO, max(MARGEM_TOPO + 1, altura - MARGEM_BASE)
+        xs, ys = lttb(dias, valores, int(x1 - x0))
+        self.pontos_serie = len(xs)
+        maximo = max(ys) or 1.0
+        primeiro, ultimo = xs[0], xs[-1]
+        escala_x = (x1 - x0) / max(1, ultimo - primeiro)
+        escala_y = (y1 - y0) / maximo
+
+        self._grade(canvas, x0, x1, y0, y1, maximo)
+        coordenadas = []
+        for dia, valor in zip(xs, ys):
+            coordenadas.append(x0 + (dia - primeiro) * escala_x)
+            coordenadas.append(y1 - valor * escala_y)
+        if len(coordenadas) == 2:
+            x, y = coordenadas
+            canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=self.cores['azul'], outline='')
+        else:
+            # Uma única linha no Canvas, qualquer que seja o tamanho da série
+            canvas.create_line(*coordenadas, fill=self.cores['azul'], width=2)
+
+        canvas.create_text(x0, y1 + 6, text=texto_data(primeiro), anchor='nw',
+                           font=('Arial', 8), fill=self.cores['texto_secundario'])
+        canvas.create_text(x1, y1 + 6, text=texto_data(ultimo), anchor='ne',
+                           font=('Arial', 8), fill=self.cores['texto_secundario'])
+        canvas.create_text(x1, 16, text=f"{len(dias)} dias · {len(xs)} pontos", anchor='e',
+                           font=('Arial', 8), fill=self.cores['texto_secundario'])
+
+    def _grade(self, canvas, x0, x1, y0, y1, maximo):
+        for i in range(LINHAS_GRADE + 1):
+            y = y1 - (y1 - y0) * i / LINHAS_GRADE
+            canvas.create_line(x0, y, x1, y, fill=self.cores['bg_card'])
+            canvas.create_text(x0 - 6, y, text=abreviar(maximo * i / LINHAS_GRADE), anchor='e',
+                               font=('Arial', 8), fill=self.cores['texto_secundario'])
+
+    def desenhar_regioes(self, agregados):
+        """Barras verticais do faturamento por região"""
+        canvas = self.canvas_regioes
+        largura, altura = self._preparar(canvas, "🗺️ FATURAMENTO POR REGIÃO")
+        regioes = agregados.agrupamento('regiao').ordenado()
+        if not regioes:
+            self._vazio(canvas, largura, altura)
+            return
+
+        x0, x1 = 16, max(17, largura - 16)
+        y0, y1 = MARGEM_TOPO + 14, max(MARGEM_TOPO + 15, altura - MARGEM_BASE)
+        maximo = regioes[0][2] or 1.0
+        passo = (x1 - x0) / len(regioes)
+        largura_barra = max(2, passo * 0.6)
+        cores = (self.cores['verde'], self.cores['azul'], self.cores['roxo'], self.cores['amarelo'])
+        for i, (regiao, _, valor, _) in enumerate(regioes):
+            centro = x0 + passo * (i + 0.5)
+            topo = y1 - (y1 - y0) * max(0.0, valor) / maximo
+            canvas.create_rectangle(centro - largura_barra / 2, topo, centro + largura_barra / 2, y1,
+                                    fill=cores[i % len(cores)], outline='')
+            canvas.create_text(centro, topo - 4, text=abreviar(valor), anchor='s',
+                               font=('Arial', 8), fill=self.cores['texto'])
+            canvas.create_text(centro, y1 + 6, text=str(regiao), anchor='n',
+                               font=('Arial', 9), fill=self.cores['texto_secundario'])
+
+    def desenhar_produtos(self, agregados):
+        """Barras horizontais dos produtos de maior faturamento"""
+        canvas = self.canvas_produtos
+        largura, altura = self._preparar(canvas, f"🏆 TOP {TOP_PRODUTOS} PRODUTOS")
+        produtos = agregados.agrupamento('produto').top(TOP_PRODUTOS)
+        if not produtos:
+            self._vazio(canvas, largura, altura)
+            return
+
+        x0, x1 = 110, max(111, largura - 80)
+        y0, y1 = MARGEM_TOPO, max(MARGEM_TOPO + 1, altura - 10)
+        maximo = produtos[0][2] or 1.0
+        passo = (y1 - y0) / len(produtos)
+        altura_barra = max(2, passo * 0.7)
+        for i, (produto, _, valor, _) in enumerate(produtos):
+            centro = y0 + passo * (i + 0.5)
+            fim = x0 + (x1 - x0) * max(0.0, valor) / maximo
+            canvas.create_text(x0 - 6, centro, text=f"{i + 1}. {produto}"[:16], anchor='e',
+                               font=('Arial', 9), fill=self.cores['texto_secundario'])
+            canvas.create_rectangle(x0, centro - altura_barra / 2, fim, centro + altura_barra / 2,
+                                    fill=self.cores['roxo'], outline='')
+            canvas.create_text(fim + 6, centro, text=abreviar(valor), anchor='w',
+                               font=('Arial', 8), fill=self.cores['texto'])
@@ -0,0 +1,254 @@
+"""
+IMPORTADOR DE VENDAS
+Leitura em fluxo de arquivos CSV de vendas, com mapeamento entre
+esquemas, arquivo de rejeitados e entrega em lotes; validação de
+blocos de vendas colados na interface
+"""
+
+import csv
+import math
+import os
+import re
+from datetime import datetime
+
+from vendas_colunares import CAMPOS
+
+# Nomes de coluna aceitos em outros esquemas -> campo interno
+MAPEAMENTO_COLUNAS = {
+    'preco_unitario': 'preco',
+    'preço': 'preco',
+    'valor_total': 'total',
+    'valor': 'total',
+    'qtd': 'quantidade',
+    'região': 'regiao',
+}
+
+OBRIGATORIOS = ('data', 'vendedor', 'produto', 'quantidade', 'preco', 'regiao')
+# Colunas sem cabeçalho: na ordem de OBRIGATORIOS
+INDICES_PADRAO = {campo: i for i, campo in enumerate(OBRIGATORIOS)}
+# '1.234' e '1.234.567': pontos só entre grupos de três dígitos são de milhar
+MILHAR_SEM_DECIMAIS = re.compile(r'[+-]?[1-9]\d{0,2}(\.\d{3})+')
+
+
+class ErroLinha(ValueError):
+    """Linha do CSV que não pode ser convertida em venda"""
+
+
+class ResultadoImportacao:
+    """Resumo de uma importação"""
+
+    def __init__(self):
+        self.importadas = 0
+        self.rejeitadas = 0
+        self.arquivo_rejeitados = None
+        self.cancelada = False
+
+
+def mapear_cabecalho(cabecalho):
+    """Índice de cada campo interno no cabeçalho do arquivo"""
+    indices = {}
+    for i, nome in enumerate(cabecalho):
+        nome = nome.strip().lower()
+        campo = MAPEAMENTO_COLUNAS.get(nome, nome)
+        if campo in CAMPOS and campo not in indices:
+            indices[campo] = i
+    faltando = [campo for campo in OBRIGATORIOS if campo not in indices]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no arquivo: {', '.join(faltando)}")
+    return indices
+
+
+def converter_numero(texto):
+    """Aceitar '1234.5', '1.234,50' e '1.234' (milhar, não 1,234)"""
+    texto = texto.strip()
+    if ',' in texto or MILHAR_SEM_DECIMAIS.fullmatch(texto):
+        texto = texto.replace('.', '').replace(',', '.')
+    return float(texto)
+
+
+def conferir_numeros(quantidade, preco, total=None):
+    """(quantidade, preço, total) de uma venda: números finitos e quantidade inteira (ErroLinha)
+
+    Sem total, ele é calculado como quantidade × preço.
+    """
+    valores = (quantidade, preco) if total is None else (quantidade, preco, total)
+    if not all(math.isfinite(valor) for valor in valores):
+        raise ErroLinha("quantidade, preço ou total não finito")
+    # 2.7 é rejeitada, não truncada; 2 e 2.0 valem
+    if not float(quantidade).is_integer():
+        raise ErroLinha(f"quantidade não inteira: {quantidade:g}")
+    quantidade = int(quantidade)
+    return quantidade, float(preco), float(quantidade * preco if total is None else total)
+
+
+def converter_linha(linha, indices):
+    """Linha do CSV -> venda (dict), ou ErroLinha"""
+    try:
+        valores = {campo: linha[i].strip() for campo, i in indices.items()}
+    except IndexError:
+        raise ErroLinha("quantidade de colunas menor que o cabeçalho")
+
+    for campo in ('vendedor', 'produto', 'regiao'):
+        if not valores[campo]:
+            raise ErroLinha(f"campo '{campo}' vazio")
+    try:
+        datetime.strptime(valores['data'], '%d/%m/%Y')
+    except ValueError:
+        raise ErroLinha(f"data inválida: {valores['data']!r}")
+    try:
+        quantidade = converter_numero(valores['quantidade'])
+        preco = converter_numero(valores['preco'])
+        total = converter_numero(valores['total']) if valores.get('total') else None
+    except ValueError:
+        raise ErroLinha("quantidade, preço ou total não numérico")
+    quantidade, preco, total = conferir_numeros(quantidade, preco, total)
+
+    return {
+        'data': valores['data'],
+        'vendedor': valores['vendedor'],
+        'produto': valores['produto'],
+        'quantidade': quantidade,
+        'preco': preco,
+        'total': total,
+        'regiao': valores['regiao']
+    }
+
+
+def converter_campos(valores):
+    """Venda a partir de {campo: texto} (ex.: o formulário), com as validações da importação"""
+    return converter_linha([valores.get(campo, '') for campo in OBRIGATORIOS], INDICES_PADRAO)
+
+
+class LeitorVendas:
+    """Gerador de vendas de um CSV, sem carregar o arquivo inteiro
+
+    Linhas inválidas vão para '<arquivo>.rejeitados.csv' com o número da
+    linha e o motivo. 'lido' acompanha os bytes consumidos (mesma unidade
+    de 'tamanho') para o cálculo de progresso.
+    """
+
+    def __init__(self, caminho, caminho_rejeitados=None):
+        self.caminho = caminho
+        self.caminho_rejeitados = caminho_rejeitados or caminho + '.rejeitados.csv'
+        self.tamanho = os.path.getsize(caminho)
+        self.lido = 0
+        self.resultado = ResultadoImportacao()
+        self._rejeitados = None
+        self._escritor_rejeitados = None
+
+    @property
+    def progresso(self):
+        return min(1.0, self.lido / self.tamanho) if self.tamanho else 1.0
+
+    def _linhas(self, arquivo):
+        for linha in arquivo:
+            # Acentos ocupam mais de um byte em UTF-8; linha ASCII dispensa o encode
+            self.lido += len(linha) if linha.isascii() else len(linha.encode('utf-8'))
+            yield linha
+
+    def __iter__(self):
+        # Rejeitados de uma importação anterior não valem para esta
+        try:
+            os.remove(self.caminho_rejeitados)
+        except FileNotFoundError:
+            pass
+        with open(self.caminho, 'r', encoding='utf-8-sig', newline='') as f:
+            leitor = csv.reader(self._linhas(f))
+            cabecalho = next(leitor, None)
+            if cabecalho is None:
+                return
+            indices = mapear_cabecalho(cabecalho)
+            try:
+                for numero, linha in enumerate(leitor, 2):
+                    if not linha:
+                        continue
+                    try:
+                        venda = converter_linha(linha, indices)
+                    except ErroLinha as erro:
+                        self._rejeitar(cabecalho, numero, linha, erro)
+                        continue
+                    self.resultado.importadas += 1
+                    yield venda
+            finally:
+                if self._rejeitados is not None:
+                    self._rejeitados.close()
+
+    def _rejeitar(self, cabecalho, numero, linha, erro):
+        if self._rejeitados is None:
+            self._rejeitados = open(self.caminho_rejeitados, 'w', newline='', encoding='utf-8')
+            self._escritor_rejeitados = csv.writer(self._rejeitados)
+            self._escritor_rejeitados.writerow(['linha', 'erro'] + cabecalho)
+            self.resultado.arquivo_rejeitados = self.caminho_rejeitados
+        self._escritor_rejeitados.writerow([numero, str(erro)] + linha)
+        self.resultado.rejeitadas += 1
+
+
+def separador_bloco(linha):
+    """Separador de colunas de um bloco colado: tab (planilha), ';' ou ','"""
+    for separador in ('\t', ';'):
+        if separador in linha:
+            return separador
+    return ','
+
+
+def ler_bloco(texto):
+    """Vendas de um bloco de texto colado, uma por linha; devolve (vendas, erros)
+
+    A primeira linha pode ser um cabeçalho; sem ele, as colunas seguem a
+    ordem de OBRIGATORIOS. Todas as linhas são validadas: 'erros' traz
+    (número da linha, motivo) de cada uma que falhou.
+    """
+    linhas = texto.splitlines()
+    primeira = next((linha for linha in linhas if linha.strip()), '')
+    leitor = csv.reader(linhas, delimiter=separador_bloco(primeira))
+    indices = INDICES_PADRAO
+    vendas = []
+    erros = []
+    cabecalho_lido = False
+    for linha in leitor:
+        numero = leitor.line_num
+        if not any(valor.strip() for valor in linha):
+            continue
+        if not cabecalho_lido:
+            cabecalho_lido = True
+            try:
+                indices = mapear_cabecalho(linha)
+                continue
+            except ValueError:
+                pass        # primeira linha já é uma venda
+        try:
+            vendas.append(converter_linha(linha, indices))
+        except ErroLinha as erro:
+            erros.append((numero, str(erro)))
+    return vendas, erros
+
+
+def em_lotes(vendas, tamanho_lote=5000):
+    """Agrupar um iterável de vendas em listas de até 'tamanho_lote'"""
+    lote = []
+    for venda in vendas:
+        lote.append(venda)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def importar(caminho, destino, tamanho_lote=5000, progresso=None, cancelado=None):
+    """Importar um CSV entregando as vendas em lotes para destino(lote)
+
+    progresso(fracao) é chamado a cada lote; cancelado() interrompe a
+    leitura entre lotes.
+    """
+    leitor = LeitorVendas(caminho)
+    for lote in em_lotes(leitor, tamanho_lote):
+        destino(lote)
+        if progresso is not None:
+            progresso(leitor.progresso)
+        if cancelado is not None and cancelado():
+            leitor.resultado.cancelada = True
+            break
+    if progresso is not None and not leitor.resultado.cancelada:
+        progresso(1.0)
+    return leitor.resultado
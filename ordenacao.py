@@ -0,0 +1,151 @@
+"""
+ORDENAÇÃO DE VENDAS
+Permutações das vendas colunares ordenadas por coluna, guardadas em cache
+e atualizadas só com as vendas novas (inserção binária ou intercalação)
+"""
+
+import heapq
+from array import array
+from bisect import bisect_right
+
+from agrupamento import np
+
+CAMPOS_ORDENAVEIS = ('data', 'vendedor', 'produto', 'quantidade', 'preco', 'total', 'regiao')
+CAMPOS_NUMERICOS = ('quantidade', 'preco', 'total')
+
+# Até este número de vendas novas, inserir uma a uma; acima, ordenar as novas e intercalar
+LIMITE_INSERCAO = 64
+
+
+class Permutacao:
+    """Posições das vendas em ordem crescente de uma chave, e a chave de cada uma"""
+
+    __slots__ = ('ordem', 'chaves', 'indexadas', 'assinatura')
+
+    def __init__(self, ordem, chaves, indexadas, assinatura):
+        self.ordem = ordem              # posições (array('I') ou vetor NumPy)
+        self.chaves = chaves            # chave de cada posição de 'ordem' (float)
+        self.indexadas = indexadas
+        self.assinatura = assinatura
+
+
+class OrdemColunas:
+    """Cache das permutações ordenadas de um VendasColunares
+
+    Textos são ordenados pelo posto do valor no dicionário (ordem
+    alfabética); um valor novo muda os postos e a permutação da coluna
+    é refeita. Datas usam o dia convertido, números o próprio valor.
+    """
+
+    def __init__(self, vendas):
+        self.vendas = vendas
+        self._permutacoes = {}
+
+    # ============ CHAVES ============
+
+    def _traducao(self, campo):
+        """(código -> chave, assinatura) das colunas de texto e data"""
+        dicionario = self.vendas.dicionarios[campo]
+        if campo == 'data':
+            return dicionario.ordinais, None
+        valores = dicionario.valores
+        postos = array('d', bytes(8 * len(valores)))
+        for posto, codigo in enumerate(sorted(range(len(valores)), key=lambda c: valores[c].casefold())):
+            postos[codigo] = posto
+        return postos, len(valores)
+
+    def _chaves(self, campo, inicio, fim):
+        """Chaves das vendas nas posições [inicio, fim) e a assinatura da tradução"""
+        if campo in CAMPOS_NUMERICOS:
+            coluna = getattr(self.vendas, campo)
+            if np is not None:
+                return np.array(coluna[inicio:fim], dtype=np.float64), None
+            return array('d', coluna[inicio:fim]), None
+        traducao, assinatura = self._traducao(campo)
+        codigos = self.vendas.codigos[campo][inicio:fim]
+        if np is not None:
+            return (np.asarray(traducao, dtype=np.float64)[np.frombuffer(codigos, dtype=np.uint32)]
+                    if len(codigos) else np.zeros(0)), assinatura
+        return array('d', map(traducao.__getitem__, codigos)), assinatura
+
+    # ============ PERMUTAÇÕES ============
+
+    def permutacao(self, campo):
+        """Permutação crescente (estável) de 'campo', em dia com as vendas atuais"""
+        if campo not in CAMPOS_ORDENAVEIS:
+            raise ValueError(f"Campo não ordenável: {campo}")
+        fim = len(self.vendas)
+        atual = self._permutacoes.get(campo)
+        if atual is not None and campo not in CAMPOS_NUMERICOS and campo != 'data':
+            if len(self.vendas.dicionarios[campo]) != atual.assinatura:
+                atual = None        # valor novo: os postos mudaram
+        if atual is None:
+            atual = self._montar(campo, fim)
+            self._permutacoes[campo] = atual
+        elif atual.indexadas < fim:
+            self._estender(campo, atual, fim)
+        return atual
+
+    def _montar(self, campo, fim):
+        chaves, assinatura = self._chaves(campo, 0, fim)
+        if np is not None:
+            ordem = np.argsort(chaves, kind='stable').astype(np.uint32)
+            return Permutacao(ordem, chaves[ordem], fim, assinatura)
+        ordem = array('I', sorted(range(fim), key=chaves.__getitem__))
+        return Permutacao(ordem, array('d', map(chaves.__getitem__, ordem)), fim, assinatura)
+
+    def _estender(self, campo, permutacao, fim):
+        """Incluir as vendas [indexadas, fim) sem reordenar as demais"""
+        inicio = permutacao.indexadas
+        chaves, _ = self._chaves(campo, inicio, fim)
+
+        if np is not None:
+            # Vendas novas ficam depois das antigas de mesma chave: a ordem continua estável
+            ordem_novas = np.argsort(chaves, kind='stable')
+            chaves_novas = chaves[ordem_novas]
+            pontos = np.searchsorted(permutacao.chaves, chaves_novas, side='right')
+            permutacao.ordem = np.insert(permutacao.ordem, pontos,
+                                         (ordem_novas + inicio).astype(np.uint32))
+            permutacao.chaves = np.insert(permutacao.chaves, pontos, chaves_novas)
+        elif fim - inicio <= LIMITE_INSERCAO:
+            for deslocamento, chave in enumerate(chaves):
+                ponto = bisect_right(permutacao.chaves, chave)
+                permutacao.chaves.insert(ponto, chave)
+                permutacao.ordem.insert(ponto, inicio + deslocamento)
+        else:
+            novas = sorted(range(len(chaves)), key=chaves.__getitem__)
+            intercaladas = heapq.merge(zip(permutacao.chaves, permutacao.ordem),
+                                       ((chaves[i], inicio + i) for i in novas))
+            ordem, chaves_ordenadas = array('I'), array('d')
+            for chave, posicao in intercaladas:
+                chaves_ordenadas.append(chave)
+                ordem.append(posicao)
+            permutacao.ordem, permutacao.chaves = ordem, chaves_ordenadas
+        permutacao.indexadas = fim
+
+    # ============ CONSULTA ============
+
+    def ordenar(self, campo, decrescente=False, posicoes=None):
+        """Posições (array('I')) ordenadas por 'campo'
+
+        'posicoes' restringe o resultado a um subconjunto (ex.: o filtro
+        ativo), mantendo a ordem da permutação em cache.
+        """
+        ordem = self.permutacao(campo).ordem
+        if np is not None:
+            ordem = np.asarray(ordem)
+            if posicoes is not None:
+                marcadas = np.zeros(len(self.vendas), dtype=bool)
+                if len(posicoes):
+                    marcadas[np.frombuffer(posicoes, dtype=np.uint32)] = True
+                ordem = ordem[marcadas[ordem]]
+            if decrescente:
+                ordem = ordem[::-1]
+            return array('I', np.ascontiguousarray(ordem, dtype=np.uint32).tobytes())
+
+        if posicoes is not None:
+            selecionadas = set(posicoes)
+            ordem = array('I', (p for p in ordem if p in selecionadas))
+        if decrescente:
+            ordem = ordem[::-1]
+        return ordem if posicoes is not None or decrescente else array('I', ordem)
@@ -6,28 +6,72 @@ Interface gráfica para adicionar vendas e gerar relatórios
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-import csv
 import os
+import time
 from tkinter import font as tkfont
 
+from armazenamento import ArmazenamentoCSV, criar_armazenamento
+import exportador
+from diagnostico import Instrumentacao, MonitorLaco, medido
+from filtros import Filtro
+from graficos import PainelGraficos
+from importador import ErroLinha, converter_campos, importar, ler_bloco
+from relatorios import (SECOES, CacheRelatorios, DocumentoRelatorio, dados_agrupados, dados_relatorio,
+                        montar_periodos, partes_relatorio, somar_vendas_novas)
+from serie_temporal import ordinal_data
+from tarefas import ExecutorTarefas
+from tabela_virtual import TabelaVirtual
+
+# Espera após a última tecla antes de consultar o filtro
+ESPERA_FILTRO_MS = 60
+TODOS = 'Todos'
+# Intervalo para conferir vendas de outros caixas (modo servidor)
+INTERVALO_EXTERNO_MS = 250
+# Tempo que a linha de status do cadastro fica visível
+DURACAO_STATUS_MS = 6000
+# Erros de um lote listados na janela (as linhas ficam todas marcadas)
+ERROS_EXIBIDOS = 8
+# Métrica do diagnóstico para as gravações no armazenamento (diário/banco)
+NOME_GRAVACAO = 'salvar_dados'
+
 class SistemaVendas:
-    def __init__(self):
+    def __init__(self, armazenamento=None, executar=True):
         self.janela = tk.Tk()
         self.janela.title("📊 SISTEMA DE GERENCIAMENTO DE VENDAS")
         self.janela.geometry("1200x700")
         self.janela.configure(bg='#0a1929')
         
         # Dados
-        self.vendas = []
-        self.carregar_dados()
+        self.armazenamento = armazenamento or ArmazenamentoCSV()
+        self.executor = ExecutorTarefas(self.janela.after)
+        self.tarefa_atual = None
+        self.filtro = Filtro()
+        self.ordem_tabela = None        # (campo, decrescente) da coluna clicada
+        self.filtradas = None           # resultado do filtro/ordenação ativos (None = nenhum)
+        self._filtro_agendado = None
+        self._status_agendado = None
+        self.janela_lote = None
+        self.janela_diagnostico = None
+        self.instrumentacao = Instrumentacao()
+        self.relatorios = CacheRelatorios()
+        self.painel = None              # montado na primeira vez que a aba é aberta
+        self.carregando = True          # vendas ainda sendo abertas em segundo plano
+        self._fechar_ao_carregar = False
         
         # Configurar estilo
         self.configurar_estilo()
         
-        # Criar interface
+        # Criar interface (sem ler as vendas: o primeiro quadro não depende do histórico)
         self.criar_interface()
         
-        self.janela.mainloop()
+        # Abrir o armazenamento só depois que a janela e o formulário forem desenhados
+        self.janela.after_idle(self.carregar_dados)
+        self.janela.protocol("WM_DELETE_WINDOW", self.fechar)
+        self.janela.after(INTERVALO_EXTERNO_MS, self.verificar_alteracoes)
+        MonitorLaco(self.janela, self.instrumentacao).iniciar()
+        self.janela.bind('<F12>', lambda e: self.abrir_diagnostico())
+        if executar:
+            self.janela.mainloop()
     
     def configurar_estilo(self):
         """Configurar cores e estilos"""
@@ -65,6 +109,15 @@ class SistemaVendas:
                            fg=self.cores['texto_secundario'])
         subtitulo.pack(side='left', padx=(20, 0))
         
+        tk.Button(header,
+                  text="🩺 DIAGNÓSTICO",
+                  font=('Arial', 10, 'bold'),
+                  bg=self.cores['bg_card'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=self.abrir_diagnostico).pack(side='right')
+        
         # ============ FRAME PRINCIPAL ============
         main_container = tk.Frame(self.janela, bg=self.cores['bg_principal'])
         main_container.pack(fill='both', expand=True, padx=20, pady=10)
@@ -167,7 +220,26 @@ class SistemaVendas:
                                  relief='flat',
                                  cursor='hand2',
                                  command=self.cadastrar_venda)
-        btn_cadastrar.pack(pady=(0, 20), padx=20, fill='x')
+        btn_cadastrar.pack(pady=(0, 10), padx=20, fill='x')
+        
+        # Botão Lançamento em lote
+        btn_lote = tk.Button(card_cadastro,
+                            text="📋 LANÇAMENTO EM LOTE",
+                            font=('Arial', 11, 'bold'),
+                            bg=self.cores['bg_card'],
+                            fg='white',
+                            relief='flat',
+                            cursor='hand2',
+                            command=self.abrir_lote)
+        btn_lote.pack(pady=(0, 5), padx=20, fill='x')
+        
+        # Linha de status (no lugar das janelas de aviso a cada venda)
+        self.status_cadastro = tk.Label(card_cadastro,
+                                       font=('Arial', 10),
+                                       bg=self.cores['bg_secundario'],
+                                       fg=self.cores['verde'],
+                                       anchor='w')
+        self.status_cadastro.pack(pady=(0, 10), padx=20, fill='x')
         
         # ============ CARD DE ESTATÍSTICAS ============
         card_stats = tk.Frame(coluna_esquerda, bg=self.cores['bg_secundario'])
@@ -184,19 +256,136 @@ class SistemaVendas:
         self.stats_frame = tk.Frame(card_stats, bg=self.cores['bg_secundario'])
         self.stats_frame.pack(pady=15, padx=15, fill='x')
         
+        self.stats_vazio = tk.Label(self.stats_frame,
+                                    text="⏳ Carregando vendas...",
+                                    font=('Arial', 11),
+                                    bg=self.cores['bg_secundario'],
+                                    fg=self.cores['texto_secundario'])
+        
+        # Métricas criadas uma vez; atualizar_stats só troca os textos
+        self.stats_metricas = tk.Frame(self.stats_frame, bg=self.cores['bg_secundario'])
+        self.stats_vars = {}
+        metrics = [
+            ('valor', "💰 Vendas Totais:", self.cores['verde']),
+            ('quantidade', "📦 Quantidade:", self.cores['azul']),
+            ('ticket', "🎫 Ticket Médio:", self.cores['roxo'])
+        ]
+        
+        for chave, label, cor in metrics:
+            frame = tk.Frame(self.stats_metricas, bg=self.cores['bg_secundario'])
+            frame.pack(fill='x', pady=2)
+            
+            tk.Label(frame, text=label,
+                    font=('Arial', 10),
+                    bg=self.cores['bg_secundario'],
+                    fg=self.cores['texto_secundario']).pack(side='left')
+            
+            self.stats_vars[chave] = tk.StringVar()
+            tk.Label(frame, textvariable=self.stats_vars[chave],
+                    font=('Arial', 10, 'bold'),
+                    bg=self.cores['bg_secundario'],
+                    fg=cor).pack(side='right')
+        
         self.atualizar_stats()
         
+        # ============ ABAS (tabela de vendas e painel de gráficos) ============
+        self.abas = ttk.Notebook(coluna_direita)
+        self.abas.pack(fill='both', expand=True)
+        
+        aba_vendas = tk.Frame(self.abas, bg=self.cores['bg_principal'])
+        aba_painel = tk.Frame(self.abas, bg=self.cores['bg_principal'])
+        self.abas.add(aba_vendas, text="📋 Vendas")
+        self.abas.add(aba_painel, text="📈 Painel")
+        
         # ============ TABELA DE VENDAS ============
         # Título
-        titulo_tabela = tk.Label(coluna_direita,
+        titulo_tabela = tk.Label(aba_vendas,
                                 text="📋 VENDAS CADASTRADAS",
                                 font=('Arial', 16, 'bold'),
                                 bg=self.cores['bg_principal'],
                                 fg=self.cores['texto'])
-        titulo_tabela.pack(anchor='w', pady=(0, 10))
+        titulo_tabela.pack(anchor='w', pady=(10, 10))
+        
+        # ============ FILTRO (tabela) E PERÍODO (tabela, relatório e exportação) ============
+        filtro_frame = tk.Frame(aba_vendas, bg=self.cores['bg_principal'])
+        filtro_frame.pack(fill='x', pady=(0, 10))
+        
+        linha_filtro = tk.Frame(filtro_frame, bg=self.cores['bg_principal'])
+        linha_filtro.pack(fill='x')
+        
+        tk.Label(linha_filtro, text="🔍 Vendedor:",
+                font=('Arial', 10),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto_secundario']).pack(side='left')
+        
+        self.filtro_vendedor = tk.Entry(linha_filtro, font=('Arial', 10), width=16)
+        self.filtro_vendedor.pack(side='left', padx=(5, 10))
+        
+        tk.Label(linha_filtro, text="Produto:",
+                font=('Arial', 10),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto_secundario']).pack(side='left')
+        
+        self.filtro_produto = ttk.Combobox(linha_filtro, font=('Arial', 10), width=14, state='readonly',
+                                           postcommand=lambda: self.opcoes_filtro(self.filtro_produto, 'produto'))
+        self.filtro_produto.pack(side='left', padx=(5, 10))
+        
+        tk.Label(linha_filtro, text="Região:",
+                font=('Arial', 10),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto_secundario']).pack(side='left')
+        
+        self.filtro_regiao = ttk.Combobox(linha_filtro, font=('Arial', 10), width=10, state='readonly',
+                                          postcommand=lambda: self.opcoes_filtro(self.filtro_regiao, 'regiao'))
+        self.filtro_regiao.pack(side='left', padx=(5, 10))
+        
+        tk.Button(linha_filtro,
+                  text="✖ LIMPAR FILTRO",
+                  font=('Arial', 9, 'bold'),
+                  bg=self.cores['bg_card'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=self.limpar_filtro).pack(side='left')
+        
+        linha_periodo = tk.Frame(filtro_frame, bg=self.cores['bg_principal'])
+        linha_periodo.pack(fill='x', pady=(5, 0))
+        
+        tk.Label(linha_periodo, text="📅 Período  De:",
+                font=('Arial', 10),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto_secundario']).pack(side='left')
+        
+        self.periodo_de = tk.Entry(linha_periodo, font=('Arial', 10), width=12)
+        self.periodo_de.pack(side='left', padx=(5, 10))
+        
+        tk.Label(linha_periodo, text="Até:",
+                font=('Arial', 10),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto_secundario']).pack(side='left')
+        
+        self.periodo_ate = tk.Entry(linha_periodo, font=('Arial', 10), width=12)
+        self.periodo_ate.pack(side='left', padx=(5, 10))
+        
+        tk.Label(linha_periodo, text="(dd/mm/aaaa — vale também para relatório e exportação)",
+                font=('Arial', 9),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto_secundario']).pack(side='left')
+        
+        self.filtro_status = tk.Label(linha_periodo,
+                                     font=('Arial', 10, 'bold'),
+                                     bg=self.cores['bg_principal'],
+                                     fg=self.cores['azul'])
+        self.filtro_status.pack(side='right')
+        
+        # Cada tecla só reagenda a consulta (debounce); os combos aplicam na hora
+        for entry in (self.filtro_vendedor, self.periodo_de, self.periodo_ate):
+            entry.bind('<KeyRelease>', self.agendar_filtro)
+        for combo in (self.filtro_produto, self.filtro_regiao):
+            combo.bind('<<ComboboxSelected>>', lambda e: self.aplicar_filtro())
         
         # Frame da tabela
-        tabela_container = tk.Frame(coluna_direita, bg=self.cores['bg_secundario'])
+        tabela_container = tk.Frame(aba_vendas, bg=self.cores['bg_secundario'])
         tabela_container.pack(fill='both', expand=True)
         
         # Scrollbars
@@ -210,13 +399,18 @@ class SistemaVendas:
         self.tree = ttk.Treeview(tabela_container,
                                 columns=('data', 'vendedor', 'produto', 'qtd', 'preco', 'total', 'regiao'),
                                 show='headings',
-                                yscrollcommand=scroll_y.set,
                                 xscrollcommand=scroll_x.set)
         
-        scroll_y.config(command=self.tree.yview)
         scroll_x.config(command=self.tree.xview)
         
-        # Configurar colunas
+        # Apenas as linhas visíveis existem no Treeview; scroll_y percorre as vendas
+        # (ou só as filtradas/ordenadas, quando há filtro ou ordenação)
+        self.tabela = TabelaVirtual(self.tree, scroll_y,
+                                    contar=lambda: len(self.linhas_tabela),
+                                    obter=lambda inicio, fim: self.linhas_tabela[inicio:fim],
+                                    formatar=self.formatar_linha)
+        
+        # Configurar colunas (clique no cabeçalho ordena)
         colunas = [
             ('data', 'Data', 100),
             ('vendedor', 'Vendedor', 120),
@@ -227,12 +421,21 @@ class SistemaVendas:
             ('regiao', 'Região', 100)
         ]
         
+        self.nomes_colunas = {}
         for col, nome, largura in colunas:
-            self.tree.heading(col, text=nome)
+            self.nomes_colunas[col] = nome
+            self.tree.heading(col, text=nome, command=lambda c=col: self.ordenar_por(c))
             self.tree.column(col, width=largura, anchor='center')
         
         self.tree.pack(fill='both', expand=True, padx=1, pady=1)
         
+        # ============ PAINEL DE GRÁFICOS ============
+        # Desenhado dos agregados; só redesenha com a aba visível e dados novos
+        self.aba_painel = aba_painel
+        self.painel_frame = tk.Frame(aba_painel, bg=self.cores['bg_principal'])
+        self.painel_frame.pack(fill='both', expand=True, pady=10)
+        self.abas.bind('<<NotebookTabChanged>>', self.trocar_aba)
+        
         # ============ BOTÕES DE AÇÃO ============
         botoes_frame = tk.Frame(coluna_direita, bg=self.cores['bg_principal'])
         botoes_frame.pack(fill='x', pady=(20, 0))
@@ -259,6 +462,17 @@ class SistemaVendas:
                                 command=self.exportar_csv)
         btn_exportar.pack(side='left')
         
+        # Botão Importar CSV
+        btn_importar = tk.Button(botoes_frame,
+                                text="📥 IMPORTAR CSV",
+                                font=('Arial', 12, 'bold'),
+                                bg=self.cores['amarelo'],
+                                fg='white',
+                                relief='flat',
+                                cursor='hand2',
+                                command=self.importar_csv)
+        btn_importar.pack(side='left', padx=(10, 0))
+        
         # Botão Limpar
         btn_limpar = tk.Button(botoes_frame,
                               text="🗑️ LIMPAR VENDAS",
@@ -270,207 +484,522 @@ class SistemaVendas:
                               command=self.limpar_vendas)
         btn_limpar.pack(side='right')
         
+        # ============ PROGRESSO (visível durante importação/exportação) ============
+        self.progresso_frame = tk.Frame(coluna_direita, bg=self.cores['bg_principal'])
+        
+        self.progresso_texto = tk.Label(self.progresso_frame,
+                                       font=('Arial', 10),
+                                       bg=self.cores['bg_principal'],
+                                       fg=self.cores['texto_secundario'])
+        self.progresso_texto.pack(side='left')
+        
+        self.progresso_barra = ttk.Progressbar(self.progresso_frame, maximum=100)
+        self.progresso_barra.pack(side='left', fill='x', expand=True, padx=(10, 0))
+        
+        tk.Button(self.progresso_frame,
+                  text="✖ CANCELAR",
+                  font=('Arial', 9, 'bold'),
+                  bg=self.cores['vermelho'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=self.cancelar_tarefa).pack(side='left', padx=(10, 0))
+        
+        # ============ CARREGANDO (sobre a tabela, até as vendas abrirem) ============
+        self.carregando_frame = tk.Frame(tabela_container, bg=self.cores['bg_secundario'])
+        self.carregando_frame.place(relx=0.5, rely=0.5, anchor='center')
+        
+        tk.Label(self.carregando_frame,
+                text="⏳ Carregando vendas...",
+                font=('Arial', 12),
+                bg=self.cores['bg_secundario'],
+                fg=self.cores['texto_secundario']).pack(pady=(10, 10), padx=20)
+        
+        barra = ttk.Progressbar(self.carregando_frame, mode='indeterminate', length=260)
+        barra.pack(pady=(0, 15), padx=20)
+        barra.start(15)
+        
         # Atualizar tabela
         self.atualizar_tabela()
     
+    def aguardando_carga(self):
+        """Ações que usam as vendas esperam o carregamento terminar"""
+        if self.carregando:
+            self.informar("⏳ Aguarde: as vendas ainda estão sendo carregadas.", erro=True)
+        return self.carregando
+    
     def cadastrar_venda(self):
         """Cadastrar nova venda"""
+        if self.aguardando_carga():
+            return
+        # Validar campos
+        if not self.vendedor_entry.get().strip():
+            self.informar("Preencha o nome do vendedor!", erro=True)
+            return
+        
+        if not self.produto_combo.get():
+            self.informar("Selecione um produto!", erro=True)
+            return
+        
+        if not self.regiao_combo.get():
+            self.informar("Selecione uma região!", erro=True)
+            return
+        
+        # Mesmas regras do lote e da importação: data válida, quantidade inteira
         try:
-            # Validar campos
-            if not self.vendedor_entry.get():
-                messagebox.showerror("Erro", "Preencha o nome do vendedor!")
-                return
-            
-            if not self.produto_combo.get():
-                messagebox.showerror("Erro", "Selecione um produto!")
-                return
-            
-            if not self.regiao_combo.get():
-                messagebox.showerror("Erro", "Selecione uma região!")
-                return
-            
-            qtd = int(self.quantidade_entry.get())
-            preco = float(self.preco_entry.get())
-            total = qtd * preco
-            
-            venda = {
+            venda = converter_campos({
                 'data': self.data_entry.get(),
                 'vendedor': self.vendedor_entry.get(),
                 'produto': self.produto_combo.get(),
-                'quantidade': qtd,
-                'preco': preco,
-                'total': total,
+                'quantidade': self.quantidade_entry.get(),
+                'preco': self.preco_entry.get(),
                 'regiao': self.regiao_combo.get()
-            }
-            
-            self.vendas.append(venda)
-            self.salvar_dados()
-            
-            # Limpar campos
-            self.vendedor_entry.delete(0, tk.END)
-            self.produto_combo.set('')
-            self.quantidade_entry.delete(0, tk.END)
-            self.quantidade_entry.insert(0, "1")
-            self.preco_entry.delete(0, tk.END)
-            self.regiao_combo.set('')
-            
-            # Atualizar interface
-            self.atualizar_tabela()
+            })
+        except ErroLinha as erro:
+            self.informar(f"Venda inválida: {erro}", erro=True)
+            return
+        
+        try:
+            with self.instrumentacao.medir(NOME_GRAVACAO):
+                self.armazenamento.adicionar(venda)
+        except OSError as erro:
+            self.informar(f"Falha ao gravar a venda: {erro}", erro=True)
+            return
+        
+        # Limpar campos
+        self.vendedor_entry.delete(0, tk.END)
+        self.produto_combo.set('')
+        self.quantidade_entry.delete(0, tk.END)
+        self.quantidade_entry.insert(0, "1")
+        self.preco_entry.delete(0, tk.END)
+        self.regiao_combo.set('')
+        
+        # Atualizar interface
+        self.anexar_tabela()
+        self.atualizar_stats()
+        
+        self.informar(f"✔ Venda cadastrada: {venda['produto']} — R$ {venda['total']:,.2f}")
+        self.vendedor_entry.focus_set()
+    
+    def informar(self, texto, erro=False):
+        """Mensagem na linha de status do cadastro, sem bloquear a digitação"""
+        self.status_cadastro.config(text=texto,
+                                    fg=self.cores['vermelho' if erro else 'verde'])
+        if self._status_agendado is not None:
+            self.janela.after_cancel(self._status_agendado)
+        self._status_agendado = self.janela.after(DURACAO_STATUS_MS, self.limpar_status)
+    
+    def limpar_status(self):
+        self._status_agendado = None
+        self.status_cadastro.config(text='')
+    
+    # ============ LANÇAMENTO EM LOTE ============
+    
+    def abrir_lote(self):
+        """Janela para colar (ou digitar) várias vendas e lançá-las de uma vez"""
+        if self.janela_lote is not None and self.janela_lote.winfo_exists():
+            self.janela_lote.lift()
+            return
+        
+        lote = tk.Toplevel(self.janela)
+        lote.title("📋 LANÇAMENTO EM LOTE")
+        lote.geometry("760x520")
+        lote.configure(bg=self.cores['bg_principal'])
+        self.janela_lote = lote
+        
+        tk.Label(lote,
+                text="Uma venda por linha — Data, Vendedor, Produto, Quantidade, Preço, Região",
+                font=('Arial', 11, 'bold'),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto']).pack(anchor='w', padx=20, pady=(20, 0))
+        
+        tk.Label(lote,
+                text="Colunas separadas por tab (colado de planilha), ';' ou ','. "
+                     "Um cabeçalho na primeira linha define outra ordem.",
+                font=('Arial', 9),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto_secundario']).pack(anchor='w', padx=20, pady=(0, 10))
+        
+        texto_frame = tk.Frame(lote, bg=self.cores['bg_secundario'])
+        texto_frame.pack(fill='both', expand=True, padx=20)
+        
+        scroll = tk.Scrollbar(texto_frame)
+        scroll.pack(side='right', fill='y')
+        
+        texto = tk.Text(texto_frame, bg=self.cores['bg_secundario'], fg=self.cores['texto'],
+                        insertbackground=self.cores['texto'], font=('Courier', 10),
+                        wrap='none', undo=True, yscrollcommand=scroll.set)
+        texto.pack(fill='both', expand=True)
+        scroll.config(command=texto.yview)
+        texto.tag_configure('erro', background='#7f1d1d')
+        texto.focus_set()
+        
+        erros_label = tk.Label(lote,
+                              font=('Courier', 9),
+                              bg=self.cores['bg_principal'],
+                              fg=self.cores['vermelho'],
+                              justify='left', anchor='w')
+        erros_label.pack(fill='x', padx=20, pady=(5, 0))
+        
+        botoes = tk.Frame(lote, bg=self.cores['bg_principal'])
+        botoes.pack(fill='x', padx=20, pady=(10, 20))
+        
+        def validar():
+            """Conferir todas as linhas; marca as inválidas e devolve as vendas (ou None)"""
+            texto.tag_remove('erro', '1.0', 'end')
+            vendas, erros = ler_bloco(texto.get('1.0', 'end'))
+            for numero, _ in erros:
+                texto.tag_add('erro', f'{numero}.0', f'{numero}.end')
+            if erros:
+                detalhes = [f"Linha {numero}: {motivo}" for numero, motivo in erros[:ERROS_EXIBIDOS]]
+                if len(erros) > ERROS_EXIBIDOS:
+                    detalhes.append(f"... e mais {len(erros) - ERROS_EXIBIDOS} linhas")
+                erros_label.config(text='\n'.join(detalhes), fg=self.cores['vermelho'])
+                texto.see(f'{erros[0][0]}.0')
+                return None
+            if not vendas:
+                erros_label.config(text="Nenhuma venda informada.", fg=self.cores['vermelho'])
+                return None
+            erros_label.config(text=f"{len(vendas)} vendas válidas.", fg=self.cores['verde'])
+            return vendas
+        
+        def lancar():
+            # Tudo ou nada: com qualquer linha inválida, nada é gravado
+            vendas = validar()
+            if vendas is None or self.aguardando_carga():
+                return
+            try:
+                with self.instrumentacao.medir(NOME_GRAVACAO):
+                    self.armazenamento.adicionar_lote(vendas)
+            except OSError as erro:
+                erros_label.config(text=f"Falha ao gravar o lote: {erro}", fg=self.cores['vermelho'])
+                return
+            # Uma gravação e uma atualização da tela para o lote inteiro
+            self.anexar_tabela()
             self.atualizar_stats()
-            
-            messagebox.showinfo("Sucesso", "Venda cadastrada com sucesso!")
-            
-        except ValueError:
-            messagebox.showerror("Erro", "Quantidade e Preço devem ser números válidos!")
+            texto.delete('1.0', 'end')
+            total = sum(venda['total'] for venda in vendas)
+            erros_label.config(text=f"✔ {len(vendas)} vendas lançadas.", fg=self.cores['verde'])
+            self.informar(f"✔ {len(vendas)} vendas lançadas em lote — R$ {total:,.2f}")
+        
+        def copiar_formulario():
+            """Acrescentar os campos do formulário como uma linha do lote"""
+            campos = (self.data_entry.get(), self.vendedor_entry.get(), self.produto_combo.get(),
+                      self.quantidade_entry.get(), self.preco_entry.get(), self.regiao_combo.get())
+            if texto.get('end-2c') not in ('\n', ''):
+                texto.insert('end-1c', '\n')
+            texto.insert('end-1c', '\t'.join(campos) + '\n')
+            texto.see('end')
+        
+        tk.Button(botoes,
+                  text="✅ LANÇAR TODAS",
+                  font=('Arial', 12, 'bold'),
+                  bg=self.cores['verde'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=lancar).pack(side='left')
+        
+        tk.Button(botoes,
+                  text="🔎 VALIDAR",
+                  font=('Arial', 12, 'bold'),
+                  bg=self.cores['azul'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=validar).pack(side='left', padx=(10, 0))
+        
+        tk.Button(botoes,
+                  text="⬇ COPIAR DO FORMULÁRIO",
+                  font=('Arial', 12, 'bold'),
+                  bg=self.cores['bg_card'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=copiar_formulario).pack(side='left', padx=(10, 0))
+        
+        tk.Button(botoes,
+                  text="✖ FECHAR",
+                  font=('Arial', 12, 'bold'),
+                  bg=self.cores['vermelho'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=lote.destroy).pack(side='right')
+        
+        texto.bind('<Control-Return>', lambda e: (lancar(), 'break')[1])
     
+    @medido
     def atualizar_tabela(self):
         """Atualizar tabela de vendas"""
-        # Limpar tabela
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Adicionar vendas
-        for venda in self.vendas:
-            self.tree.insert('', 'end', values=(
-                venda['data'],
-                venda['vendedor'],
-                venda['produto'],
-                venda['quantidade'],
-                f"R$ {venda['preco']:.2f}",
-                f"R$ {venda['total']:.2f}",
-                venda['regiao']
-            ))
+        self.consultar_tabela()
+        self.tabela.atualizar()
+        self.atualizar_status_filtro()
+    
+    def anexar_tabela(self):
+        """Vendas novas no final: caminho incremental da tabela"""
+        if self.filtradas is not None:
+            # Índice e permutações só processam as vendas novas; a janela visível é mantida
+            self.atualizar_tabela()
+        else:
+            self.tabela.anexar()
+    
+    @property
+    def linhas_tabela(self):
+        """Fonte da tabela: as vendas filtradas/ordenadas ou todas (nenhuma durante o carregamento)"""
+        if self.carregando:
+            return ()
+        return self.vendas if self.filtradas is None else self.filtradas
+    
+    def consultar_tabela(self):
+        """Refazer a consulta do filtro e da ordenação ativos"""
+        if self.carregando:
+            # Filtro e ordenação ficam guardados; a consulta é feita ao fim do carregamento
+            self.filtradas = None
+        elif self.filtro.vazio and self.ordem_tabela is None:
+            self.filtradas = None
+        else:
+            self.filtradas = self.armazenamento.filtrar(self.filtro, self.ordem_tabela)
+    
+    def ordenar_por(self, coluna):
+        """Clique no cabeçalho: crescente, depois decrescente"""
+        campo = 'quantidade' if coluna == 'qtd' else coluna
+        if self.ordem_tabela is not None and self.ordem_tabela[0] == campo:
+            self.ordem_tabela = (campo, not self.ordem_tabela[1])
+        else:
+            self.ordem_tabela = (campo, False)
+        
+        for col, nome in self.nomes_colunas.items():
+            seta = ''
+            if col == coluna:
+                seta = ' ▼' if self.ordem_tabela[1] else ' ▲'
+            self.tree.heading(col, text=nome + seta)
+        
+        # Só a fonte da tabela muda: os itens do Treeview são reaproveitados
+        self.consultar_tabela()
+        self.tabela.inicio = 0
+        self.tabela.atualizar()
+    
+    # ============ FILTRO ============
+    
+    def opcoes_filtro(self, combo, campo):
+        """Preencher o combo com os valores existentes (lidos dos agregados)"""
+        valores = [] if self.carregando else sorted(self.armazenamento.agregados.grupos[campo])
+        combo.configure(values=[TODOS] + valores)
+    
+    def agendar_filtro(self, event=None):
+        """Debounce: só a última tecla dentro da espera dispara a consulta"""
+        if self._filtro_agendado is not None:
+            self.janela.after_cancel(self._filtro_agendado)
+        self._filtro_agendado = self.janela.after(ESPERA_FILTRO_MS, self.aplicar_filtro)
+    
+    def ler_filtro(self):
+        """Filtro a partir dos campos; datas incompletas (ainda sendo digitadas) não restringem"""
+        limites = []
+        for entry in (self.periodo_de, self.periodo_ate):
+            limites.append(ordinal_data(entry.get().strip()) or None)
+        produto = self.filtro_produto.get()
+        regiao = self.filtro_regiao.get()
+        return Filtro(self.filtro_vendedor.get(),
+                      '' if produto == TODOS else produto,
+                      '' if regiao == TODOS else regiao,
+                      *limites)
     
+    def aplicar_filtro(self):
+        """Consultar o índice e trocar a fonte da tabela"""
+        self._filtro_agendado = None
+        filtro = self.ler_filtro()
+        if filtro == self.filtro:
+            return
+        self.filtro = filtro
+        self.consultar_tabela()
+        self.tabela.inicio = 0
+        self.tabela.atualizar()
+        self.atualizar_status_filtro()
+    
+    def limpar_filtro(self):
+        for entry in (self.filtro_vendedor, self.periodo_de, self.periodo_ate):
+            entry.delete(0, tk.END)
+        self.filtro_produto.set('')
+        self.filtro_regiao.set('')
+        self.aplicar_filtro()
+    
+    def atualizar_status_filtro(self):
+        if self.filtro.vazio or self.carregando:
+            self.filtro_status.config(text='')
+        else:
+            self.filtro_status.config(text=f"{len(self.filtradas)} de {len(self.vendas)} vendas")
+    
+    def formatar_linha(self, venda):
+        """Valores exibidos no Treeview para uma venda"""
+        return (
+            venda['data'],
+            venda['vendedor'],
+            venda['produto'],
+            venda['quantidade'],
+            f"R$ {venda['preco']:.2f}",
+            f"R$ {venda['total']:.2f}",
+            venda['regiao']
+        )
+    
+    @medido
     def atualizar_stats(self):
         """Atualizar estatísticas rápidas"""
-        # Limpar stats
-        for widget in self.stats_frame.winfo_children():
-            widget.destroy()
-        
-        if not self.vendas:
-            tk.Label(self.stats_frame,
-                    text="Nenhuma venda cadastrada",
-                    font=('Arial', 11),
-                    bg=self.cores['bg_secundario'],
-                    fg=self.cores['texto_secundario']).pack(pady=10)
+        if self.carregando:
+            self.stats_vazio.pack(pady=10)
             return
+        agregados = self.armazenamento.agregados
         
-        # Calcular métricas
-        total_vendas = len(self.vendas)
-        valor_total = sum(v['total'] for v in self.vendas)
-        ticket_medio = valor_total / total_vendas
+        if not agregados.quantidade:
+            self.stats_vazio.config(text="Nenhuma venda cadastrada")
+            self.stats_metricas.pack_forget()
+            self.stats_vazio.pack(pady=10)
+            self.atualizar_painel()
+            return
         
         # Exibir métricas
-        metrics = [
-            ("💰 Vendas Totais:", f"R$ {valor_total:,.2f}", self.cores['verde']),
-            ("📦 Quantidade:", f"{total_vendas} vendas", self.cores['azul']),
-            ("🎫 Ticket Médio:", f"R$ {ticket_medio:,.2f}", self.cores['roxo'])
-        ]
+        self.stats_vars['valor'].set(f"R$ {agregados.valor_total:,.2f}")
+        self.stats_vars['quantidade'].set(f"{agregados.quantidade} vendas")
+        self.stats_vars['ticket'].set(f"R$ {agregados.ticket_medio:,.2f}")
         
-        for label, valor, cor in metrics:
-            frame = tk.Frame(self.stats_frame, bg=self.cores['bg_secundario'])
-            frame.pack(fill='x', pady=2)
-            
-            tk.Label(frame, text=label,
-                    font=('Arial', 10),
-                    bg=self.cores['bg_secundario'],
-                    fg=self.cores['texto_secundario']).pack(side='left')
-            
-            tk.Label(frame, text=valor,
-                    font=('Arial', 10, 'bold'),
-                    bg=self.cores['bg_secundario'],
-                    fg=cor).pack(side='right')
+        self.stats_vazio.pack_forget()
+        self.stats_metricas.pack(fill='x')
+        self.atualizar_painel()
     
+    def atualizar_painel(self):
+        """Redesenhar os gráficos (se a aba do painel estiver aberta)"""
+        if self.painel is not None and not self.carregando:
+            self.painel.atualizar()
+    
+    def trocar_aba(self, event=None):
+        """Os gráficos só são montados quando a aba do painel é aberta pela primeira vez"""
+        if self.painel is None and self.abas.select() == str(self.aba_painel):
+            self.painel = PainelGraficos(self.painel_frame, self.cores,
+                                         lambda: self.armazenamento.agregados)
+        self.atualizar_painel()
+    
+    @medido
     def gerar_relatorio(self):
         """Gerar relatório completo"""
+        if self.aguardando_carga():
+            return
         if not self.vendas:
             messagebox.showwarning("Aviso", "Nenhuma venda cadastrada!")
             return
         
+        periodo = self.ler_periodo()
+        if periodo is None:
+            return
+        de, ate = periodo
+        inicio = time.perf_counter()
+        
         # Criar janela de relatório
         relatorio = tk.Toplevel(self.janela)
         relatorio.title("📊 RELATÓRIO DE VENDAS")
         relatorio.geometry("800x600")
         relatorio.configure(bg=self.cores['bg_principal'])
         
-        # Área de texto
-        texto = tk.Text(relatorio, bg=self.cores['bg_secundario'],
-                       fg=self.cores['texto'], font=('Courier', 10))
-        texto.pack(fill='both', expand=True, padx=20, pady=20)
-        
-        # Gerar relatório
-        texto.insert('1.0', "="*70 + "\n")
-        texto.insert('end', "RELATÓRIO DE VENDAS\n")
-        texto.insert('end', "="*70 + "\n\n")
-        
-        # Métricas principais
-        total_vendas = len(self.vendas)
-        valor_total = sum(v['total'] for v in self.vendas)
-        ticket_medio = valor_total / total_vendas
-        
-        texto.insert('end', "MÉTRICAS PRINCIPAIS:\n")
-        texto.insert('end', "-"*50 + "\n")
-        texto.insert('end', f"Vendas Totais:    R$ {valor_total:>12,.2f}\n")
-        texto.insert('end', f"Total de Vendas:  {total_vendas:>12}\n")
-        texto.insert('end', f"Ticket Médio:     R$ {ticket_medio:>12,.2f}\n\n")
-        
-        # Vendas por vendedor
-        texto.insert('end', "VENDAS POR VENDEDOR:\n")
-        texto.insert('end', "-"*50 + "\n")
-        
-        vendas_vendedor = {}
-        for v in self.vendas:
-            nome = v['vendedor']
-            vendas_vendedor[nome] = vendas_vendedor.get(nome, 0) + v['total']
-        
-        for nome, valor in sorted(vendas_vendedor.items(), key=lambda x: x[1], reverse=True):
-            percentual = (valor / valor_total) * 100
-            texto.insert('end', f"{nome:<20} R$ {valor:>12,.2f}  ({percentual:.1f}%)\n")
-        
-        texto.insert('end', "\n")
-        
-        # Vendas por produto
-        texto.insert('end', "PRODUTOS MAIS VENDIDOS:\n")
-        texto.insert('end', "-"*50 + "\n")
-        
-        vendas_produto = {}
-        for v in self.vendas:
-            prod = v['produto']
-            vendas_produto[prod] = vendas_produto.get(prod, 0) + v['total']
-        
-        for i, (prod, valor) in enumerate(sorted(vendas_produto.items(), key=lambda x: x[1], reverse=True)[:5], 1):
-            texto.insert('end', f"{i}. {prod:<20} R$ {valor:>12,.2f}\n")
-        
-        texto.insert('end', "\n")
-        
-        # Vendas por região
-        texto.insert('end', "VENDAS POR REGIÃO:\n")
-        texto.insert('end', "-"*50 + "\n")
-        
-        vendas_regiao = {}
-        for v in self.vendas:
-            reg = v['regiao']
-            vendas_regiao[reg] = vendas_regiao.get(reg, 0) + v['total']
-        
-        for reg, valor in sorted(vendas_regiao.items(), key=lambda x: x[1], reverse=True):
-            percentual = (valor / valor_total) * 100
-            texto.insert('end', f"{reg:<20} R$ {valor:>12,.2f}  ({percentual:.1f}%)\n")
-        
-        texto.insert('end', "\n")
-        texto.insert('end', "="*70 + "\n")
-        texto.insert('end', "RELATÓRIO GERADO EM: " + datetime.now().strftime("%d/%m/%Y %H:%M") + "\n")
-        texto.insert('end', "="*70 + "\n")
+        # Totais correntes e séries copiados agora; os agrupamentos rodam fora do mainloop.
+        # Com período, vendedor/produto/região também precisam ser recalculados.
+        agregados = self.armazenamento.agregados
+        versao, quantidade = agregados.versao, agregados.quantidade
+        periodos = montar_periodos(agregados.serie, de, ate)
+        if de is None and ate is None:
+            dados = dados_relatorio(agregados)
+            lista_dimensoes = [('vendedor', 'regiao')]
+        else:
+            dados = None
+            lista_dimensoes = [(dimensao,) for dimensao in SECOES] + [('vendedor', 'regiao')]
+        parametros = (de, ate, tuple(lista_dimensoes))
+        
+        def exibir(documento):
+            # Rodapé carimbado agora, mesmo com o documento vindo do cache
+            conteudo = documento.texto()
+            
+            # Área de texto: o documento inteiro entra em uma única inserção
+            texto = tk.Text(relatorio, bg=self.cores['bg_secundario'],
+                           fg=self.cores['texto'], font=('Courier', 10))
+            texto.pack(fill='both', expand=True, padx=20, pady=20)
+            
+            texto.insert('1.0', conteudo)
+            texto.config(state='disabled')
+            
+            # Botão salvar
+            btn_salvar = tk.Button(relatorio,
+                                  text="💾 SALVAR RELATÓRIO",
+                                  font=('Arial', 12, 'bold'),
+                                  bg=self.cores['verde'],
+                                  fg='white',
+                                  command=lambda: self.salvar_relatorio(conteudo))
+            btn_salvar.pack(pady=(0, 20))
+            self.instrumentacao.registrar('gerar_relatorio (até exibir)', time.perf_counter() - inicio)
+        
+        def concluir(agrupamentos, base=None):
+            if not relatorio.winfo_exists():
+                return
+            metricas, secoes = dados or dados_agrupados(agrupamentos[:len(SECOES)])
+            if base is None:
+                documento = DocumentoRelatorio(parametros, versao, quantidade, agrupamentos)
+            else:
+                documento = base.derivar(versao, quantidade, agrupamentos)
+            documento.montar(partes_relatorio(metricas, secoes, agrupamentos[-1:],
+                                              periodo=(de, ate), periodos=periodos))
+            # Só guardar se nenhuma venda chegou durante o cálculo
+            if self.armazenamento.agregados.versao == versao:
+                self.relatorios.guardar(documento)
+            exibir(documento)
+        
+        # Mesmos dados e parâmetros: o relatório pronto é exibido direto
+        documento = self.relatorios.obter(versao, parametros)
+        if documento is not None:
+            exibir(documento)
+            return
         
-        texto.config(state='disabled')
+        # Poucas vendas acrescentadas desde o último: somar só elas aos agrupamentos anteriores
+        base = self.relatorios.base(agregados, parametros) if self.armazenamento.acrescimos_no_fim else None
+        if base is not None:
+            novas = self.vendas[base.quantidade:quantidade]
+            concluir(somar_vendas_novas(base.agrupamentos, novas, de, ate), base)
+            return
         
-        # Botão salvar
-        btn_salvar = tk.Button(relatorio,
-                              text="💾 SALVAR RELATÓRIO",
-                              font=('Arial', 12, 'bold'),
-                              bg=self.cores['verde'],
-                              fg='white',
-                              command=lambda: self.salvar_relatorio(texto.get('1.0', 'end')))
-        btn_salvar.pack(pady=(0, 20))
+        # Aguarde (enquanto o cruzamento é calculado em segundo plano)
+        aguarde = tk.Frame(relatorio, bg=self.cores['bg_principal'])
+        aguarde.pack(expand=True)
+        
+        tk.Label(aguarde,
+                text="Gerando relatório...",
+                font=('Arial', 12),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto_secundario']).pack(pady=(0, 10))
+        
+        barra = ttk.Progressbar(aguarde, mode='indeterminate', length=300)
+        barra.pack()
+        barra.start(15)
+        
+        def calculado(agrupamentos):
+            if relatorio.winfo_exists():
+                aguarde.destroy()
+            concluir(agrupamentos)
+        
+        def falhar(erro):
+            if relatorio.winfo_exists():
+                relatorio.destroy()
+            messagebox.showerror("Erro", f"Falha ao gerar o relatório:\n{erro}")
+        
+        funcao, argumentos, usar_processo = \
+            self.armazenamento.preparar_agrupamentos(lista_dimensoes, de, ate)
+        if usar_processo:
+            tarefa = self.executor.em_processo(funcao, *argumentos, nome='Relatório',
+                                               ao_concluir=calculado, ao_falhar=falhar)
+        else:
+            tarefa = self.executor.em_thread(lambda tarefa: funcao(*argumentos), nome='Relatório',
+                                             ao_concluir=calculado, ao_falhar=falhar)
+        
+        def fechar_relatorio():
+            tarefa.cancelar()
+            relatorio.destroy()
+        
+        relatorio.protocol("WM_DELETE_WINDOW", fechar_relatorio)
     
     def salvar_relatorio(self, conteudo):
         """Salvar relatório em arquivo"""
@@ -486,58 +1015,320 @@ class SistemaVendas:
             messagebox.showinfo("Sucesso", f"Relatório salvo em:\n{arquivo}")
     
     def exportar_csv(self):
-        """Exportar dados para CSV"""
+        """Exportar dados para CSV, CSV gzip, JSON Lines ou colunar binário"""
+        if self.aguardando_carga():
+            return
         if not self.vendas:
             messagebox.showwarning("Aviso", "Nenhuma venda para exportar!")
             return
         
+        if self.tarefa_atual is not None:
+            messagebox.showwarning("Aviso", "Aguarde a operação em andamento terminar!")
+            return
+        
+        periodo = self.ler_periodo()
+        if periodo is None:
+            return
+        foto = self.armazenamento.foto(*periodo)
+        if not len(foto):
+            messagebox.showwarning("Aviso", "Nenhuma venda no período informado!")
+            return
+        
         arquivo = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("Arquivo CSV", "*.csv"), ("Todos os arquivos", "*.*")],
+            filetypes=[("Arquivo CSV", "*.csv"), ("CSV compactado (gzip)", "*.csv.gz"),
+                       ("JSON Lines", "*.jsonl"), ("Colunar binário", "*.vcol"),
+                       ("Todos os arquivos", "*.*")],
             initialfile=f"vendas_{datetime.now().strftime('%Y%m%d_%H%M')}"
         )
         
         if arquivo:
-            with open(arquivo, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=['data', 'vendedor', 'produto', 
-                                                       'quantidade', 'preco', 'total', 'regiao'])
-                writer.writeheader()
-                writer.writerows(self.vendas)
+            # Formato pela extensão escolhida; as vendas são gravadas em blocos
+            def trabalhar(tarefa):
+                return exportador.exportar(foto, arquivo,
+                                           progresso=tarefa.informar_progresso,
+                                           cancelado=lambda: tarefa.cancelada)
+            
+            def concluir(resultado):
+                self.ocultar_progresso()
+                # Só a gravação: o diálogo de arquivo não entra na medida
+                self.instrumentacao.registrar('exportar_csv', resultado.segundos)
+                messagebox.showinfo("Sucesso", f"Dados exportados para:\n{arquivo}\n\n{resultado}")
+            
+            tarefa = self.executor.em_thread(trabalhar, nome='Exportação',
+                                             ao_concluir=concluir,
+                                             ao_falhar=self.falha_tarefa,
+                                             ao_cancelar=self.ocultar_progresso,
+                                             ao_progresso=self.atualizar_progresso)
+            self.mostrar_progresso("Exportando...", tarefa)
+    
+    def importar_csv(self):
+        """Importar vendas de um CSV em segundo plano"""
+        if self.aguardando_carga():
+            return
+        if self.tarefa_atual is not None:
+            messagebox.showwarning("Aviso", "Aguarde a operação em andamento terminar!")
+            return
+        
+        arquivo = filedialog.askopenfilename(
+            filetypes=[("Arquivo CSV", "*.csv"), ("Todos os arquivos", "*.*")]
+        )
+        
+        if arquivo:
+            # Vendas já gravadas: ficam no armazenamento mesmo se a importação for cancelada
+            gravadas = [0]
+            
+            # A leitura roda em outra thread; os lotes são gravados aqui, no mainloop
+            def trabalhar(tarefa):
+                return importar(arquivo, tarefa.enviar,
+                                progresso=tarefa.informar_progresso,
+                                cancelado=lambda: tarefa.cancelada)
             
-            messagebox.showinfo("Sucesso", f"Dados exportados para:\n{arquivo}")
+            def aplicar_lote(lote):
+                with self.instrumentacao.medir(NOME_GRAVACAO):
+                    self.armazenamento.adicionar_lote(lote)
+                gravadas[0] += len(lote)
+                self.anexar_tabela()
+                self.atualizar_stats()
+            
+            def cancelar():
+                self.ocultar_progresso()
+                messagebox.showinfo("Importação cancelada",
+                                    f"{gravadas[0]} vendas importadas antes do cancelamento.")
+            
+            def concluir(resultado):
+                self.ocultar_progresso()
+                if resultado.rejeitadas:
+                    messagebox.showwarning("Importação concluída",
+                                           f"{resultado.importadas} vendas importadas.\n"
+                                           f"{resultado.rejeitadas} linhas rejeitadas, detalhes em:\n"
+                                           f"{resultado.arquivo_rejeitados}")
+                else:
+                    messagebox.showinfo("Sucesso", f"{resultado.importadas} vendas importadas!")
+            
+            tarefa = self.executor.em_thread(trabalhar, nome='Importação',
+                                             ao_mensagem=aplicar_lote,
+                                             ao_concluir=concluir,
+                                             ao_falhar=self.falha_tarefa,
+                                             ao_cancelar=cancelar,
+                                             ao_progresso=self.atualizar_progresso)
+            self.mostrar_progresso("Importando...", tarefa)
+    
+    def ler_periodo(self):
+        """(de, ate) em ordinais a partir dos campos de período; None se inválido"""
+        limites = []
+        for entry, nome in ((self.periodo_de, 'inicial'), (self.periodo_ate, 'final')):
+            texto = entry.get().strip()
+            if not texto:
+                limites.append(None)
+                continue
+            ordinal = ordinal_data(texto)
+            if not ordinal:
+                messagebox.showerror("Erro", f"Data {nome} inválida! Use o formato dd/mm/aaaa.")
+                return None
+            limites.append(ordinal)
+        
+        de, ate = limites
+        if de is not None and ate is not None and de > ate:
+            messagebox.showerror("Erro", "A data inicial deve ser anterior à final!")
+            return None
+        return de, ate
+    
+    def mostrar_progresso(self, texto, tarefa):
+        """Exibir a barra de progresso da tarefa atual"""
+        self.tarefa_atual = tarefa
+        self.progresso_texto.config(text=texto)
+        self.progresso_barra['value'] = 0
+        self.progresso_frame.pack(fill='x', pady=(10, 0))
+    
+    def atualizar_progresso(self, fracao):
+        self.progresso_barra['value'] = fracao * 100
+    
+    def ocultar_progresso(self):
+        self.tarefa_atual = None
+        self.progresso_frame.pack_forget()
+    
+    def cancelar_tarefa(self):
+        """Cancelar a importação/exportação em andamento"""
+        if self.tarefa_atual is not None:
+            self.tarefa_atual.cancelar()
+    
+    def falha_tarefa(self, erro):
+        self.ocultar_progresso()
+        messagebox.showerror("Erro", f"Falha na operação:\n{erro}")
     
     def limpar_vendas(self):
         """Limpar todas as vendas"""
+        if self.aguardando_carga():
+            return
         if messagebox.askyesno("Confirmar", "Deseja realmente limpar todas as vendas?"):
-            self.vendas = []
-            self.salvar_dados()
+            with self.instrumentacao.medir(NOME_GRAVACAO):
+                self.armazenamento.limpar()
             self.atualizar_tabela()
             self.atualizar_stats()
             messagebox.showinfo("Sucesso", "Todas as vendas foram removidas!")
     
+    def verificar_alteracoes(self):
+        """Vendas de outros caixas chegaram pelo servidor: redesenhar tabela e totais"""
+        if not self.carregando and self.armazenamento.alteracoes_externas():
+            self.atualizar_tabela()
+            self.atualizar_stats()
+        self.janela.after(INTERVALO_EXTERNO_MS, self.verificar_alteracoes)
+    
+    # ============ DIAGNÓSTICO ============
+    
+    def abrir_diagnostico(self):
+        """Janela com tempos por operação (p50/p95/p99), captura de perfil e exportação JSON"""
+        if self.janela_diagnostico is not None and self.janela_diagnostico.winfo_exists():
+            self.janela_diagnostico.lift()
+            return
+        
+        diagnostico = tk.Toplevel(self.janela)
+        diagnostico.title("🩺 DIAGNÓSTICO DE DESEMPENHO")
+        diagnostico.geometry("900x560")
+        diagnostico.configure(bg=self.cores['bg_principal'])
+        self.janela_diagnostico = diagnostico
+        captura = self.instrumentacao.captura
+        
+        tk.Label(diagnostico,
+                text="Tempos em milissegundos (percentis das últimas chamadas)",
+                font=('Arial', 11, 'bold'),
+                bg=self.cores['bg_principal'],
+                fg=self.cores['texto']).pack(anchor='w', padx=20, pady=(20, 10))
+        
+        colunas = [
+            ('operacao', 'Operação', 240),
+            ('chamadas', 'Chamadas', 80),
+            ('media', 'Média', 80),
+            ('p50', 'p50', 80),
+            ('p95', 'p95', 80),
+            ('p99', 'p99', 80),
+            ('maximo', 'Máx.', 80),
+            ('total', 'Total (s)', 90)
+        ]
+        tabela = ttk.Treeview(diagnostico, columns=[col for col, _, _ in colunas],
+                              show='headings', height=9)
+        for col, nome, largura in colunas:
+            tabela.heading(col, text=nome)
+            tabela.column(col, width=largura, anchor='w' if col == 'operacao' else 'e')
+        tabela.pack(fill='x', padx=20)
+        
+        botoes = tk.Frame(diagnostico, bg=self.cores['bg_principal'])
+        botoes.pack(fill='x', padx=20, pady=10)
+        
+        texto = tk.Text(diagnostico, bg=self.cores['bg_secundario'], fg=self.cores['texto'],
+                        font=('Courier', 9), wrap='none', height=12)
+        texto.pack(fill='both', expand=True, padx=20, pady=(0, 20))
+        
+        def mostrar_captura():
+            texto.config(state='normal')
+            texto.delete('1.0', 'end')
+            texto.insert('1.0', captura.texto() or
+                         "Nenhuma captura. Inicie uma para registrar o perfil (cProfile) da "
+                         "thread da interface e as alocações (tracemalloc).")
+            texto.config(state='disabled')
+        
+        def atualizar():
+            if not diagnostico.winfo_exists():
+                return
+            tabela.delete(*tabela.get_children())
+            for nome, metrica in self.instrumentacao.resumo().items():
+                tabela.insert('', 'end', values=(
+                    nome, metrica['chamadas'],
+                    *(f"{metrica[chave] * 1000:.1f}" for chave in ('media', 'p50', 'p95', 'p99', 'maximo')),
+                    f"{metrica['total']:.2f}"))
+            diagnostico.after(1000, atualizar)
+        
+        def alternar_captura():
+            if captura.ativa:
+                captura.parar()
+                btn_captura.config(text="⏺ INICIAR CAPTURA", bg=self.cores['roxo'])
+                mostrar_captura()
+            else:
+                captura.iniciar()
+                btn_captura.config(text="⏹ PARAR CAPTURA", bg=self.cores['vermelho'])
+        
+        def exportar():
+            arquivo = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSON", "*.json"), ("Todos os arquivos", "*.*")],
+                initialfile=f"diagnostico_{datetime.now().strftime('%Y%m%d_%H%M')}",
+                parent=diagnostico
+            )
+            if arquivo:
+                self.instrumentacao.exportar_json(arquivo)
+                self.informar(f"✔ Diagnóstico exportado: {os.path.basename(arquivo)}")
+        
+        btn_captura = tk.Button(botoes,
+                               text="⏹ PARAR CAPTURA" if captura.ativa else "⏺ INICIAR CAPTURA",
+                               font=('Arial', 11, 'bold'),
+                               bg=self.cores['vermelho' if captura.ativa else 'roxo'],
+                               fg='white',
+                               relief='flat',
+                               cursor='hand2',
+                               command=alternar_captura)
+        btn_captura.pack(side='left')
+        
+        tk.Button(botoes,
+                  text="💾 EXPORTAR JSON",
+                  font=('Arial', 11, 'bold'),
+                  bg=self.cores['verde'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=exportar).pack(side='left', padx=(10, 0))
+        
+        tk.Button(botoes,
+                  text="↺ ZERAR",
+                  font=('Arial', 11, 'bold'),
+                  bg=self.cores['bg_card'],
+                  fg='white',
+                  relief='flat',
+                  cursor='hand2',
+                  command=self.instrumentacao.zerar).pack(side='left', padx=(10, 0))
+        
+        mostrar_captura()
+        atualizar()
+    
+    @property
+    def vendas(self):
+        """Sequência de vendas do armazenamento atual"""
+        return self.armazenamento.vendas
+    
     def carregar_dados(self):
-        """Carregar dados salvos"""
-        try:
-            if os.path.exists('vendas_salvas.csv'):
-                with open('vendas_salvas.csv', 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    self.vendas = list(reader)
-                    # Converter tipos
-                    for v in self.vendas:
-                        v['quantidade'] = int(v['quantidade'])
-                        v['preco'] = float(v['preco'])
-                        v['total'] = float(v['total'])
-        except:
-            self.vendas = []
-    
-    def salvar_dados(self):
-        """Salvar dados em arquivo"""
-        with open('vendas_salvas.csv', 'w', newline='', encoding='utf-8') as f:
-            if self.vendas:
-                writer = csv.DictWriter(f, fieldnames=self.vendas[0].keys())
-                writer.writeheader()
-                writer.writerows(self.vendas)
+        """Carregar dados salvos em segundo plano; tabela e totais aparecem ao terminar"""
+        inicio = time.perf_counter()
+        
+        def concluir(_):
+            self.instrumentacao.registrar('carregar_dados', time.perf_counter() - inicio)
+            self.carregando = False
+            self.carregando_frame.destroy()
+            if self._fechar_ao_carregar:
+                self.fechar()
+                return
+            self.atualizar_tabela()
+            self.atualizar_stats()
+        
+        def falhar(erro):
+            messagebox.showerror("Erro", f"Não foi possível carregar os dados salvos:\n{erro}")
+            self.executor.encerrar()
+            self.janela.destroy()
+        
+        self.executor.em_thread(lambda tarefa: self.armazenamento.abrir(), nome='Carregamento',
+                                ao_concluir=concluir, ao_falhar=falhar)
+    
+    def fechar(self):
+        """Sincronizar dados e encerrar"""
+        if self.carregando:
+            # O armazenamento ainda está abrindo em outra thread: fechar quando terminar
+            self._fechar_ao_carregar = True
+            self.janela.withdraw()
+            return
+        self.executor.encerrar()
+        with self.instrumentacao.medir(NOME_GRAVACAO):
+            self.armazenamento.fechar()
+        self.janela.destroy()
 
 # ============ EXECUTAR ============
 if __name__ == "__main__":
-    SistemaVendas()
\ No newline at end of file
+    SistemaVendas(criar_armazenamento(os.environ.get('VENDAS_ARMAZENAMENTO', 'csv')))
\ No newline at end of file
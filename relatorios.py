@@ -0,0 +1,306 @@
+"""
+RELATÓRIOS DE VENDAS
+Montagem do texto do relatório a partir dos agregados, sem depender
+da interface (usado pela janela de relatório e pela linha de comando),
+e cache dos relatórios prontos por versão dos dados
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+
+from agregados import Agregados
+from agrupamento import agrupar_colunas, agrupar_vendas, normalizar_dimensoes, somar_agrupamentos
+from serie_temporal import SerieDiaria, dentro_periodo, ordinal_data, texto_data
+
+NOMES_DIMENSOES = {
+    'data': 'DIA',
+    'vendedor': 'VENDEDOR',
+    'produto': 'PRODUTO',
+    'regiao': 'REGIÃO',
+}
+
+SECOES = ('vendedor', 'produto', 'regiao')
+DIAS_RECENTES = 30
+DIAS_SERIE = 31     # a série diária mostra no máximo os últimos dias do período
+LIMITE_CACHE = 8
+# Até quantas vendas novas compensa somar ao relatório anterior em vez de recalcular tudo
+LIMITE_INCREMENTAL = 20000
+
+
+def dados_relatorio(agregados):
+    """Métricas e seções (vendedor, produto, região) a partir dos totais correntes"""
+    metricas = (agregados.quantidade, agregados.valor_total, agregados.ticket_medio)
+    secoes = {dimensao: agregados.agrupamento(dimensao) for dimensao in SECOES}
+    return metricas, secoes
+
+
+def dados_agrupados(agrupamentos):
+    """Métricas e seções a partir de Agrupamentos de vendedor, produto e região
+
+    Usado quando o relatório cobre só um período e os totais correntes
+    não servem; 'agrupamentos' segue a ordem de SECOES.
+    """
+    secoes = dict(zip(SECOES, agrupamentos))
+    quantidade = sum(int(q) for q in secoes['vendedor'].quantidades)
+    valor = sum(float(v) for v in secoes['vendedor'].valores)
+    metricas = (quantidade, valor, valor / quantidade if quantidade else 0.0)
+    return metricas, secoes
+
+
+def texto_periodo(de=None, ate=None):
+    if de is None and ate is None:
+        return "todo o histórico"
+    return f"{texto_data(de) if de else 'início'} a {texto_data(ate) if ate else 'fim'}"
+
+
+def variacao(atual, anterior):
+    return f"{(atual - anterior) / anterior * 100:+.1f}%" if anterior else "—"
+
+
+def montar_periodos(serie, de=None, ate=None):
+    """Linhas das seções por período: últimos 30 dias, mês a mês e série diária
+
+    Cada total sai das somas de prefixo da série (O(log N) por consulta).
+    """
+    if not len(serie):
+        return []
+    de = serie.primeiro if de is None else max(de, serie.primeiro)
+    ate = serie.ultimo if ate is None else min(ate, serie.ultimo)
+    if de > ate:
+        return []
+    linhas = []
+
+    # Últimos 30 dias do período, comparados aos 30 anteriores
+    inicio, fim = serie.ultimos_dias(DIAS_RECENTES, ate)
+    vendas, valor, _ = serie.periodo(inicio, fim)
+    _, valor_anterior, _ = serie.periodo(inicio - DIAS_RECENTES, inicio - 1)
+    linhas.append(f"ÚLTIMOS {DIAS_RECENTES} DIAS ({texto_data(inicio)} a {texto_data(fim)}):")
+    linhas.append("-"*50)
+    linhas.append(f"Vendas Totais:    R$ {valor:>12,.2f}")
+    linhas.append(f"Total de Vendas:  {vendas:>12}")
+    linhas.append(f"{DIAS_RECENTES} dias antes:    R$ {valor_anterior:>12,.2f}  "
+                  f"(variação {variacao(valor, valor_anterior)})")
+    linhas.append("")
+
+    # Mês a mês
+    linhas.append("MÊS A MÊS:")
+    linhas.append("-"*50)
+    anterior = None
+    for inicio_mes, vendas, valor, _ in serie.serie(de, ate, passo='mes'):
+        comparacao = f"  {variacao(valor, anterior):>7}" if anterior is not None else ""
+        linhas.append(f"{texto_data(inicio_mes)[3:]:<10} R$ {valor:>12,.2f}  ({vendas} vendas){comparacao}")
+        anterior = valor
+    linhas.append("")
+
+    # Série diária (últimos dias do período)
+    linhas.append("SÉRIE DIÁRIA:")
+    linhas.append("-"*50)
+    for dia, vendas, valor, _ in serie.serie(max(de, ate - DIAS_SERIE + 1), ate):
+        linhas.append(f"{texto_data(dia):<10} R$ {valor:>12,.2f}  ({vendas} vendas)")
+    linhas.append("")
+    return linhas
+
+
+def titulo_cruzamento(dimensoes):
+    return "MELHORES " + " × ".join(NOMES_DIMENSOES[d] for d in dimensoes)
+
+
+def partes_relatorio(metricas, secoes, cruzamentos=(), top=10,
+                     periodo=(None, None), periodos=()):
+    """Seções do relatório, em ordem: (nome, assinatura, gerar)
+
+    A assinatura resume os dados da seção; gerar() devolve suas linhas.
+    O rodapé (com a hora) fica fora: é carimbado a cada exibição.
+    Parâmetros como em montar_relatorio.
+    """
+    total_vendas, valor_total, ticket_medio = metricas
+    vendedores = secoes['vendedor'].ordenado()
+    produtos = secoes['produto'].top(5)
+    regioes = secoes['regiao'].ordenado()
+
+    partes = [
+        ('cabecalho', periodo, lambda: linhas_cabecalho(periodo)),
+        ('metricas', metricas, lambda: linhas_metricas(metricas)),
+        ('vendedor', (valor_total, vendedores),
+         lambda: linhas_participacao("VENDAS POR VENDEDOR:", vendedores, valor_total)),
+        ('produto', produtos, lambda: linhas_produtos(produtos)),
+        ('regiao', (valor_total, regioes),
+         lambda: linhas_participacao("VENDAS POR REGIÃO:", regioes, valor_total)),
+    ]
+    # Cruzamentos (ex.: vendedor × região)
+    for cruzamento in cruzamentos:
+        melhores = cruzamento.top(top)
+        partes.append((titulo_cruzamento(cruzamento.dimensoes), melhores,
+                       lambda d=cruzamento.dimensoes, m=melhores: linhas_cruzamento(d, m)))
+    partes.append(('periodos', tuple(periodos), lambda: list(periodos)))
+    return partes
+
+
+def linhas_cabecalho(periodo):
+    return ["="*70, "RELATÓRIO DE VENDAS", "PERÍODO: " + texto_periodo(*periodo), "="*70, ""]
+
+
+def linhas_metricas(metricas):
+    total_vendas, valor_total, ticket_medio = metricas
+    return [
+        "MÉTRICAS PRINCIPAIS:",
+        "-"*50,
+        f"Vendas Totais:    R$ {valor_total:>12,.2f}",
+        f"Total de Vendas:  {total_vendas:>12}",
+        f"Ticket Médio:     R$ {ticket_medio:>12,.2f}",
+        "",
+    ]
+
+
+def linhas_participacao(titulo, grupos, valor_total):
+    """Grupos com o percentual de cada um no valor total (vendedor, região)"""
+    linhas = [titulo, "-"*50]
+    for nome, _, valor, _ in grupos:
+        percentual = (valor / valor_total) * 100 if valor_total else 0
+        linhas.append(f"{nome:<20} R$ {valor:>12,.2f}  ({percentual:.1f}%)")
+    linhas.append("")
+    return linhas
+
+
+def linhas_produtos(produtos):
+    linhas = ["PRODUTOS MAIS VENDIDOS:", "-"*50]
+    for i, (prod, _, valor, _) in enumerate(produtos, 1):
+        linhas.append(f"{i}. {prod:<20} R$ {valor:>12,.2f}")
+    linhas.append("")
+    return linhas
+
+
+def linhas_cruzamento(dimensoes, melhores):
+    linhas = [titulo_cruzamento(dimensoes) + ":", "-"*50]
+    for i, (chave, qtd, valor, _) in enumerate(melhores, 1):
+        if not isinstance(chave, tuple):
+            chave = (chave,)
+        nomes = " ".join(f"{str(parte):<15}" for parte in chave)
+        linhas.append(f"{i:>2}. {nomes} R$ {valor:>12,.2f}  ({qtd} vendas)")
+    linhas.append("")
+    return linhas
+
+
+def linhas_rodape(gerado_em=None):
+    carimbo = (gerado_em or datetime.now()).strftime("%d/%m/%Y %H:%M")
+    return ["="*70, "RELATÓRIO GERADO EM: " + carimbo, "="*70]
+
+
+def montar_relatorio(metricas, secoes, cruzamentos=(), top=10, gerado_em=None,
+                     periodo=(None, None), periodos=()):
+    """Texto completo do relatório
+
+    cruzamentos: sequência de Agrupamento com duas ou mais dimensões,
+    listados com os 'top' grupos de maior valor.
+    periodo: (de, ate) em ordinais, exibido no cabeçalho.
+    periodos: linhas já montadas por montar_periodos.
+    """
+    documento = DocumentoRelatorio()
+    documento.montar(partes_relatorio(metricas, secoes, cruzamentos, top, periodo, periodos))
+    return documento.texto(gerado_em)
+
+
+# ============ DOCUMENTOS EM CACHE ============
+
+class DocumentoRelatorio:
+    """Relatório pronto, guardado seção a seção para remontar só o que mudou"""
+
+    def __init__(self, parametros=None, versao=None, quantidade=0, agrupamentos=(), secoes=None):
+        self.parametros = parametros
+        self.versao = versao                # versão dos agregados de onde saiu
+        self.quantidade = quantidade        # vendas no armazenamento nessa versão
+        self.agrupamentos = agrupamentos    # calculados sobre essas vendas
+        self.secoes = dict(secoes or {})    # nome -> (assinatura, linhas)
+        self.remontadas = []                # seções geradas de novo na última montagem
+        self.corpo = ''                     # texto sem o rodapé
+
+    def montar(self, partes):
+        """Gerar as seções cuja assinatura mudou e juntar o corpo do texto"""
+        secoes = {}
+        linhas = []
+        self.remontadas = []
+        for nome, assinatura, gerar in partes:
+            anterior = self.secoes.get(nome)
+            if anterior is not None and anterior[0] == assinatura:
+                trecho = anterior[1]
+            else:
+                trecho = gerar()
+                self.remontadas.append(nome)
+            secoes[nome] = (assinatura, trecho)
+            linhas.extend(trecho)
+        self.secoes = secoes
+        self.corpo = "\n".join(linhas) + "\n"
+        return self.corpo
+
+    def texto(self, gerado_em=None):
+        """Texto completo, com o rodapé carimbado agora (ou em 'gerado_em')"""
+        return self.corpo + "\n".join(linhas_rodape(gerado_em)) + "\n"
+
+    def derivar(self, versao, quantidade, agrupamentos):
+        """Documento de uma versão mais nova que reaproveita as seções deste"""
+        return DocumentoRelatorio(self.parametros, versao, quantidade, agrupamentos, self.secoes)
+
+
+class CacheRelatorios:
+    """Relatórios prontos por (versão dos dados, parâmetros), com descarte LRU"""
+
+    def __init__(self, limite=LIMITE_CACHE):
+        self.limite = limite
+        self._documentos = OrderedDict()
+
+    def __len__(self):
+        return len(self._documentos)
+
+    def obter(self, versao, parametros):
+        """Documento da versão e parâmetros exatos, ou None"""
+        documento = self._documentos.get((versao, parametros))
+        if documento is not None:
+            self._documentos.move_to_end((versao, parametros))
+        return documento
+
+    def base(self, agregados, parametros, limite=LIMITE_INCREMENTAL):
+        """Documento anterior com os mesmos parâmetros que só precisa das vendas acrescentadas"""
+        for (versao, outros), documento in reversed(self._documentos.items()):
+            if (outros == parametros and agregados.so_acrescimos_desde(versao)
+                    and 0 <= agregados.quantidade - documento.quantidade <= limite):
+                return documento
+        return None
+
+    def guardar(self, documento):
+        # Versões anteriores com os mesmos parâmetros não serão mais pedidas
+        for chave in [chave for chave in self._documentos if chave[1] == documento.parametros]:
+            del self._documentos[chave]
+        self._documentos[(documento.versao, documento.parametros)] = documento
+        while len(self._documentos) > self.limite:
+            self._documentos.popitem(last=False)
+
+    def limpar(self):
+        self._documentos.clear()
+
+
+def somar_vendas_novas(agrupamentos, vendas, de=None, ate=None):
+    """Agrupamentos de um documento anterior acrescidos das vendas novas (só as do período)"""
+    if de is not None or ate is not None:
+        vendas = [venda for venda in vendas if dentro_periodo(ordinal_data(venda['data']), de, ate)]
+    return [somar_agrupamentos(agrupamento, agrupar_vendas(vendas, agrupamento.dimensoes))
+            for agrupamento in agrupamentos]
+
+
+def relatorio_vendas(vendas, agrupar=(('vendedor', 'regiao'),), top=10, de=None, ate=None):
+    """API sem interface: relatório completo de um VendasColunares
+
+    Com 'de'/'ate' (ordinais) só entram as vendas desse período.
+    """
+    # A série usa o histórico inteiro: o período anterior entra nas comparações
+    serie = SerieDiaria()
+    serie.carregar((ordinal_data(dia), q, v, u)
+                   for dia, q, v, u in agrupar_colunas(vendas, 'data').linhas())
+    if de is not None or ate is not None:
+        vendas = vendas.periodo(de, ate)
+
+    agregados = Agregados()
+    agregados.carregar_colunas(vendas)
+    metricas, secoes = dados_relatorio(agregados)
+    cruzamentos = [agrupar_colunas(vendas, normalizar_dimensoes(d)) for d in agrupar]
+    return montar_relatorio(metricas, secoes, cruzamentos, top=top, periodo=(de, ate),
+                            periodos=montar_periodos(serie, de, ate))
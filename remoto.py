@@ -0,0 +1,252 @@
+"""
+CLIENTE DO SERVIDOR DE VENDAS
+Armazenamento que delega ao servidor local (servidor.py): vendas
+confirmadas após o commit em lote, páginas e consultas buscadas sob
+demanda e totais atualizados pelos avisos do servidor
+"""
+
+import itertools
+import json
+import socket
+import threading
+from collections.abc import Sequence
+
+from agregados import Agregados
+from agrupamento import normalizar_dimensoes
+from armazenamento import Armazenamento, Foto
+from filtros import Filtro
+from servidor import HOST, PORTA_PADRAO, aplicar_estado, ler_agrupamento
+
+TEMPO_LIMITE = 30.0
+TAMANHO_FOTO = 5000
+
+
+class ErroServidor(OSError):
+    """Falha de comunicação ou erro informado pelo servidor"""
+
+
+class ConexaoServidor:
+    """Conexão com o servidor, segura para uso por várias threads
+
+    As respostas são casadas aos pedidos pelo 'id'; os avisos do servidor
+    vão para ao_aviso(mensagem), chamado na thread de leitura.
+    """
+
+    def __init__(self, host=HOST, porta=PORTA_PADRAO, ao_aviso=None, tempo_limite=TEMPO_LIMITE):
+        self.tempo_limite = tempo_limite
+        self.ao_aviso = ao_aviso
+        self.socket = socket.create_connection((host, porta), timeout=tempo_limite)
+        self.socket.settimeout(None)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.aberta = True
+        self._numeros = itertools.count(1)
+        self._pendentes = {}            # id -> [evento, resposta]
+        self._lock_envio = threading.Lock()
+        self._leitura = threading.Thread(target=self._ler, daemon=True)
+        self._leitura.start()
+
+    def pedir(self, operacao, **dados):
+        """Enviar um pedido e aguardar a resposta (ErroServidor se falhar)"""
+        if not self.aberta:
+            raise ErroServidor("Conexão com o servidor encerrada")
+        numero = next(self._numeros)
+        espera = self._pendentes[numero] = [threading.Event(), None]
+        dados.update(op=operacao, id=numero)
+        linha = (json.dumps(dados, ensure_ascii=False) + '\n').encode()
+        try:
+            with self._lock_envio:
+                self.socket.sendall(linha)
+            if not espera[0].wait(self.tempo_limite):
+                raise ErroServidor(f"O servidor não respondeu ({operacao})")
+        finally:
+            self._pendentes.pop(numero, None)
+
+        resposta = espera[1]
+        if resposta is None:
+            raise ErroServidor("Conexão com o servidor encerrada")
+        if 'erro' in resposta:
+            raise ErroServidor(resposta['erro'])
+        return resposta
+
+    def _ler(self):
+        try:
+            with self.socket.makefile('rb') as arquivo:
+                for linha in arquivo:
+                    mensagem = json.loads(linha)
+                    if 'evento' in mensagem:
+                        if self.ao_aviso is not None:
+                            self.ao_aviso(mensagem)
+                        continue
+                    espera = self._pendentes.get(mensagem.get('id'))
+                    if espera is not None:
+                        espera[1] = mensagem
+                        espera[0].set()
+        except (OSError, ValueError):
+            pass
+        finally:
+            # Acordar quem espera: a resposta None vira ErroServidor
+            self.aberta = False
+            for espera in list(self._pendentes.values()):
+                espera[0].set()
+
+    def fechar(self):
+        self.aberta = False
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+class VendasRemotas(Sequence):
+    """Vendas do servidor (todas ou o resultado de uma consulta), buscadas por páginas"""
+
+    TAMANHO_PAGINA = 500
+
+    def __init__(self, armazenamento, consulta=None, quantidade=None):
+        self._armazenamento = armazenamento
+        self.consulta = consulta
+        self.quantidade = quantidade        # None = todas as vendas (tamanho atual)
+        # (início, linhas) trocados juntos: avisos invalidam a página de outra thread
+        self._pagina = (None, [])
+
+    def __len__(self):
+        if self.quantidade is None:
+            return self._armazenamento.contar()
+        return self.quantidade
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fim, passo = indice.indices(len(self))
+            if passo != 1:
+                return [self[i] for i in range(inicio, fim, passo)]
+            return self._armazenamento.pagina(inicio, max(0, fim - inicio), self.consulta)
+
+        tamanho = len(self)
+        if indice < 0:
+            indice += tamanho
+        if not 0 <= indice < tamanho:
+            raise IndexError('índice de venda fora do intervalo')
+
+        inicio = indice - indice % self.TAMANHO_PAGINA
+        inicio_cache, linhas = self._pagina
+        if inicio != inicio_cache:
+            linhas = self._armazenamento.pagina(inicio, self.TAMANHO_PAGINA, self.consulta)
+            self._pagina = (inicio, linhas)
+        if indice - inicio >= len(linhas):
+            raise IndexError('índice de venda fora do intervalo')
+        return linhas[indice - inicio]
+
+    def invalidar(self):
+        """Descartar a página em cache após alterações"""
+        self._pagina = (None, [])
+
+
+class ArmazenamentoRemoto(Armazenamento):
+    """Vendas guardadas pelo servidor de vendas; este processo é um dos caixas
+
+    Os totais chegam prontos nos avisos do servidor e são trocados por
+    inteiro, então a interface nunca lê uma atualização pela metade.
+    """
+
+    # Vendas de outros caixas se intercalam às deste antes do próximo aviso
+    acrescimos_no_fim = False
+
+    def __init__(self, host=HOST, porta=PORTA_PADRAO):
+        self.host = host
+        self.porta = porta
+        self.conexao = None
+        self.vendas = VendasRemotas(self)
+        self.agregados = Agregados()
+        self._alterado = False
+        # Avisos chegam na thread de leitura: a cópia não pode ler agregados em alteração
+        self._lock_totais = threading.Lock()
+
+    def abrir(self):
+        self.conexao = ConexaoServidor(self.host, self.porta, ao_aviso=self._receber_aviso)
+        self._aplicar_totais(self.conexao.pedir('inscrever'))
+        self._alterado = False
+
+    def _receber_aviso(self, mensagem):
+        if mensagem['evento'] == 'totais':
+            self._aplicar_totais(mensagem)
+            self._alterado = True
+
+    def _aplicar_totais(self, estado):
+        # Avisos parciais trazem só os grupos alterados, aplicados sobre uma cópia
+        with self._lock_totais:
+            self.agregados = aplicar_estado(self.agregados, estado)
+        self.vendas.invalidar()
+
+    def alteracoes_externas(self):
+        alterado, self._alterado = self._alterado, False
+        return alterado
+
+    def adicionar_lote(self, vendas):
+        vendas = [dict(venda) for venda in vendas]
+        if not vendas:
+            return
+        # A resposta só chega depois do commit no servidor
+        self.conexao.pedir('lote', vendas=vendas)
+        # Antecipar os totais; o próximo aviso traz os definitivos, com as vendas dos outros caixas
+        with self._lock_totais:
+            self.agregados.adicionar_lote(vendas)
+        self.vendas.invalidar()
+
+    def limpar(self):
+        self.conexao.pedir('limpar')
+        self.agregados = Agregados()
+        self.vendas.invalidar()
+
+    def contar(self):
+        return self.agregados.quantidade
+
+    def pagina(self, inicio, limite, consulta=None):
+        return self.conexao.pedir('pagina', inicio=inicio, limite=limite, consulta=consulta)['vendas']
+
+    def agrupar(self, dimensoes):
+        return agrupar_remoto(self.conexao, [dimensoes])[0]
+
+    def filtrar(self, filtro, ordem=None):
+        if filtro.vazio and ordem is None:
+            return self.vendas
+        resposta = self.conexao.pedir('consultar', filtro=dados_filtro(filtro), ordem=ordem)
+        return VendasRemotas(self, resposta['consulta'], resposta['quantidade'])
+
+    def foto(self, de=None, ate=None):
+        # Consulta fixa no servidor: não expira enquanto a exportação lê as páginas
+        filtro = Filtro(de=de, ate=ate)
+        ordem = None if filtro.vazio else ('data', False)
+        resposta = self.conexao.pedir('consultar', filtro=dados_filtro(filtro), ordem=ordem, fixa=True)
+        numero, quantidade = resposta['consulta'], resposta['quantidade']
+
+        def iterar():
+            try:
+                for inicio in range(0, quantidade, TAMANHO_FOTO):
+                    yield from self.pagina(inicio, TAMANHO_FOTO, numero)
+            finally:
+                try:
+                    self.conexao.pedir('liberar', consulta=numero)
+                except (ErroServidor, AttributeError):
+                    pass        # conexão já encerrada
+
+        return Foto(quantidade, iterar)
+
+    def preparar_agrupamentos(self, lista_dimensoes, de=None, ate=None):
+        return agrupar_remoto, (self.conexao, lista_dimensoes, de, ate), False
+
+    def fechar(self):
+        if self.conexao is not None:
+            self.conexao.fechar()
+            self.conexao = None
+
+
+def dados_filtro(filtro):
+    return {campo: getattr(filtro, campo) for campo in Filtro.__slots__}
+
+
+def agrupar_remoto(conexao, lista_dimensoes, de=None, ate=None):
+    """Agrupamentos calculados pelo servidor (pode rodar em outra thread)"""
+    resposta = conexao.pedir('agrupar', de=de, ate=ate,
+                             dimensoes=[list(normalizar_dimensoes(d)) for d in lista_dimensoes])
+    return [ler_agrupamento(dados) for dados in resposta['agrupamentos']]
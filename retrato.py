@@ -0,0 +1,132 @@
+"""
+RETRATO BINÁRIO DAS VENDAS
+Cópia colunar das vendas em formato binário (tabela de strings por
+dicionário + colunas de tamanho fixo, com CRC32), gravada ao fechar e após
+a compactação do diário e lida via mmap na abertura: o diário só precisa
+ser reproduzido a partir do ponto em que o retrato foi tirado
+"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from vendas_colunares import COLUNAS_CATEGORIA, DicionarioDatas, Dicionario, VendasColunares
+
+MAGIA = b'VENDRET\x00'
+VERSAO_RETRATO = 1
+
+# magia, versão, ordem dos bytes, vendas, geração do diário, deslocamento e registros
+# do diário no momento do retrato e tamanho do corpo; depois, o CRC32 (cabeçalho + corpo)
+CABECALHO = struct.Struct('<8sIcxxxQ32sQQQ')
+CRC = struct.Struct('<I4x')
+INICIO_CORPO = CABECALHO.size + CRC.size
+COLUNAS_NUMERICAS = (('quantidade', 'q'), ('preco', 'd'), ('total', 'd'))
+
+
+class Retrato:
+    """Vendas lidas do retrato e o ponto do diário a que correspondem"""
+
+    def __init__(self, vendas, geracao, deslocamento, registros):
+        self.vendas = vendas
+        self.geracao = geracao
+        self.deslocamento = deslocamento    # bytes do diário já contidos no retrato
+        self.registros = registros          # registros do diário até 'deslocamento'
+
+
+def secoes_colunares(vendas, quantidade):
+    """Blocos do corpo, na ordem de gravação: tabelas de strings e colunas"""
+    # Colunas primeiro: valores anexados aos dicionários depois disso não são referenciados
+    colunas = [vendas.codigos[campo][:quantidade] for campo in COLUNAS_CATEGORIA]
+    colunas += [getattr(vendas, campo)[:quantidade] for campo, _ in COLUNAS_NUMERICAS]
+
+    for campo in COLUNAS_CATEGORIA:
+        valores = [valor.encode('utf-8') for valor in list(vendas.dicionarios[campo].valores)]
+        yield array('I', [len(valores)]).tobytes()
+        yield array('I', map(len, valores)).tobytes()
+        yield b''.join(valores)
+    for coluna in colunas:
+        yield memoryview(coluna).cast('B')
+
+
+def gravar_retrato(caminho, vendas, geracao, deslocamento, registros, quantidade=None):
+    """Gravar (de forma atômica) as 'quantidade' primeiras vendas de um VendasColunares"""
+    if quantidade is None:
+        quantidade = len(vendas)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(bytes(INICIO_CORPO))
+        crc = 0
+        tamanho = 0
+        for secao in secoes_colunares(vendas, quantidade):
+            f.write(secao)
+            crc = zlib.crc32(secao, crc)
+            tamanho += len(secao)
+
+        cabecalho = CABECALHO.pack(MAGIA, VERSAO_RETRATO, sys.byteorder[0].encode(), quantidade,
+                                   (geracao or '').encode('ascii'), deslocamento, registros, tamanho)
+        f.seek(0)
+        f.write(cabecalho + CRC.pack(zlib.crc32(cabecalho, crc)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def ler_retrato(caminho):
+    """Retrato gravado em 'caminho' (None se não existir, for de outra versão ou estiver corrompido)"""
+    try:
+        with open(caminho, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < INICIO_CORPO:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                return _decodificar(mapa)
+    except (OSError, ValueError, UnicodeDecodeError, struct.error):
+        return None
+
+
+def _decodificar(mapa):
+    magia, versao, ordem, quantidade, geracao, deslocamento, registros, tamanho = \
+        CABECALHO.unpack_from(mapa, 0)
+    if magia != MAGIA or versao != VERSAO_RETRATO or len(mapa) != INICIO_CORPO + tamanho:
+        return None
+    # Visões sobre o mmap precisam ser liberadas antes de fechá-lo
+    with memoryview(mapa) as tudo, tudo[INICIO_CORPO:] as corpo:
+        (crc,) = CRC.unpack_from(mapa, CABECALHO.size)
+        if zlib.crc32(tudo[:CABECALHO.size], zlib.crc32(corpo)) != crc:
+            return None
+        vendas = ler_colunas(corpo, quantidade, ordem != sys.byteorder[0].encode())
+    return Retrato(vendas, geracao.rstrip(b'\x00').decode('ascii') or None, deslocamento, registros)
+
+
+def ler_colunas(corpo, quantidade, trocar_bytes=False):
+    """VendasColunares a partir de um corpo gravado por secoes_colunares"""
+    def ler(tipo, inicio, itens):
+        # Uma cópia de memória por coluna: sem converter campo a campo
+        coluna = array(tipo)
+        fim = inicio + itens * coluna.itemsize
+        if fim > len(corpo):
+            raise ValueError('retrato truncado')
+        with corpo[inicio:fim] as trecho:
+            coluna.frombytes(trecho)
+        if trocar_bytes:
+            coluna.byteswap()
+        return coluna, fim
+
+    vendas = VendasColunares()
+    posicao = 0
+    for campo in COLUNAS_CATEGORIA:
+        (total_valores,), posicao = ler('I', posicao, 1)
+        tamanhos, posicao = ler('I', posicao, total_valores)
+        dicionario = DicionarioDatas() if campo == 'data' else Dicionario()
+        for tamanho_valor in tamanhos:
+            dicionario.codificar(str(corpo[posicao:posicao + tamanho_valor], 'utf-8'))
+            posicao += tamanho_valor
+        vendas.dicionarios[campo] = dicionario
+    for campo in COLUNAS_CATEGORIA:
+        vendas.codigos[campo], posicao = ler('I', posicao, quantidade)
+    for campo, tipo in COLUNAS_NUMERICAS:
+        coluna, posicao = ler(tipo, posicao, quantidade)
+        setattr(vendas, campo, coluna)
+    return vendas
@@ -0,0 +1,204 @@
+"""
+SÉRIE TEMPORAL DE VENDAS
+Totais por dia em ordem cronológica com somas de prefixo (árvore de
+Fenwick): total de um período em O(log N) e agregação por dia, semana e mês
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+from functools import lru_cache
+
+PASSOS = ('dia', 'semana', 'mes')
+
+
+@lru_cache(maxsize=4096)
+def ordinal_data(texto):
+    """'dd/mm/YYYY' -> date.toordinal() (0 se inválida)"""
+    try:
+        return datetime.strptime(texto, '%d/%m/%Y').toordinal()
+    except (ValueError, TypeError):
+        return 0
+
+
+def texto_data(ordinal):
+    """date.toordinal() -> 'dd/mm/YYYY'"""
+    return date.fromordinal(ordinal).strftime('%d/%m/%Y')
+
+
+def iso_data(ordinal):
+    """date.toordinal() -> 'YYYY-MM-DD' (formato da coluna data_iso do SQLite)"""
+    return date.fromordinal(ordinal).isoformat()
+
+
+def dentro_periodo(ordinal, de=None, ate=None):
+    """O dia está em [de, ate]? Datas inválidas nunca estão"""
+    return ordinal > 0 and (de is None or ordinal >= de) and (ate is None or ordinal <= ate)
+
+
+def inicio_balde(ordinal, passo):
+    """Primeiro dia do dia/semana (segunda-feira)/mês que contém 'ordinal'"""
+    if passo == 'dia':
+        return ordinal
+    dia = date.fromordinal(ordinal)
+    if passo == 'semana':
+        return ordinal - dia.weekday()
+    if passo == 'mes':
+        return dia.replace(day=1).toordinal()
+    raise ValueError(f"Passo desconhecido: {passo}")
+
+
+def proximo_balde(inicio, passo):
+    """Primeiro dia do balde seguinte"""
+    if passo == 'dia':
+        return inicio + 1
+    if passo == 'semana':
+        return inicio + 7
+    dia = date.fromordinal(inicio)
+    if dia.month == 12:
+        return date(dia.year + 1, 1, 1).toordinal()
+    return date(dia.year, dia.month + 1, 1).toordinal()
+
+
+class Fenwick:
+    """Árvore de Fenwick com três somas: vendas, valor e unidades"""
+
+    __slots__ = ('tamanho', 'vendas', 'valor', 'unidades')
+
+    def __init__(self, linhas):
+        """Montagem em O(n) a partir de (vendas, valor, unidades) em ordem"""
+        self.tamanho = n = len(linhas)
+        self.vendas = [0] * (n + 1)
+        self.valor = [0.0] * (n + 1)
+        self.unidades = [0] * (n + 1)
+        for i, (vendas, valor, unidades) in enumerate(linhas, 1):
+            self.vendas[i] += vendas
+            self.valor[i] += valor
+            self.unidades[i] += unidades
+            pai = i + (i & -i)
+            if pai <= n:
+                self.vendas[pai] += self.vendas[i]
+                self.valor[pai] += self.valor[i]
+                self.unidades[pai] += self.unidades[i]
+
+    def somar(self, posicao, vendas, valor, unidades):
+        i = posicao + 1
+        while i <= self.tamanho:
+            self.vendas[i] += vendas
+            self.valor[i] += valor
+            self.unidades[i] += unidades
+            i += i & -i
+
+    def prefixo(self, fim):
+        """Somas das posições [0, fim)"""
+        vendas, valor, unidades = 0, 0.0, 0
+        i = fim
+        while i > 0:
+            vendas += self.vendas[i]
+            valor += self.valor[i]
+            unidades += self.unidades[i]
+            i -= i & -i
+        return vendas, valor, unidades
+
+
+class SerieDiaria:
+    """Totais (vendas, valor, unidades) por dia, consultáveis por período
+
+    Dias novos só marcam a árvore para reconstrução (feita na próxima
+    consulta); vendas em dias já conhecidos atualizam a árvore em O(log N).
+    """
+
+    def __init__(self):
+        self.dias = []              # ordinais em ordem crescente
+        self._totais = {}           # ordinal -> [vendas, valor, unidades]
+        self._arvore = None
+
+    def __len__(self):
+        return len(self.dias)
+
+    @property
+    def primeiro(self):
+        return self.dias[0] if self.dias else None
+
+    @property
+    def ultimo(self):
+        return self.dias[-1] if self.dias else None
+
+    # ============ ATUALIZAÇÃO ============
+
+    def adicionar(self, dia, vendas, valor, unidades):
+        """Somar aos totais do dia (valores negativos retiram)"""
+        if dia <= 0:
+            return
+        totais = self._totais.get(dia)
+        if totais is None:
+            self._totais[dia] = [vendas, valor, unidades]
+            insort(self.dias, dia)
+            self._arvore = None
+            return
+        totais[0] += vendas
+        totais[1] += valor
+        totais[2] += unidades
+        if self._arvore is not None:
+            self._arvore.somar(bisect_left(self.dias, dia), vendas, valor, unidades)
+
+    def carregar(self, linhas):
+        """Substituir tudo por linhas de (ordinal, vendas, valor, unidades)"""
+        self._totais = {}
+        for dia, vendas, valor, unidades in linhas:
+            if dia <= 0:
+                continue
+            totais = self._totais.setdefault(dia, [0, 0.0, 0])
+            totais[0] += vendas
+            totais[1] += valor
+            totais[2] += unidades
+        self.dias = sorted(self._totais)
+        self._arvore = None
+
+    def _fenwick(self):
+        if self._arvore is None:
+            self._arvore = Fenwick([self._totais[dia] for dia in self.dias])
+        return self._arvore
+
+    # ============ CONSULTA ============
+
+    def periodo(self, de=None, ate=None):
+        """(vendas, valor, unidades) dos dias em [de, ate]"""
+        inicio = 0 if de is None else bisect_left(self.dias, de)
+        fim = len(self.dias) if ate is None else bisect_right(self.dias, ate)
+        if fim <= inicio:
+            return 0, 0.0, 0
+        arvore = self._fenwick()
+        v1, t1, u1 = arvore.prefixo(fim)
+        v0, t0, u0 = arvore.prefixo(inicio)
+        return v1 - v0, t1 - t0, u1 - u0
+
+    def serie(self, de=None, ate=None, passo='dia'):
+        """[(início do balde, vendas, valor, unidades)] de 'de' a 'ate', incluindo baldes vazios"""
+        if not self.dias:
+            return []
+        de = self.dias[0] if de is None else de
+        ate = self.dias[-1] if ate is None else ate
+        linhas = []
+        inicio = inicio_balde(de, passo)
+        while inicio <= ate:
+            proximo = proximo_balde(inicio, passo)
+            linhas.append((inicio,) + self.periodo(max(inicio, de), min(proximo - 1, ate)))
+            inicio = proximo
+        return linhas
+
+    def valores_diarios(self, de=None, ate=None):
+        """(dias, valores) de cada dia em [de, ate], com zero nos dias sem vendas (O(dias))"""
+        if not self.dias:
+            return [], []
+        de = self.dias[0] if de is None else de
+        ate = self.dias[-1] if ate is None else ate
+        dias = list(range(de, ate + 1))
+        vazio = (0, 0.0, 0)
+        return dias, [self._totais.get(dia, vazio)[1] for dia in dias]
+
+    def ultimos_dias(self, n=30, referencia=None):
+        """(de, ate) dos n dias terminados em 'referencia' (padrão: último dia com vendas)"""
+        ate = self.ultimo if referencia is None else referencia
+        if ate is None:
+            return None, None
+        return ate - n + 1, ate
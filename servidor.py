@@ -0,0 +1,637 @@
+"""
+SERVIDOR DE VENDAS
+Modo multi-caixa opcional: um processo dono do armazenamento recebe vendas
+de vários clientes pela interface de loopback (uma mensagem JSON por linha),
+grava em lotes (um único commit para as vendas que chegaram juntas) e envia
+os totais atualizados aos clientes inscritos
+
+Exemplos:
+    python servidor.py --armazenamento sqlite
+    VENDAS_ARMAZENAMENTO=remoto python portfolio.py
+    python servidor.py --simular 32 --vendas 1000
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from agregados import DIMENSOES, Agregados
+from agrupamento import Agrupamento
+from armazenamento import ArmazenamentoCSV, ArmazenamentoSQLite, criar_armazenamento
+from filtros import Filtro
+from importador import conferir_numeros
+from vendas_colunares import CAMPOS
+
+HOST = '127.0.0.1'
+PORTA_PADRAO = 8765
+
+# Janela para juntar no mesmo commit as vendas de vários clientes
+ESPERA_LOTE = 0.002
+LOTE_MAXIMO = 10000
+
+# Totais enviados aos inscritos no máximo a cada INTERVALO_AVISO segundos
+INTERVALO_AVISO = 0.1
+# Cliente com mais que isto pendente de envio só recebe o aviso seguinte
+LIMITE_BUFFER = 1 << 20
+
+# Diferença aceita entre o total recebido e quantidade × preço (arredondamento)
+TOLERANCIA_TOTAL = 0.005
+
+LIMITE_LINHA = 64 << 20
+CONSULTAS_POR_CLIENTE = 8
+
+
+# ============ PROTOCOLO ============
+
+def validar_venda(dados):
+    """Venda recebida de um cliente, com os tipos do armazenamento (ValueError se inválida)"""
+    if not isinstance(dados, dict):
+        raise ValueError("Venda deve ser um objeto JSON")
+    faltando = [campo for campo in CAMPOS if campo not in dados]
+    if faltando:
+        raise ValueError(f"Campos ausentes: {', '.join(faltando)}")
+    venda = {campo: dados[campo] for campo in CAMPOS}
+    numeros = [venda[campo] for campo in ('quantidade', 'preco', 'total')]
+    if not all(isinstance(numero, (int, float)) and not isinstance(numero, bool) for numero in numeros):
+        raise ValueError("Quantidade, preço e total devem ser números")
+    # Mesmas regras da importação: finitos e quantidade inteira
+    venda['quantidade'], venda['preco'], venda['total'] = conferir_numeros(*numeros)
+    if abs(venda['total'] - venda['quantidade'] * venda['preco']) > TOLERANCIA_TOTAL:
+        raise ValueError("Total diferente de quantidade × preço")
+    for campo in ('data', 'vendedor', 'produto', 'regiao'):
+        if not isinstance(venda[campo], str):
+            raise ValueError(f"Campo '{campo}' deve ser texto")
+    return venda
+
+
+def estado_agregados(agregados):
+    """Totais correntes em formato JSON (geral e por dimensão)"""
+    geral = agregados.geral
+    return {
+        'quantidade': geral.quantidade,
+        'valor': geral.valor,
+        'unidades': geral.unidades,
+        'grupos': {dimensao: [[chave, g.quantidade, g.valor, g.unidades] for chave, g in grupos.items()]
+                   for dimensao, grupos in agregados.grupos.items()},
+    }
+
+
+def estado_alterado(agregados, chaves):
+    """Totais gerais e só os grupos em 'chaves' ((dimensão, chave)), para um aviso parcial"""
+    geral = agregados.geral
+    grupos = {}
+    for dimensao, chave in chaves:
+        g = agregados.grupo(dimensao, chave)
+        grupos.setdefault(dimensao, []).append([chave, g.quantidade, g.valor, g.unidades])
+    return {
+        'quantidade': geral.quantidade,
+        'valor': geral.valor,
+        'unidades': geral.unidades,
+        'grupos': grupos,
+        'parcial': True,
+    }
+
+
+def chaves_alteradas(vendas):
+    """(dimensão, chave) dos grupos que as vendas alteram"""
+    return {(dimensao, venda[dimensao]) for venda in vendas for dimensao in DIMENSOES}
+
+
+def carregar_estado(agregados, estado):
+    """Substituir os totais de 'agregados' pelos recebidos do servidor"""
+    agregados.limpar()
+    agregados.definir_geral(estado['quantidade'], estado['valor'], estado['unidades'])
+    for dimensao, linhas in estado['grupos'].items():
+        agregados.definir_grupos(dimensao, linhas)
+
+
+def aplicar_estado(agregados, estado):
+    """Novos Agregados: 'agregados' com o aviso do servidor aplicado (completo ou parcial)"""
+    novos = Agregados()
+    if not estado.get('parcial'):
+        carregar_estado(novos, estado)
+        return novos
+    novos.definir_geral(estado['quantidade'], estado['valor'], estado['unidades'])
+    for dimensao, grupos in agregados.grupos.items():
+        linhas = {chave: (g.quantidade, g.valor, g.unidades) for chave, g in grupos.items()}
+        for chave, quantidade, valor, unidades in estado['grupos'].get(dimensao, ()):
+            if quantidade > 0:
+                linhas[chave] = (quantidade, valor, unidades)
+            else:
+                linhas.pop(chave, None)
+        novos.definir_grupos(dimensao, [(chave,) + linha for chave, linha in linhas.items()])
+    return novos
+
+
+def agrupamento_json(agrupamento):
+    return {
+        'dimensoes': list(agrupamento.dimensoes),
+        'linhas': [[list(chave), int(q), float(v), int(u)] for chave, q, v, u in zip(
+            agrupamento.chaves, agrupamento.quantidades, agrupamento.valores, agrupamento.unidades)],
+    }
+
+
+def ler_agrupamento(dados):
+    linhas = dados['linhas']
+    return Agrupamento(tuple(dados['dimensoes']), [tuple(linha[0]) for linha in linhas],
+                       [linha[1] for linha in linhas],
+                       [linha[2] for linha in linhas],
+                       [linha[3] for linha in linhas])
+
+
+def ler_filtro(dados):
+    dados = dados or {}
+    return Filtro(dados.get('vendedor') or '', dados.get('produto') or '',
+                  dados.get('regiao') or '', dados.get('de'), dados.get('ate'))
+
+
+# ============ SERVIDOR ============
+
+class Cliente:
+    """Conexão de um caixa: inscrição nos avisos e consultas abertas"""
+
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self.inscrito = False
+        self.versao = None              # versão dos totais do último aviso enviado
+        self.alterados = set()          # (dimensão, chave) alterados desde esse aviso
+        self.completo = False           # próximo aviso precisa dos totais inteiros (ex.: limpeza)
+        self.consultas = OrderedDict()  # número -> (vendas, quantidade, fixa)
+        self._numeros = 0
+
+    def enviar(self, mensagem):
+        self.escrever((json.dumps(mensagem, ensure_ascii=False) + '\n').encode())
+
+    def escrever(self, dados):
+        if not self.escritor.is_closing():
+            self.escritor.write(dados)
+
+    @property
+    def pendente(self):
+        """Bytes aguardando envio (cliente lento acumula)"""
+        return self.escritor.transport.get_write_buffer_size()
+
+    def guardar(self, vendas, quantidade, fixa=False):
+        """Guardar o resultado de uma consulta; as mais antigas não fixas são descartadas"""
+        self._numeros += 1
+        self.consultas[self._numeros] = (vendas, quantidade, fixa)
+        soltas = [numero for numero, consulta in self.consultas.items() if not consulta[2]]
+        for numero in soltas[:-CONSULTAS_POR_CLIENTE]:
+            del self.consultas[numero]
+        return self._numeros
+
+    def consulta(self, numero):
+        try:
+            return self.consultas[numero]
+        except KeyError:
+            raise ValueError(f"Consulta expirada: {numero}")
+
+
+class ServidorVendas:
+    """Dono do armazenamento: atende os caixas e grava as vendas em lotes
+
+    Os commits rodam em uma única thread de gravação, enquanto o loop
+    segue lendo pedidos e juntando o próximo lote; consultas, avisos e a
+    limpeza esperam o commit em curso terminar, então nunca se sobrepõem a
+    ele. Os agrupamentos do relatório usam o retrato preparado pelo
+    armazenamento e rodam no pool de threads.
+    """
+
+    # Operações que não leem nem alteram o armazenamento (não esperam o commit)
+    OPERACOES_SEM_ARMAZENAMENTO = ('venda', 'lote', 'liberar')
+
+    def __init__(self, armazenamento, host=HOST, porta=PORTA_PADRAO, espera_lote=ESPERA_LOTE):
+        self.armazenamento = armazenamento
+        self.host = host
+        self.porta = porta
+        self.espera_lote = espera_lote
+        self.clientes = set()
+        self.commits = 0
+        self.gravadas = 0
+        self._fila = None
+        self._livre = None              # Event: nenhum commit em curso
+        self._gravador = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gravacao')
+        self._servidor = None
+        self._tarefas = []
+        self._operacoes = {
+            'venda': self._op_venda,
+            'lote': self._op_lote,
+            'inscrever': self._op_inscrever,
+            'totais': self._op_totais,
+            'pagina': self._op_pagina,
+            'consultar': self._op_consultar,
+            'liberar': self._op_liberar,
+            'agrupar': self._op_agrupar,
+            'limpar': self._op_limpar,
+            'estatisticas': self._op_estatisticas,
+        }
+
+    # ============ CICLO DE VIDA ============
+
+    async def iniciar(self):
+        self.armazenamento.abrir()
+        self._fila = asyncio.Queue()
+        self._livre = asyncio.Event()
+        self._livre.set()
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.porta,
+                                                    limit=LIMITE_LINHA)
+        # Porta 0: o sistema escolhe uma livre
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+        self._tarefas = [asyncio.create_task(self._gravar()), asyncio.create_task(self._avisar())]
+
+    async def executar(self, ao_iniciar=None):
+        """Atender até ser cancelado (Ctrl+C), gravando as pendências ao sair"""
+        await self.iniciar()
+        if ao_iniciar is not None:
+            ao_iniciar(self.porta)
+        try:
+            await self._servidor.serve_forever()
+        finally:
+            await self.encerrar()
+
+    async def encerrar(self):
+        self._servidor.close()
+        for cliente in list(self.clientes):
+            cliente.escritor.close()
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        # Um commit já iniciado termina na thread de gravação antes do fechamento
+        self._gravador.shutdown(wait=True)
+        while not self._fila.empty():
+            self._gravar_lote([self._fila.get_nowait()])
+        self.armazenamento.fechar()
+
+    # ============ CONEXÕES ============
+
+    async def _atender(self, leitor, escritor):
+        cliente = Cliente(escritor)
+        self.clientes.add(cliente)
+        tarefas = set()
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                # Um pedido por tarefa: o cliente pode mandar vários sem esperar as respostas
+                tarefa = asyncio.create_task(self._responder(cliente, linha))
+                tarefas.add(tarefa)
+                tarefa.add_done_callback(tarefas.discard)
+        except (ConnectionError, ValueError):
+            pass        # conexão caiu ou linha acima de LIMITE_LINHA
+        finally:
+            self.clientes.discard(cliente)
+            escritor.close()
+
+    async def _responder(self, cliente, linha):
+        pedido = {}
+        try:
+            pedido = json.loads(linha)
+            if not isinstance(pedido, dict):
+                raise ValueError("Pedido deve ser um objeto JSON")
+            operacao = self._operacoes.get(pedido.get('op'))
+            if operacao is None:
+                raise ValueError(f"Operação desconhecida: {pedido.get('op')}")
+            if pedido['op'] not in self.OPERACOES_SEM_ARMAZENAMENTO:
+                await self._aguardar_gravacao()
+            resposta = await operacao(cliente, pedido)
+        except Exception as erro:
+            # O erro vai para quem pediu; os demais clientes seguem atendidos
+            resposta = {'erro': str(erro) or type(erro).__name__}
+        resposta['id'] = pedido.get('id') if isinstance(pedido, dict) else None
+        cliente.enviar(resposta)
+
+    # ============ GRAVAÇÃO EM LOTE ============
+
+    async def _gravar(self):
+        """Group commit: as vendas que chegam durante a espera ou um commit entram juntas no próximo"""
+        laco = asyncio.get_running_loop()
+        while True:
+            pendentes = [await self._fila.get()]
+            try:
+                # Também cede a vez às leituras que esperavam o commit anterior
+                await asyncio.sleep(self.espera_lote)
+            except asyncio.CancelledError:
+                self._gravar_lote(pendentes)
+                raise
+            lote = self._juntar(pendentes)
+            self._livre.clear()
+            try:
+                # O loop segue lendo pedidos e enfileirando vendas enquanto o commit roda
+                await laco.run_in_executor(self._gravador, self.armazenamento.adicionar_lote, lote)
+            except Exception as erro:
+                self._confirmar(pendentes, lote, erro)
+            else:
+                self._confirmar(pendentes, lote)
+            finally:
+                self._livre.set()
+
+    async def _aguardar_gravacao(self):
+        """Esperar o commit em curso (o armazenamento está sendo alterado na thread de gravação)"""
+        while not self._livre.is_set():
+            await self._livre.wait()
+
+    def _juntar(self, pendentes):
+        """Completar 'pendentes' com o que está na fila (até LOTE_MAXIMO) e devolver as vendas"""
+        quantidade = len(pendentes[0][0])
+        while quantidade < LOTE_MAXIMO and not self._fila.empty():
+            pendente = self._fila.get_nowait()
+            pendentes.append(pendente)
+            quantidade += len(pendente[0])
+        return [venda for vendas, _ in pendentes for venda in vendas]
+
+    def _confirmar(self, pendentes, lote, erro=None):
+        if erro is not None:
+            for _, futuro in pendentes:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+        self.commits += 1
+        self.gravadas += len(lote)
+        chaves = chaves_alteradas(lote)
+        for cliente in self.clientes:
+            if cliente.inscrito:
+                cliente.alterados |= chaves
+        # Só confirmar depois do commit: a resposta garante que a venda está gravada
+        for _, futuro in pendentes:
+            if not futuro.done():
+                futuro.set_result(None)
+
+    def _gravar_lote(self, pendentes):
+        """Gravar na própria thread do loop (encerramento)"""
+        lote = self._juntar(pendentes)
+        try:
+            self.armazenamento.adicionar_lote(lote)
+        except Exception as erro:
+            self._confirmar(pendentes, lote, erro)
+        else:
+            self._confirmar(pendentes, lote)
+
+    async def _avisar(self):
+        """Enviar aos inscritos os totais que mudaram, no máximo a cada INTERVALO_AVISO
+
+        Cada aviso leva os totais gerais e só os grupos alterados desde o
+        anterior àquele cliente; depois de uma limpeza, os totais inteiros.
+        """
+        while True:
+            await asyncio.sleep(INTERVALO_AVISO)
+            await self._aguardar_gravacao()
+            agregados = self.armazenamento.agregados
+            versao = agregados.versao
+            codificados = {}    # clientes com as mesmas alterações recebem a mesma mensagem
+            for cliente in self.clientes:
+                if not cliente.inscrito or cliente.versao == versao or cliente.pendente > LIMITE_BUFFER:
+                    continue
+                chave = None if cliente.completo else frozenset(cliente.alterados)
+                dados = codificados.get(chave)
+                if dados is None:
+                    if chave is None:
+                        mensagem = estado_agregados(agregados)
+                    else:
+                        mensagem = estado_alterado(agregados, chave)
+                    mensagem['evento'] = 'totais'
+                    dados = codificados[chave] = (json.dumps(mensagem, ensure_ascii=False) + '\n').encode()
+                cliente.escrever(dados)
+                cliente.versao = versao
+                cliente.alterados = set()
+                cliente.completo = False
+
+    # ============ OPERAÇÕES ============
+
+    async def _op_venda(self, cliente, pedido):
+        return await self._op_lote(cliente, {'vendas': [pedido['venda']]})
+
+    async def _op_lote(self, cliente, pedido):
+        vendas = [validar_venda(venda) for venda in pedido['vendas']]
+        if vendas:
+            futuro = asyncio.get_running_loop().create_future()
+            self._fila.put_nowait((vendas, futuro))
+            await futuro
+        return {'gravadas': len(vendas)}
+
+    async def _op_inscrever(self, cliente, pedido):
+        cliente.inscrito = True
+        cliente.versao = self.armazenamento.agregados.versao
+        cliente.alterados = set()
+        cliente.completo = False
+        return estado_agregados(self.armazenamento.agregados)
+
+    async def _op_totais(self, cliente, pedido):
+        return estado_agregados(self.armazenamento.agregados)
+
+    async def _op_pagina(self, cliente, pedido):
+        inicio = max(0, int(pedido['inicio']))
+        limite = max(0, int(pedido['limite']))
+        if pedido.get('consulta') is None:
+            vendas = self.armazenamento.pagina(inicio, limite)
+        else:
+            vendas, quantidade, _ = cliente.consulta(pedido['consulta'])
+            vendas = vendas[inicio:min(quantidade, inicio + limite)]
+        return {'vendas': [dict(venda) for venda in vendas]}
+
+    async def _op_consultar(self, cliente, pedido):
+        ordem = pedido.get('ordem')
+        if ordem is not None:
+            ordem = (ordem[0], bool(ordem[1]))
+        vendas = self.armazenamento.filtrar(ler_filtro(pedido.get('filtro')), ordem)
+        # Sem filtro nem ordem a consulta é a sequência viva: fixar o tamanho atual
+        quantidade = len(vendas)
+        numero = cliente.guardar(vendas, quantidade, fixa=bool(pedido.get('fixa')))
+        return {'consulta': numero, 'quantidade': quantidade}
+
+    async def _op_liberar(self, cliente, pedido):
+        cliente.consultas.pop(pedido['consulta'], None)
+        return {}
+
+    async def _op_agrupar(self, cliente, pedido):
+        lista_dimensoes = [tuple(dimensoes) for dimensoes in pedido['dimensoes']]
+        funcao, argumentos, _ = self.armazenamento.preparar_agrupamentos(
+            lista_dimensoes, pedido.get('de'), pedido.get('ate'))
+        agrupamentos = await asyncio.get_running_loop().run_in_executor(None, funcao, *argumentos)
+        return {'agrupamentos': [agrupamento_json(a) for a in agrupamentos]}
+
+    async def _op_limpar(self, cliente, pedido):
+        self.armazenamento.limpar()
+        for outro in self.clientes:
+            outro.completo = True
+            outro.alterados = set()
+        return {}
+
+    async def _op_estatisticas(self, cliente, pedido):
+        return {'commits': self.commits, 'gravadas': self.gravadas,
+                'clientes': len(self.clientes), 'vendas': self.armazenamento.contar()}
+
+
+# ============ SIMULAÇÃO DE CAIXAS ============
+
+def _servidor_temporario(tipo, pasta, espera_lote, portas):
+    """Processo do servidor da simulação, com armazenamento em pasta temporária"""
+    if tipo == 'sqlite':
+        armazenamento = ArmazenamentoSQLite(os.path.join(pasta, 'vendas.db'), csv_inicial=None)
+    else:
+        armazenamento = ArmazenamentoCSV(os.path.join(pasta, 'vendas_salvas.csv'),
+                                         os.path.join(pasta, 'vendas_salvas.diario'))
+    servidor = ServidorVendas(armazenamento, porta=0, espera_lote=espera_lote)
+    asyncio.run(servidor.executar(ao_iniciar=portas.put))
+
+
+class CaixaSimulado:
+    """Cliente assíncrono que envia uma venda por pedido e aguarda a confirmação"""
+
+    def __init__(self, porta, host=HOST):
+        self.porta = porta
+        self.host = host
+        self.avisos = 0
+        self._pendentes = {}
+        self._numeros = 0
+
+    async def conectar(self):
+        self._leitor, self._escritor = await asyncio.open_connection(
+            self.host, self.porta, limit=LIMITE_LINHA)
+        self._leitura = asyncio.create_task(self._ler())
+
+    async def _ler(self):
+        while True:
+            linha = await self._leitor.readline()
+            if not linha:
+                break
+            mensagem = json.loads(linha)
+            if 'evento' in mensagem:
+                self.avisos += 1
+            else:
+                self._pendentes.pop(mensagem['id']).set_result(mensagem)
+
+    async def pedir(self, operacao, **dados):
+        self._numeros += 1
+        dados.update(op=operacao, id=self._numeros)
+        futuro = self._pendentes[self._numeros] = asyncio.get_running_loop().create_future()
+        self._escritor.write((json.dumps(dados, ensure_ascii=False) + '\n').encode())
+        resposta = await futuro
+        if 'erro' in resposta:
+            raise RuntimeError(resposta['erro'])
+        return resposta
+
+    async def vender(self, vendas, latencias):
+        for venda in vendas:
+            inicio = time.perf_counter()
+            await self.pedir('venda', venda=venda)
+            latencias.append(time.perf_counter() - inicio)
+
+    async def fechar(self):
+        self._escritor.close()
+        self._leitura.cancel()
+        await asyncio.gather(self._leitura, return_exceptions=True)
+
+
+def venda_sintetica(linha):
+    """Linha de gerar_vendas_sinteticas (esquema do CSV) no esquema do armazenamento"""
+    return {'data': linha['data'], 'vendedor': linha['vendedor'], 'produto': linha['produto'],
+            'quantidade': linha['quantidade'], 'preco': float(linha['preco_unitario']),
+            'total': float(linha['valor_total']), 'regiao': linha['regiao']}
+
+
+async def simular_caixas(porta, clientes, vendas_por_cliente, host=HOST):
+    """N caixas inscritos vendendo ao mesmo tempo; vendas/s, latência e tamanho dos lotes"""
+    from benchmark import gerar_vendas_sinteticas
+
+    vendas = [venda_sintetica(linha) for linha in gerar_vendas_sinteticas(clientes * vendas_por_cliente)]
+    caixas = [CaixaSimulado(porta, host) for _ in range(clientes)]
+    for caixa in caixas:
+        await caixa.conectar()
+        await caixa.pedir('inscrever')
+
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(caixa.vender(vendas[i::clientes], latencias)
+                           for i, caixa in enumerate(caixas)))
+    segundos = time.perf_counter() - inicio
+
+    await asyncio.sleep(2 * INTERVALO_AVISO)        # último aviso dos totais
+    estatisticas = await caixas[0].pedir('estatisticas')
+    for caixa in caixas:
+        await caixa.fechar()
+
+    latencias.sort()
+
+    def percentil(p):
+        return 1000 * latencias[min(len(latencias) - 1, int(p * len(latencias)))] if latencias else 0.0
+
+    return {
+        'clientes': clientes,
+        'vendas': len(vendas),
+        'segundos': segundos,
+        'vendas_por_segundo': len(vendas) / segundos if segundos else 0.0,
+        'commits': estatisticas['commits'],
+        'vendas_por_commit': estatisticas['gravadas'] / max(1, estatisticas['commits']),
+        'latencia_p50_ms': percentil(0.50),
+        'latencia_p99_ms': percentil(0.99),
+        'avisos_por_caixa': sum(caixa.avisos for caixa in caixas) / clientes,
+        'vendas_no_servidor': estatisticas['vendas'],
+    }
+
+
+def simular(clientes, vendas_por_cliente, tipo='csv', espera_lote=ESPERA_LOTE):
+    """Servidor em processo próprio (armazenamento temporário) e os caixas neste processo
+
+    Os caixas dividem um único loop: com muitos clientes o gargalo pode
+    ser o próprio simulador, então o resultado é um limite inferior.
+    """
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(prefix='servidor_vendas_') as pasta:
+        portas = contexto.Queue()
+        processo = contexto.Process(target=_servidor_temporario,
+                                    args=(tipo, pasta, espera_lote, portas), daemon=True)
+        processo.start()
+        try:
+            porta = portas.get(timeout=60)
+            return asyncio.run(simular_caixas(porta, clientes, vendas_por_cliente))
+        finally:
+            processo.terminate()
+            processo.join()
+
+
+# ============ LINHA DE COMANDO ============
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local de vendas para vários caixas")
+    parser.add_argument('--armazenamento', choices=('csv', 'sqlite'), default='csv')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--espera-lote', type=float, default=ESPERA_LOTE * 1000,
+                        help=f"ms para juntar vendas no mesmo commit (padrão: {ESPERA_LOTE * 1000:g})")
+    parser.add_argument('--simular', type=int, metavar='CAIXAS',
+                        help="medir vendas/s com N caixas simulados, em armazenamento temporário")
+    parser.add_argument('--vendas', type=int, default=1000, help="vendas por caixa simulado")
+    args = parser.parse_args(argv)
+    espera_lote = args.espera_lote / 1000
+
+    if args.simular:
+        resultado = simular(args.simular, args.vendas, args.armazenamento, espera_lote)
+        print(f"{resultado['clientes']} caixas, {resultado['vendas']} vendas "
+              f"em {resultado['segundos']:.2f} s")
+        print(f"  {resultado['vendas_por_segundo']:,.0f} vendas/s, {resultado['commits']} commits "
+              f"({resultado['vendas_por_commit']:.1f} vendas por commit)")
+        print(f"  latência p50 {resultado['latencia_p50_ms']:.2f} ms, "
+              f"p99 {resultado['latencia_p99_ms']:.2f} ms")
+        print(f"  {resultado['avisos_por_caixa']:.1f} avisos de totais por caixa")
+        return 0 if resultado['vendas_no_servidor'] == resultado['vendas'] else 1
+
+    servidor = ServidorVendas(criar_armazenamento(args.armazenamento), porta=args.porta,
+                              espera_lote=espera_lote)
+    ao_iniciar = lambda porta: print(f"Servidor de vendas em {HOST}:{porta} (Ctrl+C para encerrar)",
+                                     flush=True)
+    try:
+        asyncio.run(servidor.executar(ao_iniciar))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+TABELA VIRTUAL
+Treeview em janela deslizante: apenas as linhas visíveis (mais um pequeno
+buffer) existem como itens do Tk, reaproveitados durante a rolagem
+"""
+
+from tkinter import font as tkfont
+
+
+class TabelaVirtual:
+    """Controla um ttk.Treeview e uma barra de rolagem sobre uma fonte de linhas
+
+    contar()          -> quantidade total de linhas
+    obter(inicio, fim) -> linhas nas posições [inicio, fim)
+    formatar(linha)    -> tupla de valores exibida no Treeview
+    """
+
+    ALTURA_CABECALHO = 25
+
+    def __init__(self, tree, scrollbar, contar, obter, formatar, buffer=5):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.contar = contar
+        self.obter = obter
+        self.formatar = formatar
+        self.buffer = buffer
+
+        self.inicio = 0
+        self.total = 0
+        self.visiveis = 20
+        self._itens = []        # pool de itens do Treeview
+        self._anexados = 0      # itens do pool atualmente exibidos
+
+        fonte = tkfont.nametofont('TkDefaultFont')
+        self.altura_linha = fonte.metrics('linespace') + 4
+
+        self.scrollbar.config(command=self.rolar)
+        self.tree.bind('<Configure>', self._redimensionar)
+        self.tree.bind('<MouseWheel>', self._roda)
+        self.tree.bind('<Button-4>', lambda e: self._rolar_linhas(-3))
+        self.tree.bind('<Button-5>', lambda e: self._rolar_linhas(3))
+
+    # ============ ATUALIZAÇÃO ============
+
+    def atualizar(self):
+        """Recarregar a janela visível a partir da fonte"""
+        self.total = self.contar()
+        self.inicio = self._limitar(self.inicio)
+        self._desenhar()
+
+    def anexar(self, quantidade=1):
+        """Caminho incremental: linhas novas no final da fonte"""
+        anterior = self.total
+        self.total = self.contar()
+        fim_janela = self.inicio + self.visiveis + self.buffer
+        if anterior < fim_janela:
+            # As novas linhas caem dentro da janela: desenhar só elas
+            fim = min(self.total, fim_janela)
+            for posicao, linha in enumerate(self.obter(anterior, fim), anterior - self.inicio):
+                self._exibir(posicao, linha)
+        self._atualizar_barra()
+
+    # ============ ROLAGEM ============
+
+    def rolar(self, acao, valor, unidade=None):
+        """Comando da barra de rolagem ('moveto' ou 'scroll')"""
+        if acao == 'moveto':
+            self._ir_para(int(float(valor) * self.total))
+        elif acao == 'scroll':
+            passo = self.visiveis if unidade == 'pages' else 1
+            self._ir_para(self.inicio + int(valor) * passo)
+
+    def _roda(self, event):
+        self._rolar_linhas(-3 if event.delta > 0 else 3)
+        return 'break'
+
+    def _rolar_linhas(self, linhas):
+        self._ir_para(self.inicio + linhas)
+        return 'break'
+
+    def _ir_para(self, inicio):
+        inicio = self._limitar(inicio)
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._desenhar()
+
+    def _limitar(self, inicio):
+        return max(0, min(inicio, self.total - self.visiveis))
+
+    def _redimensionar(self, event):
+        visiveis = max(1, (event.height - self.ALTURA_CABECALHO) // self.altura_linha)
+        if visiveis != self.visiveis:
+            self.visiveis = visiveis
+            self.inicio = self._limitar(self.inicio)
+            self._desenhar()
+
+    # ============ DESENHO ============
+
+    def _desenhar(self):
+        linhas = self.obter(self.inicio, min(self.total, self.inicio + self.visiveis + self.buffer))
+        for posicao, linha in enumerate(linhas):
+            self._exibir(posicao, linha)
+        for iid in self._itens[len(linhas):self._anexados]:
+            self.tree.detach(iid)
+        self._anexados = min(self._anexados, len(linhas))
+        self.tree.yview_moveto(0)
+        self._atualizar_barra()
+
+    def _exibir(self, posicao, linha):
+        """Mostrar a linha no item 'posicao' do pool"""
+        valores = self.formatar(linha)
+        if posicao < len(self._itens):
+            iid = self._itens[posicao]
+            self.tree.item(iid, values=valores)
+        else:
+            iid = self.tree.insert('', 'end', values=valores)
+            self._itens.append(iid)
+        if posicao >= self._anexados:
+            self.tree.move(iid, '', posicao)
+            self._anexados = posicao + 1
+
+    def _atualizar_barra(self):
+        if self.total <= self.visiveis:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.inicio / self.total,
+                               (self.inicio + self.visiveis) / self.total)
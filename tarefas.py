@@ -0,0 +1,190 @@
+"""
+TAREFAS EM SEGUNDO PLANO
+Executor com pool de threads (I/O) e pool de processos (agregações
+pesadas); resultados, progresso e mensagens voltam para a thread da
+interface por polling (janela.after)
+"""
+
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class Tarefa:
+    """Trabalho em segundo plano com progresso, mensagens e cancelamento"""
+
+    def __init__(self, nome, ao_concluir=None, ao_falhar=None, ao_cancelar=None,
+                 ao_progresso=None, ao_mensagem=None, limite_mensagens=8):
+        self.nome = nome
+        self.futuro = None
+        self.progresso = None       # fração de 0 a 1 (None = indeterminado)
+
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.ao_cancelar = ao_cancelar
+        self.ao_progresso = ao_progresso
+        self.ao_mensagem = ao_mensagem
+
+        self._cancelamento = threading.Event()
+        self._mensagens = queue.Queue(maxsize=limite_mensagens)
+        self._progresso_novo = False
+
+    # ============ LADO DA INTERFACE ============
+
+    def cancelar(self):
+        """Pedir o cancelamento; a função em execução deve consultar 'cancelada'"""
+        self._cancelamento.set()
+        if self.futuro is not None:
+            self.futuro.cancel()
+
+    @property
+    def cancelada(self):
+        return self._cancelamento.is_set()
+
+    # ============ LADO DO TRABALHADOR ============
+
+    def informar_progresso(self, fracao):
+        self.progresso = fracao
+        self._progresso_novo = True
+
+    def enviar(self, mensagem):
+        """Entregar uma mensagem à interface
+
+        Bloqueia enquanto a fila estiver cheia, para que um trabalhador
+        rápido não acumule dados em memória. Devolve False se a tarefa
+        for cancelada durante a espera.
+        """
+        while not self.cancelada:
+            try:
+                self._mensagens.put(mensagem, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+class ExecutorTarefas:
+    """Dispara tarefas e as acompanha a partir do mainloop
+
+    'agendar(ms, funcao)' é normalmente janela.after; todos os callbacks
+    das tarefas rodam dentro dele, na thread da interface.
+    """
+
+    def __init__(self, agendar, intervalo_ms=30, threads=4, processos=None,
+                 mensagens_por_ciclo=4):
+        self.agendar = agendar
+        self.intervalo_ms = intervalo_ms
+        self.mensagens_por_ciclo = mensagens_por_ciclo
+        self._threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='vendas')
+        self._max_processos = processos
+        self._processos = None
+        self._ativas = []
+        self._agendado = False
+
+    def em_thread(self, funcao, *args, nome='', **callbacks):
+        """Executar funcao(tarefa, *args) no pool de threads"""
+        tarefa = Tarefa(nome, **callbacks)
+        tarefa.futuro = self._threads.submit(funcao, tarefa, *args)
+        return self._registrar(tarefa)
+
+    def em_processo(self, funcao, *args, nome='', **callbacks):
+        """Executar funcao(*args) no pool de processos
+
+        A função e os argumentos precisam ser serializáveis (pickle); o
+        progresso é indeterminado e o cancelamento descarta o resultado.
+        """
+        if self._processos is None:
+            # 'spawn' em todas as plataformas: o processo filho não herda o Tk nem threads
+            self._processos = ProcessPoolExecutor(max_workers=self._max_processos,
+                                                  mp_context=multiprocessing.get_context('spawn'))
+        tarefa = Tarefa(nome, **callbacks)
+        tarefa.futuro = self._processos.submit(funcao, *args)
+        return self._registrar(tarefa)
+
+    def _registrar(self, tarefa):
+        self._ativas.append(tarefa)
+        if not self._agendado:
+            self._agendado = True
+            self.agendar(self.intervalo_ms, self._acompanhar)
+        return tarefa
+
+    def ocupado(self):
+        return bool(self._ativas)
+
+    # ============ POLLING ============
+
+    def _acompanhar(self):
+        try:
+            for tarefa in list(self._ativas):
+                self._despachar(tarefa)
+        finally:
+            # Reagendar mesmo se um ao_falhar levantar: as demais tarefas seguem acompanhadas
+            if self._ativas:
+                self.agendar(self.intervalo_ms, self._acompanhar)
+            else:
+                self._agendado = False
+
+    def _despachar(self, tarefa):
+        """Entregar mensagens, progresso e o desfecho; erro de callback vira falha da tarefa"""
+        try:
+            erro = self._entregar(tarefa)
+        except Exception as falha:
+            # Callback da interface falhou: a tarefa é encerrada e o trabalhador, avisado
+            self._retirar(tarefa)
+            tarefa.cancelar()
+            erro = falha
+        if erro is not None and tarefa.ao_falhar is not None:
+            tarefa.ao_falhar(erro)
+
+    def _entregar(self, tarefa):
+        """Chamar os callbacks pendentes; devolve o erro do trabalhador, se terminou com falha"""
+        for _ in range(self.mensagens_por_ciclo):
+            if tarefa.cancelada:
+                break
+            try:
+                mensagem = tarefa._mensagens.get_nowait()
+            except queue.Empty:
+                break
+            if tarefa.ao_mensagem is not None:
+                tarefa.ao_mensagem(mensagem)
+
+        if tarefa._progresso_novo and not tarefa.cancelada:
+            tarefa._progresso_novo = False
+            if tarefa.ao_progresso is not None:
+                tarefa.ao_progresso(tarefa.progresso)
+
+        if tarefa.cancelada:
+            # O trabalhador encerra sozinho ao notar o cancelamento; o resultado é descartado
+            self._retirar(tarefa)
+            if tarefa.ao_cancelar is not None:
+                tarefa.ao_cancelar()
+            return None
+
+        futuro = tarefa.futuro
+        if not futuro.done() or not tarefa._mensagens.empty():
+            return None
+
+        self._retirar(tarefa)
+
+        erro = futuro.exception()
+        if erro is None and tarefa.ao_concluir is not None:
+            tarefa.ao_concluir(futuro.result())
+        return erro
+
+    def _retirar(self, tarefa):
+        if tarefa in self._ativas:
+            self._ativas.remove(tarefa)
+
+    # ============ ENCERRAMENTO ============
+
+    def encerrar(self):
+        """Cancelar tudo e liberar os pools"""
+        for tarefa in self._ativas:
+            tarefa.cancelar()
+        self._ativas = []
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processos is not None:
+            # Esperar os processos: sem isso o gerenciador do pool ainda usa
+            # os pipes durante o encerramento do interpretador (Bad file descriptor)
+            self._processos.shutdown(wait=True, cancel_futures=True)
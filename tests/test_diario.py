@@ -0,0 +1,215 @@
+"""Diário de vendas: reprodução, recuperação, compactação concorrente e retrato"""
+
+import os
+import threading
+
+import pytest
+
+from diario import DiarioVendas
+from retrato import gravar_retrato, ler_retrato
+from vendas_colunares import VendasColunares
+
+
+def venda(i):
+    return {'data': f"{1 + i % 28:02d}/02/2026", 'vendedor': f"Vendedor {i % 3}",
+            'produto': 'Mouse', 'quantidade': 1 + i % 5, 'preco': 10.0,
+            'total': 10.0 * (1 + i % 5), 'regiao': 'Sul'}
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / 'vendas.diario')
+
+
+def abrir(caminho, **kwargs):
+    diario = DiarioVendas(caminho, **kwargs)
+    return diario, diario.carregar()
+
+
+def test_sem_diario(caminho):
+    assert DiarioVendas(caminho).carregar() is None
+
+
+def test_reproduz_vendas_e_limpezas(caminho):
+    diario = DiarioVendas(caminho)
+    diario.iniciar([venda(0), venda(1)])
+    diario.registrar_venda(venda(2))
+    diario.registrar_limpeza()
+    diario.registrar_vendas([venda(3), venda(4)])
+    diario.fechar()
+
+    diario, vendas = abrir(caminho)
+    assert vendas == [venda(3), venda(4)]
+    assert diario.registros == 6
+    assert diario.vivas == 2
+    assert diario.descartados == 0
+    diario.fechar()
+
+
+def test_linha_cortada_no_fim_e_descartada(caminho):
+    diario = DiarioVendas(caminho)
+    diario.iniciar([venda(0)])
+    diario.registrar_venda(venda(1))
+    diario.fechar()
+    tamanho = os.path.getsize(caminho)
+    with open(caminho, 'ab') as f:
+        f.write(b'{"op": "venda", "data": "01/0')
+
+    diario, vendas = abrir(caminho)
+    assert vendas == [venda(0), venda(1)]
+    # A cauda parcial é truncada: o próximo registro começa em linha nova
+    assert os.path.getsize(caminho) == tamanho
+    diario.registrar_venda(venda(2))
+    diario.fechar()
+
+    diario, vendas = abrir(caminho)
+    assert vendas == [venda(0), venda(1), venda(2)]
+    assert diario.descartados == 0
+    diario.fechar()
+
+
+def test_linha_corrompida_no_meio_e_contada(caminho):
+    diario = DiarioVendas(caminho)
+    diario.iniciar([venda(0)])
+    diario.fechar()
+    with open(caminho, 'ab') as f:
+        f.write(b'isto nao e json\n')
+    diario = DiarioVendas(caminho)
+    diario.carregar()
+    diario.registrar_venda(venda(1))
+    diario.fechar()
+
+    diario, vendas = abrir(caminho)
+    assert vendas == [venda(0), venda(1)]
+    assert diario.descartados == 1
+    diario.fechar()
+
+
+class CompactacaoPausada:
+    """Segura a compactação logo após gravar a base do novo arquivo"""
+
+    def __init__(self, diario):
+        self.base_gravada = threading.Event()
+        self.continuar = threading.Event()
+        original = diario._escrever_base
+
+        def escrever_base(caminho, vendas):
+            geracao = original(caminho, vendas)
+            if threading.current_thread() is not threading.main_thread():
+                self.base_gravada.set()
+                assert self.continuar.wait(10)
+            return geracao
+
+        diario._escrever_base = escrever_base
+
+
+def test_vendas_anexadas_durante_a_compactacao(caminho):
+    retratos = []
+    diario = DiarioVendas(caminho, ao_compactar=lambda *args: retratos.append(args))
+    vendas = [venda(i) for i in range(50)]
+    diario.iniciar(vendas)
+    geracao = diario.geracao
+    pausa = CompactacaoPausada(diario)
+
+    diario.compactar(vendas)
+    # Segunda chamada durante a compactação é ignorada
+    diario.compactar(vendas)
+    assert pausa.base_gravada.wait(10)
+    for i in range(50, 60):
+        vendas.append(venda(i))
+        diario.registrar_venda(venda(i))
+    pausa.continuar.set()
+    diario.fechar()
+
+    assert diario.geracao != geracao
+    assert len(retratos) == 1
+    assert retratos[0][1] == 50
+    diario, recarregadas = abrir(caminho)
+    assert recarregadas == [venda(i) for i in range(60)]
+    assert diario.registros == 60
+    diario.fechar()
+    assert not os.path.exists(caminho + '.compactando')
+
+
+def test_limpar_durante_a_compactacao(caminho):
+    diario = DiarioVendas(caminho)
+    vendas = [venda(i) for i in range(20)]
+    diario.iniciar(vendas)
+    pausa = CompactacaoPausada(diario)
+
+    diario.compactar(vendas)
+    assert pausa.base_gravada.wait(10)
+    diario.registrar_limpeza()
+    diario.registrar_venda(venda(99))
+    pausa.continuar.set()
+    diario.fechar()
+
+    diario, recarregadas = abrir(caminho)
+    assert recarregadas == [venda(99)]
+    diario.fechar()
+
+
+def retrato_do_diario(diario, caminho_retrato, vendas):
+    colunas = VendasColunares(vendas)
+    gravar_retrato(caminho_retrato, colunas, diario.geracao,
+                   os.path.getsize(diario.caminho), diario.registros)
+    return ler_retrato(caminho_retrato)
+
+
+def test_retrato_valido_reproduz_so_o_restante(caminho, tmp_path):
+    caminho_retrato = str(tmp_path / 'vendas.retrato')
+    diario = DiarioVendas(caminho)
+    diario.iniciar([venda(0), venda(1)])
+    diario.fechar()
+    retrato = retrato_do_diario(diario, caminho_retrato, [venda(0), venda(1)])
+
+    diario = DiarioVendas(caminho)
+    diario.carregar(criar=VendasColunares)
+    diario.registrar_venda(venda(2))
+    diario.fechar()
+
+    diario = DiarioVendas(caminho)
+    assert diario._base_valida(retrato)
+    vendas = diario.carregar(criar=VendasColunares, base=ler_retrato(caminho_retrato))
+    assert [dict(v) for v in vendas] == [venda(0), venda(1), venda(2)]
+    diario.fechar()
+
+
+def test_retrato_de_outra_geracao_e_recusado(caminho, tmp_path):
+    caminho_retrato = str(tmp_path / 'vendas.retrato')
+    diario = DiarioVendas(caminho)
+    diario.iniciar([venda(0)])
+    diario.fechar()
+    retrato = retrato_do_diario(diario, caminho_retrato, [venda(0)])
+
+    # Diário recriado (nova geração) com o mesmo tamanho
+    diario = DiarioVendas(caminho)
+    diario.iniciar([venda(0)])
+    diario.fechar()
+
+    diario = DiarioVendas(caminho)
+    assert not diario._base_valida(retrato)
+    assert diario.carregar(criar=VendasColunares, base=retrato) is None
+
+
+def test_retrato_alem_do_fim_do_diario_e_recusado(caminho, tmp_path):
+    caminho_retrato = str(tmp_path / 'vendas.retrato')
+    diario = DiarioVendas(caminho)
+    diario.iniciar([venda(0), venda(1)])
+    diario.fechar()
+    retrato = retrato_do_diario(diario, caminho_retrato, [venda(0), venda(1)])
+
+    with open(caminho, 'r+b') as f:
+        f.truncate(retrato.deslocamento - 5)
+    assert not DiarioVendas(caminho)._base_valida(retrato)
+
+
+def test_retrato_fora_de_fim_de_linha_e_recusado(caminho, tmp_path):
+    caminho_retrato = str(tmp_path / 'vendas.retrato')
+    diario = DiarioVendas(caminho)
+    diario.iniciar([venda(0), venda(1)])
+    diario.fechar()
+    retrato = retrato_do_diario(diario, caminho_retrato, [venda(0), venda(1)])
+
+    retrato.deslocamento -= 1
+    assert not DiarioVendas(caminho)._base_valida(retrato)
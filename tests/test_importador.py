@@ -0,0 +1,61 @@
+"""Importador: números no formato brasileiro e validação das linhas"""
+
+import pytest
+
+from importador import ErroLinha, LeitorVendas, converter_campos, converter_numero
+
+
+@pytest.mark.parametrize('texto, valor', [
+    ('1234.5', 1234.5),
+    ('12.34', 12.34),
+    ('1.2345', 1.2345),
+    ('0.125', 0.125),
+    ('1.234,50', 1234.5),
+    ('1.234', 1234.0),
+    ('1.234.567', 1234567.0),
+    ('-1.500', -1500.0),
+    (' 2.0 ', 2.0),
+])
+def test_converter_numero(texto, valor):
+    assert converter_numero(texto) == valor
+
+
+def test_converter_campos_com_milhar():
+    venda = converter_campos({'data': '01/02/2026', 'vendedor': 'Ana', 'produto': 'Notebook',
+                              'quantidade': '2', 'preco': '3.500', 'regiao': 'Sul'})
+    assert (venda['quantidade'], venda['preco'], venda['total']) == (2, 3500.0, 7000.0)
+
+
+@pytest.mark.parametrize('quantidade, preco', [('2.5', '10'), ('1', 'nan'), ('1', 'dez')])
+def test_converter_campos_rejeita(quantidade, preco):
+    with pytest.raises(ErroLinha):
+        converter_campos({'data': '01/02/2026', 'vendedor': 'Ana', 'produto': 'Mouse',
+                          'quantidade': quantidade, 'preco': preco, 'regiao': 'Sul'})
+
+
+def test_progresso_conta_bytes(tmp_path):
+    caminho = tmp_path / 'vendas.csv'
+    linhas = ['data,vendedor,produto,quantidade,preco,regiao']
+    linhas += ["01/02/2026,João Conceição,Câmera,1,10,São Paulo" for _ in range(50)]
+    caminho.write_text('\n'.join(linhas) + '\n', encoding='utf-8')
+    leitor = LeitorVendas(str(caminho))
+    vendas = list(leitor)
+    assert len(vendas) == 50
+    assert leitor.lido == leitor.tamanho
+    assert leitor.progresso == 1.0
+
+
+def test_rejeitados_anteriores_sao_removidos(tmp_path):
+    caminho = tmp_path / 'vendas.csv'
+    rejeitados = tmp_path / 'vendas.csv.rejeitados.csv'
+    cabecalho = 'data,vendedor,produto,quantidade,preco,regiao\n'
+    caminho.write_text(cabecalho + '01/02/2026,Ana,Mouse,x,10,Sul\n', encoding='utf-8')
+    leitor = LeitorVendas(str(caminho))
+    assert list(leitor) == []
+    assert leitor.resultado.arquivo_rejeitados == str(rejeitados)
+
+    caminho.write_text(cabecalho + '01/02/2026,Ana,Mouse,1,10,Sul\n', encoding='utf-8')
+    leitor = LeitorVendas(str(caminho))
+    assert len(list(leitor)) == 1
+    assert leitor.resultado.arquivo_rejeitados is None
+    assert not rejeitados.exists()
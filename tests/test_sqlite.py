@@ -0,0 +1,47 @@
+"""Armazenamento SQLite: paginação por chave equivale a LIMIT/OFFSET"""
+
+import random
+
+import pytest
+
+from armazenamento import ArmazenamentoSQLite
+
+
+def venda(i):
+    return {'data': f"{1 + i % 28:02d}/02/2026", 'vendedor': f"Vendedor {i % 3}",
+            'produto': 'Mouse', 'quantidade': 1 + i % 5, 'preco': 10.0,
+            'total': 10.0 * (1 + i % 5), 'regiao': 'Sul'}
+
+
+@pytest.fixture
+def armazenamento(tmp_path):
+    armazenamento = ArmazenamentoSQLite(str(tmp_path / 'vendas.db'), csv_inicial=None)
+    armazenamento.abrir()
+    yield armazenamento
+    armazenamento.fechar()
+
+
+def test_pagina_sequencial_e_saltos(armazenamento):
+    vendas = [venda(i) for i in range(2000)]
+    armazenamento.adicionar_lote(vendas)
+    for inicio in range(0, 2000, 300):
+        assert armazenamento.pagina(inicio, 300) == vendas[inicio:inicio + 300]
+
+    sorteio = random.Random(7)
+    for _ in range(200):
+        inicio, limite = sorteio.randrange(2100), sorteio.randrange(1, 120)
+        assert armazenamento.pagina(inicio, limite) == vendas[inicio:inicio + limite]
+    assert armazenamento.pagina(10, 0) == []
+
+
+def test_pagina_apos_novas_vendas_e_limpeza(armazenamento):
+    armazenamento.adicionar_lote([venda(i) for i in range(100)])
+    assert armazenamento.pagina(90, 10) == [venda(i) for i in range(90, 100)]
+    armazenamento.adicionar(venda(100))
+    assert armazenamento.pagina(100, 10) == [venda(100)]
+
+    armazenamento.limpar()
+    armazenamento.adicionar_lote([venda(i) for i in range(200, 220)])
+    assert armazenamento.pagina(5, 3) == [venda(i) for i in range(205, 208)]
+    assert list(armazenamento.vendas)[:2] == [venda(200), venda(201)]
+    assert armazenamento.vendas[19] == venda(219)
@@ -0,0 +1,28 @@
+"""Vendas colunares: colunas sempre do mesmo tamanho"""
+
+import pytest
+
+from vendas_colunares import COLUNAS_CATEGORIA, VendasColunares
+
+VENDA = {'data': '01/02/2026', 'vendedor': 'Ana', 'produto': 'Mouse', 'quantidade': 2,
+         'preco': 10.5, 'total': 21.0, 'regiao': 'Sul'}
+
+
+def tamanhos(vendas):
+    return ({len(vendas.codigos[campo]) for campo in COLUNAS_CATEGORIA}
+            | {len(vendas.quantidade), len(vendas.preco), len(vendas.total)})
+
+
+@pytest.mark.parametrize('alteracao, erro', [
+    ({'quantidade': 2.5}, TypeError),
+    ({'quantidade': 2 ** 70}, OverflowError),
+    ({'preco': 'dez'}, ValueError),
+    ({'total': None}, TypeError),
+])
+def test_valor_invalido_nao_desalinha_as_colunas(alteracao, erro):
+    vendas = VendasColunares([VENDA])
+    with pytest.raises(erro):
+        vendas.append(dict(VENDA, **alteracao))
+    assert tamanhos(vendas) == {1}
+    vendas.append(VENDA)
+    assert [dict(venda) for venda in vendas] == [VENDA, VENDA]
@@ -0,0 +1,137 @@
+"""
+SISTEMA DE VENDAS - LINHA DE COMANDO
+Relatórios, exportações e importações sem interface gráfica.
+Não importa tkinter: roda em servidores sem display (rotinas noturnas).
+
+Exemplos:
+    python vendas_cli.py relatorio relatorio_vendas_30dias.csv
+    python vendas_cli.py relatorio a.csv b.csv --de 01/01/2026 --ate 31/01/2026 --agrupar produto,dia
+    python vendas_cli.py exportar a.csv b.csv --saida todas.csv
+    python vendas_cli.py exportar a.csv --de 01/01/2026 --saida janeiro.jsonl
+    python vendas_cli.py importar relatorio_vendas_30dias.csv --armazenamento sqlite
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+import exportador
+from agrupamento import normalizar_dimensoes
+from armazenamento import criar_armazenamento
+from importador import LeitorVendas, em_lotes
+from relatorios import relatorio_vendas
+from serie_temporal import dentro_periodo, ordinal_data
+from vendas_colunares import VendasColunares
+
+
+def ler_data(texto):
+    """Argumento 'dd/mm/YYYY' -> ordinal do dia"""
+    try:
+        return datetime.strptime(texto, '%d/%m/%Y').toordinal()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use dd/mm/aaaa): {texto}")
+
+
+def ler_arquivos(arquivos, de=None, ate=None):
+    """Vendas de vários CSVs em sequência, opcionalmente filtradas por período"""
+    filtrar = de is not None or ate is not None
+    for arquivo in arquivos:
+        leitor = LeitorVendas(arquivo)
+        for venda in leitor:
+            if filtrar and not dentro_periodo(ordinal_data(venda['data']), de, ate):
+                continue
+            yield venda
+        resultado = leitor.resultado
+        mensagem = f"{arquivo}: {resultado.importadas} vendas lidas"
+        if resultado.rejeitadas:
+            mensagem += f", {resultado.rejeitadas} rejeitadas (ver {resultado.arquivo_rejeitados})"
+        print(mensagem, file=sys.stderr)
+
+
+def comando_relatorio(args):
+    # Histórico completo em memória: o período sai do índice de datas e as
+    # comparações (ex.: 30 dias anteriores) enxergam as vendas fora dele
+    vendas = VendasColunares(ler_arquivos(args.arquivos))
+    if not len(vendas.indices_periodo(args.de, args.ate)):
+        print("Nenhuma venda no período informado.", file=sys.stderr)
+        return 1
+
+    texto = relatorio_vendas(vendas, agrupar=args.agrupar or [('vendedor', 'regiao')],
+                             top=args.top, de=args.de, ate=args.ate)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+        print(f"Relatório salvo em: {args.saida}", file=sys.stderr)
+    else:
+        sys.stdout.write(texto)
+    return 0
+
+
+def comando_exportar(args):
+    resultado = exportador.exportar(ler_arquivos(args.arquivos, args.de, args.ate), args.saida,
+                                    args.formato)
+    print(f"{resultado} exportadas para: {args.saida}", file=sys.stderr)
+    return 0
+
+
+def comando_importar(args):
+    armazenamento = criar_armazenamento(args.armazenamento)
+    armazenamento.abrir()
+    importadas = 0
+    try:
+        for lote in em_lotes(ler_arquivos(args.arquivos, args.de, args.ate)):
+            armazenamento.adicionar_lote(lote)
+            importadas += len(lote)
+    finally:
+        armazenamento.fechar()
+    print(f"{importadas} vendas importadas ({args.armazenamento})", file=sys.stderr)
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='vendas_cli',
+        description="Relatórios e exportações do sistema de vendas sem interface gráfica")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    def periodo(sub):
+        sub.add_argument('arquivos', nargs='+', help="arquivos CSV de vendas")
+        sub.add_argument('--de', type=ler_data, help="data inicial (dd/mm/aaaa)")
+        sub.add_argument('--ate', type=ler_data, help="data final (dd/mm/aaaa)")
+
+    relatorio = subcomandos.add_parser('relatorio', help="gerar o relatório completo")
+    periodo(relatorio)
+    relatorio.add_argument('--agrupar', action='append', type=normalizar_dimensoes,
+                           help="cruzamento extra, ex.: vendedor,regiao ou produto,dia "
+                                "(pode repetir; padrão: vendedor,regiao)")
+    relatorio.add_argument('--top', type=int, default=10, help="grupos por cruzamento")
+    relatorio.add_argument('--saida', help="arquivo de saída (padrão: tela)")
+    relatorio.set_defaults(executar=comando_relatorio)
+
+    exportar = subcomandos.add_parser('exportar', help="juntar e normalizar CSVs em um único arquivo")
+    periodo(exportar)
+    exportar.add_argument('--saida', required=True, help="arquivo de destino")
+    exportar.add_argument('--formato', choices=sorted(exportador.GRAVADORES),
+                          help="formato da saída (padrão: pela extensão, .csv.gz, .jsonl, .vcol ou CSV)")
+    exportar.set_defaults(executar=comando_exportar)
+
+    importar = subcomandos.add_parser('importar', help="incluir vendas no armazenamento do sistema")
+    periodo(importar)
+    importar.add_argument('--armazenamento', choices=('csv', 'sqlite', 'remoto'), default='csv',
+                          help="'remoto' envia ao servidor.py em execução")
+    importar.set_defaults(executar=comando_importar)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    try:
+        return args.executar(args)
+    except (OSError, ValueError) as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+VENDAS COLUNARES
+Armazenamento em memória por colunas: valores numéricos em arrays e
+textos repetidos (data, vendedor, produto, região) codificados em dicionários,
+com índice das posições ordenadas por data para consultas por período
+"""
+
+import operator
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+
+from agrupamento import np
+
+CAMPOS = ['data', 'vendedor', 'produto', 'quantidade', 'preco', 'total', 'regiao']
+COLUNAS_CATEGORIA = ('data', 'vendedor', 'produto', 'regiao')
+TIPOS_NUMPY = {'I': 'uint32', 'q': 'int64', 'd': 'float64'}
+
+
+class Dicionario:
+    """Tabela de strings: cada valor distinto recebe um código inteiro"""
+
+    __slots__ = ('valores', 'codigos')
+
+    def __init__(self):
+        self.valores = []
+        self.codigos = {}
+
+    def codificar(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = self.codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def __len__(self):
+        return len(self.valores)
+
+    def copiar(self):
+        copia = type(self)()
+        copia.valores = list(self.valores)
+        copia.codigos = dict(self.codigos)
+        return copia
+
+
+class DicionarioDatas(Dicionario):
+    """Dicionário de datas 'dd/mm/YYYY' que guarda também o dia já convertido"""
+
+    __slots__ = ('ordinais',)
+
+    def __init__(self):
+        super().__init__()
+        self.ordinais = array('l')      # date.toordinal() de cada código (0 = inválida)
+
+    def codificar(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = super().codificar(valor)
+            try:
+                self.ordinais.append(datetime.strptime(valor, '%d/%m/%Y').toordinal())
+            except (ValueError, TypeError):
+                self.ordinais.append(0)
+        return codigo
+
+    def copiar(self):
+        copia = super().copiar()
+        copia.ordinais = self.ordinais[:]
+        return copia
+
+
+class LinhaVenda(Mapping):
+    """Visão de uma venda do armazenamento colunar, lida como um dicionário"""
+
+    __slots__ = ('_vendas', '_indice')
+
+    def __init__(self, vendas, indice):
+        self._vendas = vendas
+        self._indice = indice
+
+    def __getitem__(self, campo):
+        return self._vendas.valor(self._indice, campo)
+
+    def __iter__(self):
+        return iter(CAMPOS)
+
+    def __len__(self):
+        return len(CAMPOS)
+
+    def __repr__(self):
+        return f"LinhaVenda({dict(self)!r})"
+
+
+class VendasColunares(Sequence):
+    """Sequência de vendas guardada por colunas"""
+
+    def __init__(self, vendas=()):
+        self.dicionarios = {campo: Dicionario() for campo in COLUNAS_CATEGORIA}
+        self.dicionarios['data'] = DicionarioDatas()
+        self.codigos = {campo: array('I') for campo in COLUNAS_CATEGORIA}
+        self.quantidade = array('q')
+        self.preco = array('d')
+        self.total = array('d')
+        self._indice_datas = None       # (posições em ordem de data, dias), montado sob demanda
+        self.extend(vendas)
+
+    # ============ ESCRITA ============
+
+    def append(self, venda):
+        # Tudo convertido antes de crescer qualquer coluna: um valor inválido
+        # levanta a exceção sem deixar as colunas com tamanhos diferentes
+        quantidade = operator.index(venda['quantidade'])
+        preco = float(venda['preco'])
+        total = float(venda['total'])
+        codigos = [self.dicionarios[campo].codificar(venda[campo]) for campo in COLUNAS_CATEGORIA]
+        self.quantidade.append(quantidade)      # OverflowError antes das demais colunas
+        self.preco.append(preco)
+        self.total.append(total)
+        for campo, codigo in zip(COLUNAS_CATEGORIA, codigos):
+            self.codigos[campo].append(codigo)
+
+        if self._indice_datas is not None:
+            # Vendas chegam quase sempre em ordem de data: o índice só cresce no fim
+            ordem, dias = self._indice_datas
+            dia = self.dicionarios['data'].ordinais[self.codigos['data'][-1]]
+            if not dias or dia >= dias[-1]:
+                ordem.append(len(self.total) - 1)
+                dias.append(dia)
+            else:
+                self._indice_datas = None
+
+    def extend(self, vendas):
+        for venda in vendas:
+            self.append(venda)
+
+    def __delitem__(self, indice):
+        indice = self._normalizar(indice)
+        for coluna in self.codigos.values():
+            coluna.pop(indice)
+        self.quantidade.pop(indice)
+        self.preco.pop(indice)
+        self.total.pop(indice)
+        self._indice_datas = None
+
+    def copiar(self):
+        """Cópia independente das colunas, para enviar a outra thread ou processo"""
+        copia = VendasColunares()
+        tamanho = len(self)
+        for campo in COLUNAS_CATEGORIA:
+            copia.dicionarios[campo] = self.dicionarios[campo].copiar()
+            copia.codigos[campo] = self.codigos[campo][:tamanho]
+        copia.quantidade = self.quantidade[:tamanho]
+        copia.preco = self.preco[:tamanho]
+        copia.total = self.total[:tamanho]
+        return copia
+
+    def selecionar(self, indices):
+        """Cópia independente só com as vendas das posições indicadas, nessa ordem"""
+        copia = VendasColunares()
+        for campo in COLUNAS_CATEGORIA:
+            copia.dicionarios[campo] = self.dicionarios[campo].copiar()
+            copia.codigos[campo] = _tomar(self.codigos[campo], indices)
+        copia.quantidade = _tomar(self.quantidade, indices)
+        copia.preco = _tomar(self.preco, indices)
+        copia.total = _tomar(self.total, indices)
+        return copia
+
+    # ============ LEITURA ============
+
+    def __len__(self):
+        return len(self.total)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [LinhaVenda(self, i) for i in range(*indice.indices(len(self)))]
+        return LinhaVenda(self, self._normalizar(indice))
+
+    def __iter__(self):
+        for indice in range(len(self)):
+            yield LinhaVenda(self, indice)
+
+    def _normalizar(self, indice):
+        tamanho = len(self)
+        if indice < 0:
+            indice += tamanho
+        if not 0 <= indice < tamanho:
+            raise IndexError('índice de venda fora do intervalo')
+        return indice
+
+    def valor(self, indice, campo):
+        """Valor de um campo da venda na posição indicada"""
+        if campo in self.codigos:
+            return self.dicionarios[campo].valores[self.codigos[campo][indice]]
+        if campo == 'quantidade':
+            return self.quantidade[indice]
+        if campo == 'preco':
+            return self.preco[indice]
+        if campo == 'total':
+            return self.total[indice]
+        raise KeyError(campo)
+
+    # ============ PERÍODOS ============
+
+    def dias(self):
+        """Coluna de datas convertidas: date.toordinal() de cada venda (0 = inválida)"""
+        ordinais = self.dicionarios['data'].ordinais
+        codigos = self.codigos['data'][:len(self)]
+        if np is not None:
+            return np.asarray(ordinais, dtype=np.int64)[np.frombuffer(codigos, dtype=np.uint32)]
+        return array('q', map(ordinais.__getitem__, codigos))
+
+    def indice_datas(self):
+        """(ordem, dias): posições das vendas ordenadas por data e o dia de cada uma"""
+        if self._indice_datas is None:
+            dias = self.dias()
+            if np is not None:
+                ordem = np.argsort(dias, kind='stable')
+                self._indice_datas = (array('I', ordem.astype(np.uint32).tobytes()),
+                                      array('q', dias[ordem].tobytes()))
+            else:
+                ordem = sorted(range(len(dias)), key=dias.__getitem__)
+                self._indice_datas = (array('I', ordem), array('q', map(dias.__getitem__, ordem)))
+        return self._indice_datas
+
+    def indices_periodo(self, de=None, ate=None):
+        """Posições das vendas com data em [de, ate] (ordinais), em ordem de data"""
+        ordem, dias = self.indice_datas()
+        inicio = bisect_left(dias, 1 if de is None else max(de, 1))
+        fim = len(dias) if ate is None else bisect_right(dias, ate)
+        return ordem[inicio:max(inicio, fim)]
+
+    def periodo(self, de=None, ate=None):
+        """Cópia independente com as vendas do período, em ordem de data"""
+        return self.selecionar(self.indices_periodo(de, ate))
+
+    # ============ AGREGAÇÃO ============
+
+    def resumo(self):
+        """(quantidade de vendas, valor total, unidades)"""
+        return len(self), sum(self.total), sum(self.quantidade)
+
+    def memoria(self):
+        """Bytes ocupados pelas colunas (sem contar as tabelas de strings)"""
+        colunas = list(self.codigos.values()) + [self.quantidade, self.preco, self.total]
+        return sum(coluna.itemsize * len(coluna) for coluna in colunas)
+
+
+def _tomar(coluna, indices):
+    """Elementos da coluna nas posições indicadas"""
+    if np is not None and len(indices):
+        tipo = TIPOS_NUMPY[coluna.typecode]
+        selecionados = np.frombuffer(coluna, dtype=tipo)[np.frombuffer(indices, dtype=np.uint32)]
+        return array(coluna.typecode, selecionados.tobytes())
+    return array(coluna.typecode, map(coluna.__getitem__, indices))
+
+
+# ============ COMPARAÇÃO COM LISTA DE DICIONÁRIOS ============
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+    import tracemalloc
+
+    from agrupamento import agrupar_colunas
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    aleatorio = random.Random(42)
+    vendedores = ['Ana', 'Bruno', 'Carla', 'Joao', 'Maria', 'Pedro']
+    produtos = ['Notebook', 'Smartphone', 'Tablet', 'Monitor', 'Mouse', 'Teclado', 'Fone', 'Webcam']
+    regioes = ['Norte', 'Sul', 'Leste', 'Oeste', 'Centro']
+
+    def gerar():
+        for i in range(n):
+            qtd = aleatorio.randint(1, 5)
+            preco = float(aleatorio.randint(50, 3000))
+            yield {
+                'data': f"{1 + i % 28:02d}/{1 + i // 28 % 12:02d}/2026",
+                'vendedor': aleatorio.choice(vendedores),
+                'produto': aleatorio.choice(produtos),
+                'quantidade': qtd,
+                'preco': preco,
+                'total': qtd * preco,
+                'regiao': aleatorio.choice(regioes)
+            }
+
+    def medir(construir):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        vendas = construir()
+        tempo = time.perf_counter() - inicio
+        atual = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return vendas, tempo, atual
+
+    lista, t_lista, m_lista = medir(lambda: list(gerar()))
+    aleatorio.seed(42)
+    colunar, t_colunar, m_colunar = medir(lambda: VendasColunares(gerar()))
+
+    inicio = time.perf_counter()
+    por_vendedor = {}
+    for v in lista:
+        por_vendedor[v['vendedor']] = por_vendedor.get(v['vendedor'], 0) + v['total']
+    t_agg_lista = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    agrupar_colunas(colunar, 'vendedor')
+    t_agg_colunar = time.perf_counter() - inicio
+
+    print(f"{n} vendas")
+    print(f"{'':<22}{'memória (MB)':>14}{'carga (s)':>12}{'agrupar (s)':>14}")
+    print(f"{'lista de dicionários':<22}{m_lista / 1e6:>14.1f}{t_lista:>12.3f}{t_agg_lista:>14.3f}")
+    print(f"{'colunar':<22}{m_colunar / 1e6:>14.1f}{t_colunar:>12.3f}{t_agg_colunar:>14.3f}")